@@ -1,23 +1,304 @@
 """
 Browser agent module for headless browsing and scraping.
 """
-from typing import Optional
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
-from core.utils import logger, load_config
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from core.tracing import traced
+from core.utils import logger, load_config, subscribe_config
 import asyncio
+import httpx
+import importlib.util
+import re
+import time
+
+# Playwright and BeautifulSoup are imported on first use, keeping this module cheap to import.
+async_playwright: Any = None
+BeautifulSoup: Any = None
+
+
+def _load_playwright() -> Any:
+    global async_playwright
+    if async_playwright is None:
+        from playwright.async_api import async_playwright
+    return async_playwright
+
+
+def _load_soup() -> Any:
+    global BeautifulSoup
+    if BeautifulSoup is None:
+        from bs4 import BeautifulSoup
+    return BeautifulSoup
+
+
+# Fastest first; html.parser ships with Python.
+HTML_PARSERS = ('selectolax', 'lxml', 'html.parser')
+_APP_SHELL = re.compile(r'<div[^>]+id=["\'](?:root|app|__next|__nuxt)["\'][^>]*>\s*</div>', re.IGNORECASE)
+_JS_NOTICE = re.compile(r'(?:enable|requires?) javascript', re.IGNORECASE)
+_NOSCRIPT = re.compile(r'<noscript\b.*?</noscript\s*>', re.IGNORECASE | re.DOTALL)
+# A "please enable JavaScript" notice only means an app shell on a page with little else to read.
+_NOTICE_MAX_TEXT_CHARS = 500
+
+
+def html_parser(preferred: str = 'auto') -> str:
+    """
+    Picks the HTML parser: `preferred` if installed, otherwise the fastest available.
+    """
+    candidates = HTML_PARSERS if preferred == 'auto' else (preferred,)
+    for name in candidates:
+        if name == 'html.parser' or importlib.util.find_spec(name) is not None:
+            return name
+    logger.warning(f"HTML parser {preferred} is not installed; using html.parser.")
+    return 'html.parser'
+
+
+def extract_text(html: str, selector: Optional[str] = None, parser: str = 'html.parser') -> Optional[str]:
+    """
+    Extracts visible text from HTML, optionally from the first element matching `selector`.
+
+    Args:
+        html (str): The page source.
+        selector (Optional[str]): CSS selector to extract specific content.
+        parser (str): One of `HTML_PARSERS`; all give the same text.
+
+    Returns:
+        Optional[str]: The text, or None if `selector` matched nothing.
+    """
+    if parser == 'selectolax':
+        from selectolax.lexbor import LexborHTMLParser
+        tree = LexborHTMLParser(html)
+        if selector:
+            node = tree.css_first(selector)
+            return node.text(strip=True) if node else None
+        tree.strip_tags(['script', 'style'])
+        return tree.root.text(separator=' ', strip=True) if tree.root else ''
+    soup = _load_soup()(html, parser)
+    if selector:
+        element = soup.select_one(selector)
+        return element.get_text(strip=True) if element else None
+    return soup.get_text(separator=' ', strip=True)
+
+
+def needs_javascript(html: str, text: Optional[str], min_text_chars: int = 0) -> bool:
+    """
+    Whether a statically fetched page looks like it only renders its content with JavaScript.
+
+    True for an empty app shell (`<div id="root"></div>`), an "enable
+    JavaScript" notice outside `<noscript>` on a page with little text, a
+    selector that matched nothing, or less than `min_text_chars` of text on a
+    page that has scripts.
+    """
+    if text is None or _APP_SHELL.search(html):
+        return True
+    if len(text) < _NOTICE_MAX_TEXT_CHARS and _JS_NOTICE.search(_NOSCRIPT.sub('', html)):
+        return True
+    return len(text) < min_text_chars and '<script' in html.lower()
+
+
+@dataclass
+class CachedPage:
+    """
+    Extracted text and the validators to revalidate it with.
+    """
+    text: str
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
 
 class BrowserAgent:
     """
-    Uses Playwright to browse and BeautifulSoup to scrape text.
+    Fetches pages over plain HTTP, or with Playwright when they need JavaScript, and scrapes their text.
+
+    In `browser_agent.fetch_mode: auto`, a page is first fetched with a pooled
+    HTTP client and only rendered in the browser when the static HTML looks
+    like a JavaScript shell (see `needs_javascript`), the request fails, or
+    the response is not HTML. `http` never launches the browser and `browser`
+    always does. Text is extracted with the fastest installed parser
+    (selectolax, lxml, then html.parser) and cached per URL and selector for
+    `cache.ttl_s`; stale entries are revalidated with If-None-Match /
+    If-Modified-Since when the server sent an ETag or Last-Modified.
+
+    One Chromium instance is launched on first use and kept alive; fetches
+    reuse up to `browser_agent.max_pages` pages from a single browser context,
+    which also bounds how many run at once. Requests for `block_resources`
+    types (images, fonts, media by default) are aborted before they hit the
+    network. If the browser crashes or disconnects it is relaunched on the
+    next fetch, and a fetch that failed because of it is retried up to
+    `restart_attempts` times. Call `close()` (or use `async with`) to shut it down.
     """
-    def __init__(self) -> None:
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        """
+        Args:
+            transport (Optional[httpx.AsyncBaseTransport]): HTTP transport override (e.g. httpx.MockTransport).
+        """
         self.config = load_config()
-        self.timeout: int = self.config.get('browser_agent', {}).get('timeout', 10000)
+        agent_config = self.config.get('browser_agent', {})
+        http_config = agent_config.get('http', {})
+        self.max_pages: int = agent_config.get('max_pages', 4)
+        self.headless: bool = agent_config.get('headless', True)
+        self.restarts = 0
+        self.max_connections: int = http_config.get('max_connections', 8)
+        self.user_agent: Optional[str] = http_config.get('user_agent')
+        self.apply_config(agent_config)
+        self.transport = transport
+        self.stats: Dict[str, int] = {'cache_hits': 0, 'revalidated': 0, 'http': 0, 'browser': 0}
+        self._cache: 'OrderedDict[Tuple[str, Optional[str]], CachedPage]' = OrderedDict()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._playwright: Any = None
+        self._browser: Any = None
+        self._context: Any = None
+        self._idle: List[Any] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        subscribe_config(self.apply_config, 'browser_agent')
+
+    def apply_config(self, agent_config: Dict[str, Any]) -> None:
+        """
+        Applies the `browser_agent` section; called again whenever it changes on disk.
+
+        Pool size, headless mode and HTTP client settings are fixed for the
+        lifetime of the browser and client, so they are read only once.
+        """
+        cache_config = agent_config.get('cache', {})
+        self.timeout: int = agent_config.get('timeout', 10000)
+        self.wait_until: str = agent_config.get('wait_until', 'load')
+        self.block_resources: frozenset = frozenset(agent_config.get('block_resources', ['image', 'font', 'media']))
+        self.restart_attempts: int = agent_config.get('restart_attempts', 1)
+        self.fetch_mode: str = agent_config.get('fetch_mode', 'auto')
+        self.parser: str = html_parser(agent_config.get('parser', 'auto'))
+        self.min_text_chars: int = agent_config.get('min_text_chars', 200)
+        self.offload_chars: int = agent_config.get('offload_chars', 65536)
+        self.cache_enabled: bool = cache_config.get('enabled', True)
+        self.cache_max_items: int = cache_config.get('max_items', 512)
+        self.cache_ttl_s: float = cache_config.get('ttl_s', 3600)
 
+    async def __aenter__(self) -> 'BrowserAgent':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    @property
+    def healthy(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def start(self) -> None:
+        """
+        Launches the browser if it is not running (or has crashed).
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Playwright objects are bound to the loop that created them.
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_pages)
+            self._lock = asyncio.Lock()
+            self._playwright = self._browser = self._context = None
+            self._idle = []
+        async with self._lock:
+            if self.healthy:
+                return
+            if self._browser is not None:
+                logger.warning("Browser disconnected; relaunching.")
+                self.restarts += 1
+            await self._shutdown()
+            logger.info("Launching browser")
+            self._playwright = await _load_playwright()().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._context = await self._browser.new_context()
+            if self.block_resources:
+                await self._context.route('**/*', self._route)
+
+    async def _route(self, route: Any) -> None:
+        if route.request.resource_type in self.block_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _shutdown(self) -> None:
+        self._idle = []
+        for resource, method in ((self._context, 'close'), (self._browser, 'close'), (self._playwright, 'stop')):
+            if resource is None:
+                continue
+            try:
+                await getattr(resource, method)()
+            except Exception as e:
+                logger.debug(f"Browser shutdown: {e}")
+        self._playwright = self._browser = self._context = None
+
+    async def close(self) -> None:
+        """
+        Closes the HTTP client, every page and the browser.
+        """
+        if self._client is not None and self._client_loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        if self._lock is None:
+            return
+        async with self._lock:
+            await self._shutdown()
+
+    def _http(self) -> httpx.AsyncClient:
+        # Pooled connections belong to the loop that opened them, so a new loop gets a new pool.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections)
+            headers = {'User-Agent': self.user_agent} if self.user_agent else None
+            self._client = httpx.AsyncClient(timeout=self.timeout / 1000, limits=limits, headers=headers,
+                                             follow_redirects=True, transport=self.transport)
+            self._client_loop = loop
+        return self._client
+
+    async def _acquire_page(self) -> Any:
+        while self._idle:
+            page = self._idle.pop()
+            if not page.is_closed():
+                return page
+        return await self._context.new_page()
+
+    async def _release_page(self, page: Any, reusable: bool) -> None:
+        if reusable and self.healthy and not page.is_closed():
+            self._idle.append(page)
+            return
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    @traced('browser.render')
+    async def fetch_html(self, url: str) -> str:
+        """
+        Renders a page on a pooled tab and returns its HTML.
+
+        Raises:
+            Exception: Navigation errors, after relaunching a crashed browser `restart_attempts` times.
+        """
+        attempt = 0
+        while True:
+            await self.start()
+            async with self._slots:
+                page = await self._acquire_page()
+                reusable = False
+                try:
+                    await page.goto(url, timeout=self.timeout, wait_until=self.wait_until)
+                    html = await page.content()
+                    reusable = True
+                    return html
+                except Exception:
+                    if self.healthy or attempt >= self.restart_attempts:
+                        raise
+                    attempt += 1
+                finally:
+                    await self._release_page(page, reusable)
+
+    @traced('browser.fetch_text')
     async def fetch_text(self, url: str, selector: Optional[str] = None) -> Optional[str]:
         """
-        Fetches and scrapes text from a web page.
+        Fetches and scrapes text from a web page, from the cache while it is fresh.
 
         Args:
             url (str): The URL to visit.
@@ -26,19 +307,91 @@ class BrowserAgent:
         Returns:
             Optional[str]: Extracted text, or None if failed.
         """
+        key = (url, selector)
+        cached = self._cache.get(key)
+        if cached is not None and time.time() - cached.fetched_at < self.cache_ttl_s:
+            self._cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return cached.text
         try:
-            logger.info(f"Launching browser for {url}")
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                await page.goto(url, timeout=self.timeout)
-                html = await page.content() # Playwright is rendering HTML in order for bs4 to process
-                await browser.close()
-            soup = BeautifulSoup(html, 'html.parser')
-            if selector:
-                element = soup.select_one(selector)
-                return element.get_text(strip=True) if element else None
-            return soup.get_text(separator=' ', strip=True)
+            page = None
+            if self.fetch_mode != 'browser':
+                page = await self._fetch_static(url, selector, cached)
+            if page is None and self.fetch_mode != 'http':
+                logger.info(f"Rendering {url} in the browser")
+                html = await self.fetch_html(url)
+                text = await self._parse(html, lambda: extract_text(html, selector, self.parser))
+                self.stats['browser'] += 1
+                page = CachedPage(text, time.time()) if text is not None else None
         except Exception as e:
             logger.error(f"BrowserAgent failed: {e}")
-            return None 
\ No newline at end of file
+            return None
+        if page is None:
+            return None
+        self._remember(key, page)
+        return page.text
+
+    async def _fetch_static(self, url: str, selector: Optional[str],
+                            cached: Optional[CachedPage]) -> Optional[CachedPage]:
+        """
+        Fetches and extracts a page without the browser; None when it has to be rendered.
+        """
+        headers = {}
+        if cached is not None and cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+        try:
+            resp = await self._http().get(url, headers=headers)
+        except httpx.HTTPError as e:
+            logger.debug(f"HTTP fetch of {url} failed: {e}")
+            return None
+        if resp.status_code == 304 and cached is not None:
+            self.stats['revalidated'] += 1
+            return CachedPage(cached.text, time.time(), cached.etag, cached.last_modified)
+        if resp.status_code >= 400 or 'html' not in resp.headers.get('content-type', ''):
+            return None
+        def inspect() -> Tuple[Optional[str], bool]:
+            text = extract_text(resp.text, selector, self.parser)
+            return text, needs_javascript(resp.text, text, self.min_text_chars if selector is None else 0)
+
+        text, javascript = await self._parse(resp.text, inspect)
+        if javascript:
+            return None
+        self.stats['http'] += 1
+        return CachedPage(text, time.time(), resp.headers.get('etag'), resp.headers.get('last-modified'))
+
+    async def _parse(self, html: str, parse: Callable[[], Any]) -> Any:
+        """
+        Runs `parse` on the event loop, or in a worker thread for pages of `offload_chars` or more.
+        """
+        if len(html) >= self.offload_chars:
+            return await asyncio.to_thread(parse)
+        return parse()
+
+    def _remember(self, key: Tuple[str, Optional[str]], page: CachedPage) -> None:
+        if not self.cache_enabled:
+            return
+        self._cache[key] = page
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_max_items:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, url: Optional[str] = None) -> None:
+        """
+        Drops cached text for `url`, or everything.
+        """
+        if url is None:
+            self._cache.clear()
+            return
+        for key in [key for key in self._cache if key[0] == url]:
+            del self._cache[key]
+
+    async def fetch_many(self, urls: Sequence[str], selector: Optional[str] = None) -> List[Optional[str]]:
+        """
+        Fetches several pages concurrently (at most `max_pages` in the browser at a time).
+
+        Returns:
+            List[Optional[str]]: Extracted text per URL, in order (None where a fetch failed).
+        """
+        return list(await asyncio.gather(*(self.fetch_text(url, selector) for url in urls)))
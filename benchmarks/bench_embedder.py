@@ -0,0 +1,106 @@
+"""
+Benchmark: candidate embedding models on latency, memory and retrieval quality.
+
+For each model, loads it through `core.embedder.Embedder` (cache disabled),
+then measures load time and RSS growth, single-query latency (the per-turn
+cost), batch throughput, and recall@1 / recall@3 / MRR of the fixture queries
+against the fixture documents, for each storage dtype. Top-k search is a
+brute-force dot product over the stored matrix, timed separately.
+
+Usage:
+    python -m benchmarks.bench_embedder [--models M ...] [--backend torch|onnx] [--repeats 20]
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List
+import numpy as np
+from core.embedder import STORAGE_DTYPES, Embedder, dequantize, quantize
+from core.model_cache import current_rss, get_model_registry
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'fixtures', 'embedding_corpus.json')
+MODELS = [
+    'sentence-transformers/all-MiniLM-L6-v2',
+    'sentence-transformers/paraphrase-MiniLM-L3-v2',
+    'BAAI/bge-small-en-v1.5',
+]
+
+
+def _retrieval(queries: np.ndarray, documents: np.ndarray, relevant: List[int]) -> Dict[str, float]:
+    scores = queries @ documents.T
+    ranks = np.array([int(np.sum(row > row[target])) for row, target in zip(scores, relevant)])
+    return {
+        'recall@1': round(float(np.mean(ranks < 1)), 3),
+        'recall@3': round(float(np.mean(ranks < 3)), 3),
+        'mrr': round(float(np.mean(1.0 / (ranks + 1))), 3),
+    }
+
+
+def _measure(model: str, backend: str, corpus: Dict[str, Any], repeats: int) -> Dict[str, Any]:
+    embedder = Embedder({'embedder': {'model': model, 'backend': backend, 'cache': {'enabled': False}}})
+    rss_before = current_rss()
+    started = time.perf_counter()
+    embedder.preload()
+    load_s = time.perf_counter() - started
+    doc_ids = [d['id'] for d in corpus['documents']]
+    doc_texts = [d['text'] for d in corpus['documents']]
+    query_texts = [q['text'] for q in corpus['queries']]
+    relevant = [doc_ids.index(q['relevant']) for q in corpus['queries']]
+
+    single = []
+    for i in range(repeats):
+        started = time.perf_counter()
+        embedder.encode([query_texts[i % len(query_texts)]])
+        single.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    documents = embedder.encode(doc_texts)
+    batch_s = time.perf_counter() - started
+    queries = embedder.encode(query_texts)
+
+    quality = {}
+    for dtype in STORAGE_DTYPES:
+        stored = quantize(documents, dtype)
+        quality[dtype] = {**_retrieval(queries, dequantize(stored), relevant), 'bytes_per_vector': stored[0].nbytes}
+    started = time.perf_counter()
+    for query in queries:
+        np.argpartition(-(documents @ query), 3)[:3]
+    search_us = 1e6 * (time.perf_counter() - started) / len(queries)
+
+    result = {
+        'model': model,
+        'backend': backend,
+        'dimension': int(documents.shape[1]),
+        'load_s': round(load_s, 2),
+        'rss_mb': round((current_rss() - rss_before) / 2**20, 1),
+        'query_ms_p50': round(1000 * float(np.median(single)), 2),
+        'query_ms_max': round(1000 * float(np.max(single)), 2),
+        'batch_texts_per_s': round(len(doc_texts) / batch_s, 1),
+        'search_us_per_query': round(search_us, 2),
+        'retrieval': quality,
+    }
+    get_model_registry().evict(embedder.cache_key)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--models', nargs='+', default=MODELS)
+    parser.add_argument('--backend', default='torch')
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+    if not Embedder.available():
+        raise SystemExit("sentence-transformers is not installed.")
+    with open(CORPUS, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+    results = []
+    for model in args.models:
+        try:
+            results.append(_measure(model, args.backend, corpus, args.repeats))
+        except Exception as e:
+            results.append({'model': model, 'error': str(e)})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: intent routing latency vs. number of registered skills.
+
+Each synthetic skill declares two literal triggers and one slot trigger. The
+indexed `IntentRouter` is compared with the naive approach of trying every
+trigger's regex in turn, for literal hits, slot hits and misses (the case
+that falls through to the LLM).
+
+Usage:
+    python -m benchmarks.bench_intent_router [--skills 10 100 1000] [--lookups 2000]
+"""
+import argparse
+import json
+import re
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+from core.intent_router import IntentRouter, trigger_regex
+from core.text import normalize_command
+
+VERBS = ['open', 'close', 'start', 'stop', 'play', 'show', 'set', 'turn', 'find', 'read']
+
+
+def _skills(n: int) -> List[Any]:
+    return [SimpleNamespace(__name__=f"skill{i}", TRIGGERS=[
+        f"{VERBS[i % len(VERBS)]} the thing number {i}",
+        f"what is the status of thing {i}",
+        f"{VERBS[i % len(VERBS)]} {{item}} with tool {i}",
+    ]) for i in range(n)]
+
+
+def _linear_router(skills: List[Any]) -> Callable[[str], Any]:
+    patterns = [(re.compile(trigger_regex(t, '')[0]), skill) for skill in skills for t in skill.TRIGGERS]
+
+    def route(text: str) -> Any:
+        key = normalize_command(text)
+        for pattern, skill in patterns:
+            if pattern.fullmatch(key):
+                return skill
+        return None
+    return route
+
+
+def _time_us(route: Callable[[str], Any], queries: List[str], lookups: int) -> float:
+    route(queries[0])
+    started = time.perf_counter()
+    for i in range(lookups):
+        route(queries[i % len(queries)])
+    return 1e6 * (time.perf_counter() - started) / lookups
+
+
+def _measure(n: int, lookups: int) -> Dict[str, Any]:
+    skills = _skills(n)
+    started = time.perf_counter()
+    router = IntentRouter.from_skills(skills)
+    router.route('warm up the index')
+    build_ms = 1000 * (time.perf_counter() - started)
+    linear = _linear_router(skills)
+    last = n - 1
+    queries = {
+        'literal_hit': [f"{VERBS[last % len(VERBS)]} the thing number {last}"],
+        'slot_hit': [f"{VERBS[last % len(VERBS)]} the red box with tool {last}"],
+        'miss': ["what's the weather like tomorrow in lyon"],
+    }
+    result: Dict[str, Any] = {'skills': n, 'triggers': router.size, 'build_ms': round(build_ms, 2)}
+    for name, texts in queries.items():
+        intent = router.route(texts[0])
+        assert (intent is None) if name == 'miss' else (intent.skill is skills[last] and linear(texts[0]) is skills[last])
+        result[f"{name}_us"] = round(_time_us(router.route, texts, lookups), 2)
+        result[f"{name}_linear_us"] = round(_time_us(linear, texts, lookups), 2)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--skills', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps([_measure(n, args.lookups) for n in args.skills], indent=2))
+
+
+if __name__ == '__main__':
+    main()
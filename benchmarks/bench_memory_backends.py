@@ -0,0 +1,117 @@
+"""
+Benchmark: Chroma vs. the in-process NumPy index at 10k / 100k / 1M vectors.
+
+For each size, random unit vectors are ingested once per backend (build time
+is reported but is not the point). Startup, query latency and memory are then
+measured in a fresh child process, so the numbers reflect what the assistant
+pays at launch: time to open the store, RSS after opening, the first (cold)
+query, p50/p95 top-k query latency with and without a metadata filter, and
+peak RSS after the queries.
+
+Usage:
+    python -m benchmarks.bench_memory_backends [--sizes 10000 100000 1000000]
+        [--backends chroma numpy] [--dim 384] [--queries 200] [--dir /tmp/bench_memory]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import time
+from typing import Any, Dict
+import numpy as np
+from core.memory_backends import create_memory_backend
+from core.model_cache import current_rss
+
+COLLECTION = 'bench'
+
+
+def _config(backend: str, directory: str, dtype: str) -> Dict[str, Any]:
+    return {
+        'backend': backend,
+        'persistent_client_path': os.path.join(directory, 'chroma'),
+        'numpy': {'path': os.path.join(directory, 'numpy'), 'dtype': dtype},
+    }
+
+
+def _vectors(rng: np.random.Generator, n: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _build(config: Dict[str, Any], size: int, dim: int) -> float:
+    rng = np.random.default_rng(0)
+    backend = create_memory_backend(config, COLLECTION, {'hnsw:space': 'cosine'})
+    batch = min(5000, backend.max_batch_size or 5000)
+    started = time.perf_counter()
+    for start in range(0, size, batch):
+        n = min(batch, size - start)
+        backend.upsert([str(i) for i in range(start, start + n)], _vectors(rng, n, dim).tolist(),
+                       [{'turn': i, 'kind': 'turn' if i % 2 else 'note'} for i in range(start, start + n)])
+    backend.close()
+    return time.perf_counter() - started
+
+
+def _probe(config: Dict[str, Any], dim: int, queries: int, k: int, out: Any) -> None:
+    rss_before = current_rss()
+    started = time.perf_counter()
+    backend = create_memory_backend(config, COLLECTION, {'hnsw:space': 'cosine'})
+    startup_s = time.perf_counter() - started
+    rss_open = current_rss() - rss_before
+    started = time.perf_counter()
+    backend.query([np.ones(dim, dtype=np.float32).tolist()], n_results=k)
+    first_query_s = time.perf_counter() - started
+    rng = np.random.default_rng(1)
+    latencies, filtered = [], []
+    for vector in _vectors(rng, queries, dim):
+        started = time.perf_counter()
+        backend.query([vector.tolist()], n_results=k)
+        latencies.append(time.perf_counter() - started)
+    for vector in _vectors(rng, max(queries // 10, 1), dim):
+        started = time.perf_counter()
+        backend.query([vector.tolist()], n_results=k, where={'kind': 'note'})
+        filtered.append(time.perf_counter() - started)
+    out.put({
+        'startup_s': round(startup_s, 3),
+        'rss_after_open_mb': round(rss_open / 2**20, 1),
+        'first_query_ms': round(1000 * first_query_s, 3),
+        'query_ms_p50': round(1000 * float(np.percentile(latencies, 50)), 3),
+        'query_ms_p95': round(1000 * float(np.percentile(latencies, 95)), 3),
+        'filtered_query_ms_p50': round(1000 * float(np.percentile(filtered, 50)), 3),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--backends', nargs='+', default=['chroma', 'numpy'])
+    parser.add_argument('--dtype', default='float32', help="NumPy index storage dtype")
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--dir', default='/tmp/bench_memory')
+    args = parser.parse_args()
+    context = multiprocessing.get_context('spawn')
+    for size in args.sizes:
+        for name in args.backends:
+            directory = os.path.join(args.dir, f"{name}_{size}")
+            shutil.rmtree(directory, ignore_errors=True)
+            config = _config(name, directory, args.dtype)
+            result: Dict[str, Any] = {'backend': name, 'vectors': size, 'dim': args.dim}
+            try:
+                result['build_s'] = round(_build(config, size, args.dim), 2)
+                out = context.Queue()
+                child = context.Process(target=_probe, args=(config, args.dim, args.queries, args.k, out))
+                child.start()
+                result.update(out.get())
+                child.join()
+            except Exception as e:
+                result['error'] = str(e)
+            print(json.dumps(result), flush=True)
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""
+Benchmark: the whole voice pipeline on a replayed utterance corpus, offline and CPU-only.
+
+Utterances from `fixtures/pipeline_corpus.json` are synthesized into WAV files
+(speech-like harmonic bursts framed by silence; `--audio-dir` replays real
+recordings named `<id>.wav` instead). They go through the real Listener/VAD,
+STT, the Orchestrator (over HTTP to a local stub LLM server that answers with
+the corpus plan after `--llm-latency-ms`), the ActionDispatcher (running the
+corpus' harmless commands) and TTS. By default STT and TTS are stubs that take
+a fixed real-time factor, so no model, GPU or network is needed;
+`--stt real` / `--tts real` use the configured models (synthesis only, no playback).
+
+Reports, as JSON: VAD real-time factor, per-stage latency (mean/p50/p95/max),
+end-to-end real-time factor, turns per second, peak RSS and the span
+quantiles from `core.tracing`. `--output` saves the report, and `--compare`
+flags stages whose p50 regressed against a saved report by more than `--tolerance`.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--repeats 3] [--stt stub|real] [--tts stub|real]
+        [--llm-latency-ms 150] [--output report.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from core.audio import WavAudioSource, write_wav
+from core.text import normalize_command
+from core.tracing import get_tracer
+from core.utils import load_config
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'fixtures', 'pipeline_corpus.json')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def _speech_like(rng: np.random.Generator, seconds: float, samplerate: int) -> np.ndarray:
+    """
+    A vowel-like harmonic tone with vibrato, chopped into ~4 syllables per second.
+    """
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    f0 = rng.uniform(100, 220)
+    phase = 2 * np.pi * f0 * (t + 0.02 * np.sin(2 * np.pi * 3 * t) / (2 * np.pi * 3))
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(np.pi * rng.uniform(3.5, 4.5) * t) ** 2 * 1.5, 0, 1)
+    return (0.25 * envelope * voice / np.max(np.abs(voice))).astype(np.float32)
+
+
+def make_corpus(corpus: Dict[str, Any], directory: str, audio_dir: Optional[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Writes one WAV per utterance (or picks `<id>.wav` from `audio_dir`).
+
+    Returns:
+        List[Tuple[str, Dict[str, Any]]]: (wav path, utterance) pairs in corpus order.
+    """
+    samplerate = corpus.get('samplerate', 16000)
+    rng = np.random.default_rng(0)
+    silence = lambda s: (1e-4 * rng.standard_normal(int(s * samplerate))).astype(np.float32)
+    entries = []
+    for utterance in corpus['utterances']:
+        if audio_dir is not None:
+            entries.append((os.path.join(audio_dir, f"{utterance['id']}.wav"), utterance))
+            continue
+        path = os.path.join(directory, f"{utterance['id']}.wav")
+        audio = np.concatenate([silence(0.5), _speech_like(rng, utterance['seconds'], samplerate), silence(0.8)])
+        write_wav(path, audio, samplerate)
+        entries.append((path, utterance))
+    return entries
+
+
+def start_stub_llm(plans: Dict[str, Dict[str, Any]], latency_s: float) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Serves an Ollama-style /generate endpoint that answers with the corpus plan for the request.
+
+    The request is taken from the prompt's last "Plan the following:" line, so
+    conversation context in the prompt does not change the answer.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            request = body.get('prompt', '').rsplit('Plan the following:', 1)[-1]
+            plan = plans.get(normalize_command(request), {'steps': [], 'response': "Sorry, I did not get that."})
+            time.sleep(latency_s)
+            payload = json.dumps({'response': json.dumps(plan), 'done': True}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, name='stub-llm', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/generate"
+
+
+class StubSTT:
+    """
+    Returns the corpus transcripts in order, taking `rtf` x the audio duration.
+    """
+    def __init__(self, texts: List[str], rtf: float) -> None:
+        self._texts = itertools.cycle(texts)
+        self.rtf = rtf
+
+    def transcribe(self, audio: np.ndarray, samplerate: int = 16000) -> Optional[str]:
+        time.sleep(self.rtf * len(audio) / samplerate)
+        return next(self._texts)
+
+
+class StubSpeaker:
+    """
+    Speaks sentence by sentence, taking `rtf` x the estimated speech duration (15 chars/s) of each.
+    """
+    def __init__(self, rtf: float) -> None:
+        self.rtf = rtf
+
+    async def speak_stream(self, text: str) -> None:
+        started = time.monotonic()
+        for i, sentence in enumerate(s for s in _SENTENCE_END.split(text) if s):
+            await asyncio.sleep(self.rtf * len(sentence) / 15)
+            if i == 0:
+                get_tracer().observe('tts.first_audio', time.monotonic() - started)
+
+
+class SynthesisSpeaker:
+    """
+    Synthesizes with the real TTS model sentence by sentence, without playing anything.
+    """
+    def __init__(self) -> None:
+        from core.tts import TextToSpeech, split_sentences
+        self.tts = TextToSpeech()
+        self.tts.preload()
+        self.split = split_sentences
+
+    async def speak_stream(self, text: str) -> None:
+        started = time.monotonic()
+        for i, sentence in enumerate(self.split(text, self.tts.max_chunk_chars)):
+            await asyncio.to_thread(self.tts.synthesize, sentence)
+            if i == 0:
+                get_tracer().observe('tts.first_audio', time.monotonic() - started)
+
+
+async def measure_capture(listener: Any, paths: List[str]) -> Dict[str, Any]:
+    """
+    Runs the VAD/endpointer alone over every file.
+    """
+    utterances, audio_seconds = 0, 0.0
+    started = time.perf_counter()
+    for path in paths:
+        source = WavAudioSource(path)
+        audio_seconds += len(source.audio) / source.samplerate
+        async for _ in listener.utterances(source):
+            utterances += 1
+    wall = time.perf_counter() - started
+    return {'files': len(paths), 'utterances': utterances, 'audio_seconds': round(audio_seconds, 3),
+            'real_time_factor': round(wall / audio_seconds, 5) if audio_seconds else None}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Stages whose p50 latency grew by more than `tolerance` (a fraction) over the baseline.
+    """
+    regressions = []
+    current = report['pipeline']['latency_ms']
+    for stage, stats in baseline.get('pipeline', {}).get('latency_ms', {}).items():
+        if stage not in current or not stats.get('p50'):
+            continue
+        change = current[stage]['p50'] / stats['p50'] - 1
+        if change > tolerance:
+            regressions.append({'stage': stage, 'baseline_p50_ms': stats['p50'],
+                                'p50_ms': current[stage]['p50'], 'change': round(change, 3)})
+    return regressions
+
+
+def bench_config(args: argparse.Namespace, llm_url: str, workdir: str) -> Dict[str, Any]:
+    """
+    The loaded config, pointed at the stub LLM and kept from persisting anything outside `workdir`.
+
+    Conversation memory, the semantic plan cache and the embedder are disabled
+    (they would write to the vector store), and the skills manifest goes to `workdir`.
+    """
+    config = load_config()
+    section = lambda name, **values: {**config.get(name, {}), **values}
+    return {
+        **config,
+        'orchestrator': section('orchestrator', llm_url=llm_url, timeout_s=30.0),
+        'embedder': section('embedder', enabled=False),
+        'context': section('context', memory={**config.get('context', {}).get('memory', {}), 'enabled': False}),
+        'plan_cache': section('plan_cache', enabled=args.plan_cache,
+                              semantic={**config.get('plan_cache', {}).get('semantic', {}), 'enabled': False}),
+        'skills': section('skills', fast_path=args.skills, hot_reload=False,
+                          manifest_path=os.path.join(workdir, 'skills_manifest.json')),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from core.listener import Listener
+    from services.main import Orchestrator
+    from services.pipeline import OrchestratorPlanner, VoicePipeline, summarize
+
+    with open(CORPUS, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+    workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    entries = make_corpus(corpus, workdir, args.audio_dir)
+    plans = {normalize_command(u['text']): u['plan'] for _, u in entries}
+    server, url = start_stub_llm(plans, args.llm_latency_ms / 1000)
+
+    orchestrator = Orchestrator(config=bench_config(args, url, workdir))
+
+    if args.stt == 'real':
+        from core.stt import SpeechToText
+        stt: Any = SpeechToText()
+        stt.preload()
+    else:
+        stt = StubSTT([u['text'] for _, u in entries], args.stt_rtf)
+    speaker = SynthesisSpeaker() if args.tts == 'real' else StubSpeaker(args.tts_rtf)
+    dispatcher = None
+    if not args.no_dispatch:
+        from core.action_dispatcher import ActionDispatcher
+        dispatcher = ActionDispatcher()
+
+    listener = Listener()
+    paths = [path for path, _ in entries]
+    capture = await measure_capture(listener, paths)
+    get_tracer().reset()
+    pipeline = VoicePipeline(listener, stt, OrchestratorPlanner(orchestrator), dispatcher, speaker, load_config())
+    sources = [WavAudioSource(path, realtime=args.realtime) for _ in range(args.repeats) for path in paths]
+    started = time.perf_counter()
+    turns = await pipeline.run(sources)
+    wall = time.perf_counter() - started
+    pipeline.close()
+    await orchestrator.llm.aclose()
+    server.shutdown()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = summarize(turns, wall)
+    summary['expected_turns'] = len(entries) * args.repeats
+    return {
+        'benchmark': 'pipeline',
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'settings': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        'capture': capture,
+        'pipeline': summary,
+        'spans': get_tracer().snapshot(),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeats', type=int, default=3, help="Times the corpus is replayed")
+    parser.add_argument('--audio-dir', default=None, help="Recorded <id>.wav files instead of synthetic audio")
+    parser.add_argument('--realtime', action='store_true', help="Pace audio at real-time speed")
+    parser.add_argument('--stt', choices=['stub', 'real'], default='stub')
+    parser.add_argument('--stt-rtf', type=float, default=0.1, help="Stub STT seconds per second of audio")
+    parser.add_argument('--tts', choices=['stub', 'real'], default='stub')
+    parser.add_argument('--tts-rtf', type=float, default=0.1, help="Stub TTS seconds per second of speech")
+    parser.add_argument('--llm-latency-ms', type=float, default=150.0, help="Stub LLM response delay")
+    parser.add_argument('--plan-cache', action='store_true', help="Keep the exact plan cache (repeats become hits)")
+    parser.add_argument('--skills', action='store_true', help="Keep the skill fast path")
+    parser.add_argument('--no-dispatch', action='store_true', help="Do not run plan steps")
+    parser.add_argument('--output', default=None, help="Write the JSON report here")
+    parser.add_argument('--compare', default=None, help="Baseline report to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed p50 slowdown per stage")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare(report, json.load(f), args.tolerance)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+    if report.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
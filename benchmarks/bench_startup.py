@@ -0,0 +1,117 @@
+"""
+Benchmark: import-time profile of the assistant's entry modules, and time to ready.
+
+Each module is imported in a fresh `python -X importtime` child process. The
+report gives the wall time, the module's cumulative import time and the
+`--top` packages with the largest cumulative import time. That shows which
+dependencies are still imported eagerly (Coqui TTS, Playwright, whisper and
+chromadb should only load on first use). `--warm-up` also builds STT and TTS
+in a fresh process and times `services.startup.warm_up_components` until
+every model is loaded. This needs the configured models.
+
+Usage:
+    python -m benchmarks.bench_startup [--modules services.main core.tts ...] [--top 15]
+        [--repeats 3] [--warm-up] [--output report.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+MODULES = ['services.main', 'services.pipeline', 'core.listener', 'core.stt', 'core.tts',
+           'core.memory', 'ai_agents.browser_agent']
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_WARM_UP = """
+import json, time
+started = time.perf_counter()
+from core.stt import SpeechToText
+from core.tts import TextToSpeech
+from services.startup import warm_up_components
+warm_up = warm_up_components(stt=SpeechToText(), tts=TextToSpeech())
+accepting = time.perf_counter() - started
+warm_up.wait()
+print(json.dumps({'accepting_audio_s': round(accepting, 3),
+                  'time_to_ready_s': round(time.perf_counter() - started, 3), **warm_up.status()}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parses `-X importtime` output into (module, self_us, cumulative_us) rows.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile_import(module: str, top: int) -> Dict[str, Any]:
+    """
+    Imports `module` in a fresh interpreter and summarizes where the time went.
+    """
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=ROOT)
+    wall = time.perf_counter() - started
+    rows = parse_importtime(result.stderr)
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'
+        return {'module': module, 'error': error}
+    own = next((cumulative for name, _, cumulative in rows if name == module), 0)
+    top_level: Dict[str, int] = {}
+    for name, _, cumulative in rows:
+        package = name.split('.')[0]
+        top_level[package] = max(top_level.get(package, 0), cumulative)
+    top_level.pop(module.split('.')[0], None)
+    heaviest = sorted(top_level.items(), key=lambda item: -item[1])[:top]
+    return {
+        'module': module,
+        'wall_ms': round(1000 * wall, 1),
+        'import_ms': round(own / 1000, 1),
+        'modules_imported': len(rows),
+        'heaviest_ms': {package: round(us / 1000, 1) for package, us in heaviest},
+    }
+
+
+def measure_warm_up() -> Dict[str, Any]:
+    """
+    Time from process start until the listener could take audio, and until every model is warm.
+    """
+    result = subprocess.run([sys.executable, '-c', _WARM_UP], capture_output=True, text=True, cwd=ROOT)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--modules', nargs='+', default=MODULES, help="Modules to import")
+    parser.add_argument('--top', type=int, default=15, help="Heaviest packages listed per module")
+    parser.add_argument('--repeats', type=int, default=3, help="Imports per module; the fastest is kept")
+    parser.add_argument('--warm-up', action='store_true', help="Also time background model warm-up")
+    parser.add_argument('--output', default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    imports = []
+    for module in args.modules:
+        runs = [profile_import(module, args.top) for _ in range(args.repeats)]
+        imports.append(min(runs, key=lambda r: r.get('wall_ms', float('inf'))))
+    report: Dict[str, Any] = {'python': sys.version.split()[0], 'imports': imports}
+    if args.warm_up:
+        report['warm_up'] = measure_warm_up()
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark: per-frame CPU cost of the always-on wake-word detector.
+
+Measures silent frames (rejected by the energy gate) separately from voiced
+frames (MFCC + DTW against every template), since an always-on box spends
+most of its time on the former.
+
+Usage:
+    python -m benchmarks.bench_wakeword [--templates 3] [--seconds 30]
+"""
+import argparse
+import json
+import numpy as np
+from core.wakeword import WakeWordDetector
+
+SR = 16000
+FRAME = 480
+
+
+def _word(rng: np.random.Generator, dur: float = 0.6) -> np.ndarray:
+    t = np.arange(int(dur * SR)) / SR
+    freqs = rng.uniform(200, 1200, size=4)
+    return np.concatenate([0.3 * np.sin(2 * np.pi * f * t[:len(t) // 4]) for f in freqs]).astype('float32')
+
+
+def _measure(detector: WakeWordDetector, audio: np.ndarray) -> float:
+    detector.frames_seen = 0
+    detector.cpu_seconds = 0.0
+    for i in range(0, len(audio) - FRAME + 1, FRAME):
+        detector.process(audio[i:i + FRAME])
+    return detector.cpu_per_frame_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--templates', type=int, default=3)
+    parser.add_argument('--seconds', type=float, default=30.0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    detector = WakeWordDetector({'wakeword': {'threshold': 0.0}}, samplerate=SR)
+    for _ in range(args.templates):
+        detector.enroll(_word(rng))
+    n = int(args.seconds * SR)
+    silence = (1e-4 * rng.standard_normal(n)).astype('float32')
+    speech = np.tile(_word(rng, 1.0), int(args.seconds) + 1)[:n]
+    frame_budget_us = 1e6 * FRAME / SR
+    results = {
+        'templates': args.templates,
+        'frame_ms': 1000 * FRAME / SR,
+        'silence_cpu_us_per_frame': round(_measure(detector, silence), 2),
+        'speech_cpu_us_per_frame': round(_measure(detector, speech), 2),
+    }
+    results['silence_cpu_percent'] = round(100 * results['silence_cpu_us_per_frame'] / frame_budget_us, 3)
+    results['speech_cpu_percent'] = round(100 * results['speech_cpu_us_per_frame'] / frame_budget_us, 3)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
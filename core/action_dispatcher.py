@@ -1,17 +1,155 @@
 """
 Action dispatcher module for executing plan steps.
 """
-from typing import Dict, Any, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
+from collections import deque
+from dataclasses import dataclass, field
+import asyncio
+import inspect
+import os
+import re
+import shlex
+import signal
 import subprocess
-from core.utils import logger, load_config
+import time
+from core.tracing import span, traced
+from core.utils import logger, load_config, subscribe_config
+
+# Commands using any of these need a shell; everything else is exec'd directly.
+_SHELL_SYNTAX = re.compile(r'[|&;<>()$`*?\[\]{}~!#\n]')
+# Leading `NAME=value` assignments and builtins only mean something to a shell.
+_ASSIGNMENT = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*=')
+_SHELL_BUILTINS = frozenset({
+    '.', ':', 'alias', 'bg', 'cd', 'command', 'eval', 'exec', 'exit', 'export', 'fg', 'hash', 'jobs',
+    'read', 'readonly', 'return', 'set', 'shift', 'source', 'trap', 'type', 'ulimit', 'umask',
+    'unalias', 'unset', 'wait',
+})
+# Longest output line a step may print; a longer one stops the step with status `error`.
+_LINE_LIMIT = 2**20
+
+OutputCallback = Callable[[str, str, str], Union[None, Awaitable[None]]]
+
+
+class _LineTooLong(Exception):
+    """
+    A step printed a line longer than `_LINE_LIMIT`.
+    """
+
+
+@dataclass
+class StepResult:
+    """
+    Outcome of one plan step.
+
+    Attributes:
+        step_id (str): The step's `id`, or its position in the plan.
+        status (str): pending | running | ok | failed | timeout | cancelled | skipped | error.
+        returncode (Optional[int]): Exit code, when the process exited on its own.
+        stdout (Deque[str]): Last `max_output_lines` lines of standard output.
+        stderr (Deque[str]): Last `max_output_lines` lines of standard error.
+    """
+    step_id: str
+    command: Any
+    status: str = 'pending'
+    returncode: Optional[int] = None
+    stdout: Deque[str] = field(default_factory=deque)
+    stderr: Deque[str] = field(default_factory=deque)
+    started_at: Optional[float] = None
+    ended_at: Optional[float] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'ok'
+
+    @property
+    def duration_s(self) -> Optional[float]:
+        if self.started_at is None or self.ended_at is None:
+            return None
+        return self.ended_at - self.started_at
+
+
+@dataclass
+class StepEvent:
+    """
+    Progress of a running plan: `start`, one `stdout`/`stderr` per line, then `end` with the result.
+    """
+    step_id: str
+    kind: str
+    data: Any = None
+
+
+def build_graph(steps: Sequence[Dict[str, Any]], sequential: bool = True) -> Dict[str, Tuple[Dict[str, Any], List[str]]]:
+    """
+    Resolves plan steps into a dependency graph.
+
+    Steps are named by their `id` (default: their position) and depend on the
+    steps listed in `depends_on`. When no step declares dependencies and
+    `sequential` is set, each step depends on the previous one, matching how
+    plain step lists have always run.
+
+    Returns:
+        Dict[str, Tuple[Dict[str, Any], List[str]]]: step id -> (step, dependency ids), in plan order.
+
+    Raises:
+        ValueError: On duplicate ids, unknown dependencies or cycles.
+    """
+    graph: Dict[str, Tuple[Dict[str, Any], List[str]]] = {}
+    declared = any('depends_on' in step for step in steps)
+    previous: Optional[str] = None
+    for index, step in enumerate(steps):
+        step_id = str(step.get('id', index))
+        if step_id in graph:
+            raise ValueError(f"Duplicate step id: {step_id}")
+        depends_on = step.get('depends_on') or []
+        deps = [str(d) for d in ([depends_on] if isinstance(depends_on, (str, int)) else depends_on)]
+        if not declared and sequential and previous is not None:
+            deps = [previous]
+        graph[step_id] = (step, deps)
+        previous = step_id
+    for step_id, (_, deps) in graph.items():
+        unknown = [d for d in deps if d not in graph]
+        if unknown:
+            raise ValueError(f"Step {step_id} depends on unknown steps: {unknown}")
+    remaining = {step_id: set(deps) for step_id, (_, deps) in graph.items()}
+    while remaining:
+        ready = [step_id for step_id, deps in remaining.items() if not deps & remaining.keys()]
+        if not ready:
+            raise ValueError(f"Dependency cycle between steps: {sorted(remaining)}")
+        for step_id in ready:
+            del remaining[step_id]
+    return graph
+
 
 class ActionDispatcher:
     """
     Maps plan steps to subprocess or OS calls.
+
+    `dispatch` runs a single step and blocks until it exits. `execute` runs a
+    whole plan asynchronously: steps form a DAG through `id` / `depends_on`
+    (see `build_graph`), independent steps run concurrently up to
+    `dispatcher.max_concurrency`, and every output line is passed to
+    `on_output` as soon as it is printed (`stream` yields the same as events).
+    Each step is killed after its `timeout_s` (default `dispatcher.timeout_s`),
+    and steps whose dependencies did not succeed are skipped. Commands are
+    exec'd without a shell unless they use shell syntax or set `shell: true`.
     """
     def __init__(self) -> None:
         self.config = load_config()
+        self.apply_config(self.config.get('dispatcher', {}))
+        subscribe_config(self.apply_config, 'dispatcher')
+
+    def apply_config(self, dispatcher_config: Dict[str, Any]) -> None:
+        """
+        Applies the `dispatcher` section; called again whenever it changes on disk.
+        """
+        self.max_concurrency: int = dispatcher_config.get('max_concurrency', 4)
+        self.timeout_s: Optional[float] = dispatcher_config.get('timeout_s', 60.0)
+        self.kill_grace_s: float = dispatcher_config.get('kill_grace_s', 2.0)
+        self.sequential: bool = dispatcher_config.get('sequential_by_default', True)
+        self.fail_fast: bool = dispatcher_config.get('fail_fast', False)
+        self.max_output_lines: int = dispatcher_config.get('max_output_lines', 1000)
 
+    @traced('dispatcher.dispatch')
     def dispatch(self, step: Dict[str, Any]) -> Optional[int]:
         """
         Executes a plan step as a subprocess command.
@@ -28,11 +166,207 @@ class ActionDispatcher:
             return None
         try:
             logger.info(f"Executing command: {command}")
-            result = subprocess.run(command, shell=True, capture_output=True, text=True)
+            result = subprocess.run(command, shell=True, capture_output=True, text=True,
+                                    timeout=step.get('timeout_s', self.timeout_s))
             logger.info(f"Command output: {result.stdout.strip()}")
             if result.stderr:
                 logger.error(f"Command error: {result.stderr.strip()}")
             return result.returncode
         except Exception as e:
             logger.error(f"Dispatch failed: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def argv(step: Dict[str, Any]) -> List[str]:
+        """
+        The argument vector for a step's command.
+
+        Raises:
+            ValueError: If the step has no command.
+        """
+        command = step.get('command')
+        if not command:
+            raise ValueError("No command found in plan step.")
+        if isinstance(command, (list, tuple)):
+            return [str(arg) for arg in command]
+        if step.get('shell', ActionDispatcher._needs_shell(command)):
+            return ['/bin/sh', '-c', command]
+        return shlex.split(command)
+
+    @staticmethod
+    def _needs_shell(command: str) -> bool:
+        if _SHELL_SYNTAX.search(command):
+            return True
+        words = command.split()
+        return bool(words) and (words[0] in _SHELL_BUILTINS or bool(_ASSIGNMENT.match(words[0])))
+
+    @traced('dispatcher.execute')
+    async def execute(self, steps: Sequence[Dict[str, Any]],
+                      on_output: Optional[OutputCallback] = None) -> Dict[str, StepResult]:
+        """
+        Runs a plan's steps, concurrently where their dependencies allow.
+
+        Cancelling the call kills every running step.
+
+        Args:
+            steps (Sequence[Dict[str, Any]]): Plan steps with 'command' and optional
+                'id', 'depends_on', 'timeout_s', 'cwd', 'env' and 'shell' keys.
+            on_output (Optional[OutputCallback]): Called as (step_id, 'stdout' | 'stderr', line)
+                for every output line; may be a coroutine function.
+
+        Returns:
+            Dict[str, StepResult]: Results by step id, in plan order.
+
+        Raises:
+            ValueError: If the steps do not form a valid graph.
+        """
+        async def emit(event: StepEvent) -> None:
+            if on_output is not None and event.kind in ('stdout', 'stderr'):
+                outcome = on_output(event.step_id, event.kind, event.data)
+                if inspect.isawaitable(outcome):
+                    await outcome
+
+        return await self._execute(steps, emit)
+
+    async def _execute(self, steps: Sequence[Dict[str, Any]],
+                       emit: Callable[[StepEvent], Awaitable[None]]) -> Dict[str, StepResult]:
+        graph = build_graph(steps, self.sequential)
+        results = {step_id: StepResult(step_id, step.get('command'), stdout=deque(maxlen=self.max_output_lines),
+                                       stderr=deque(maxlen=self.max_output_lines))
+                   for step_id, (step, _) in graph.items()}
+        finished = {step_id: asyncio.Event() for step_id in graph}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks: List[asyncio.Task] = []
+
+        async def run(step_id: str) -> None:
+            step, deps = graph[step_id]
+            result = results[step_id]
+            try:
+                for dep in deps:
+                    await finished[dep].wait()
+                if not all(results[dep].ok for dep in deps):
+                    result.status = 'skipped'
+                    await emit(StepEvent(step_id, 'end', result))
+                    return
+                async with semaphore:
+                    with span('dispatcher.step', step=step_id) as step_span:
+                        await self._run_step(step, result, emit)
+                        step_span.attrs['status'] = result.status
+                if self.fail_fast and not result.ok:
+                    for task in tasks:
+                        if task is not asyncio.current_task():
+                            task.cancel()
+            except asyncio.CancelledError:
+                if result.status in ('pending', 'running'):
+                    result.status = 'cancelled'
+                raise
+            finally:
+                finished[step_id].set()
+
+        tasks.extend(asyncio.create_task(run(step_id)) for step_id in graph)
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                logger.error(f"Plan step failed unexpectedly: {outcome}")
+        return results
+
+    async def stream(self, steps: Sequence[Dict[str, Any]]) -> AsyncIterator[StepEvent]:
+        """
+        Runs a plan like `execute`, yielding a StepEvent per step start, output line and end.
+
+        Closing the iterator early cancels the plan.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def run() -> None:
+            try:
+                await self._execute(steps, events.put)
+            finally:
+                await events.put(None)
+
+        task = asyncio.create_task(run())
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    async def _run_step(self, step: Dict[str, Any], result: StepResult,
+                        emit: Callable[[StepEvent], Awaitable[None]]) -> None:
+        timeout_s = step.get('timeout_s', self.timeout_s)
+        result.started_at = time.perf_counter()
+        try:
+            argv = self.argv(step)
+            logger.info(f"Executing step {result.step_id}: {argv}")
+            env = {**os.environ, **{k: str(v) for k, v in step['env'].items()}} if step.get('env') else None
+            process = await asyncio.create_subprocess_exec(
+                *argv, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE, cwd=step.get('cwd'), env=env,
+                start_new_session=True, limit=_LINE_LIMIT)
+        except Exception as e:
+            logger.error(f"Step {result.step_id} could not start: {e}")
+            result.status = 'error'
+            result.stderr.append(str(e))
+            result.ended_at = time.perf_counter()
+            await emit(StepEvent(result.step_id, 'end', result))
+            return
+        result.status = 'running'
+        await emit(StepEvent(result.step_id, 'start', argv))
+        try:
+            await asyncio.wait_for(asyncio.gather(
+                self._pump(process.stdout, 'stdout', result, emit),
+                self._pump(process.stderr, 'stderr', result, emit),
+                process.wait()), timeout=timeout_s)
+            result.returncode = process.returncode
+            result.status = 'ok' if process.returncode == 0 else 'failed'
+        except asyncio.TimeoutError:
+            logger.error(f"Step {result.step_id} timed out after {timeout_s}s")
+            result.status = 'timeout'
+            await self._terminate(process)
+        except _LineTooLong as e:
+            logger.error(f"Step {result.step_id} printed a line over {_LINE_LIMIT} bytes on {e}")
+            result.status = 'error'
+            result.stderr.append(f"Output line longer than {_LINE_LIMIT} bytes")
+            await self._terminate(process)
+        except asyncio.CancelledError:
+            result.status = 'cancelled'
+            await self._terminate(process)
+            raise
+        finally:
+            result.ended_at = time.perf_counter()
+            await emit(StepEvent(result.step_id, 'end', result))
+        if result.status == 'failed':
+            logger.error(f"Step {result.step_id} exited with {result.returncode}")
+
+    async def _pump(self, reader: asyncio.StreamReader, stream: str, result: StepResult,
+                    emit: Callable[[StepEvent], Awaitable[None]]) -> None:
+        lines = result.stdout if stream == 'stdout' else result.stderr
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError as e:  # the stream reader's limit was exceeded
+                raise _LineTooLong(stream) from e
+            if not line:
+                return
+            text = line.decode(errors='replace').rstrip('\r\n')
+            lines.append(text)
+            await emit(StepEvent(result.step_id, stream, text))
+
+    async def _terminate(self, process: asyncio.subprocess.Process) -> None:
+        """
+        Stops a step's whole process group: SIGTERM, then SIGKILL after `kill_grace_s`.
+        """
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            if process.returncode is not None:
+                return
+            try:
+                os.killpg(process.pid, sig)
+            except ProcessLookupError:
+                pass
+            try:
+                await asyncio.wait_for(process.wait(), timeout=self.kill_grace_s)
+            except asyncio.TimeoutError:
+                continue
@@ -0,0 +1,141 @@
+"""
+Array cache module: content-addressed on-disk cache of numpy arrays with an in-memory LRU front.
+"""
+from typing import Any, Dict, Optional
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import numpy as np
+from core.utils import logger
+
+
+def content_key(*parts: Any) -> str:
+    """
+    Stable SHA-256 key for the given parts.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ArrayCache:
+    """
+    Stores arrays as `.npy` files named by key and serves reads through a memory map.
+
+    Recently used arrays are also kept in an in-memory LRU of `memory_items`
+    entries. When the directory grows beyond `max_bytes`, the files that were
+    least recently read or written are deleted.
+    """
+    def __init__(self, directory: str, max_bytes: int = 256 * 2**20, memory_items: int = 64) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith('.npy'))
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and current disk usage.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'disk_bytes': self.total_bytes,
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Returns the cached array (read-only memory map on a disk hit), or None.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+        path = self._path(key)
+        try:
+            array = np.load(path, mmap_mode='r')
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, array)
+        return array
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        """
+        Stores an array, evicting the least recently used files if over budget.
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Failed to write cache entry {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self.total_bytes += os.path.getsize(path) - previous
+            self._remember(key, array)
+            if self.total_bytes > self.max_bytes:
+                self._evict(keep=path)
+
+    def clear(self) -> None:
+        """
+        Deletes every entry from memory and disk.
+        """
+        with self._lock:
+            self._memory.clear()
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.npy'):
+                    os.remove(entry.path)
+            self.total_bytes = 0
+
+    def _remember(self, key: str, array: np.ndarray) -> None:
+        self._memory[key] = array
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self, keep: str) -> None:
+        entries = sorted((e for e in os.scandir(self.directory) if e.name.endswith('.npy') and e.path != keep),
+                         key=lambda e: e.stat().st_mtime)
+        for entry in entries:
+            if self.total_bytes <= self.max_bytes:
+                break
+            size = entry.stat().st_size
+            os.remove(entry.path)
+            self.total_bytes -= size
+            self._memory.pop(entry.name[:-4], None)
+            logger.info(f"Evicted cache entry {entry.name}")
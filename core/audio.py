@@ -0,0 +1,181 @@
+"""
+Audio buffer module: preallocated ring buffer and injectable audio sources.
+"""
+from typing import Optional, Tuple
+import threading
+import wave
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size float32 ring buffer shared between a capture callback and a reader.
+
+    Writes never allocate; when the reader falls behind, the oldest samples are
+    overwritten and counted in `dropped`.
+    """
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive.")
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity, dtype=np.float32)
+        self._read_pos = 0
+        self._write_pos = 0
+        self._available = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._available
+
+    def write(self, data: np.ndarray) -> None:
+        """
+        Appends samples, overwriting the oldest ones on overflow.
+
+        Args:
+            data (np.ndarray): Mono float32 samples.
+        """
+        data = np.asarray(data, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if len(data) >= self.capacity:
+                self.dropped += self._available + len(data) - self.capacity
+                self._buffer[:] = data[-self.capacity:]
+                self._read_pos = 0
+                self._write_pos = 0
+                self._available = self.capacity
+                return
+            end = self._write_pos + len(data)
+            if end <= self.capacity:
+                self._buffer[self._write_pos:end] = data
+            else:
+                split = self.capacity - self._write_pos
+                self._buffer[self._write_pos:] = data[:split]
+                self._buffer[:end - self.capacity] = data[split:]
+            self._write_pos = end % self.capacity
+            overflow = self._available + len(data) - self.capacity
+            if overflow > 0:
+                self.dropped += overflow
+                self._read_pos = (self._read_pos + overflow) % self.capacity
+                self._available = self.capacity
+            else:
+                self._available += len(data)
+
+    def read(self, n: int) -> Optional[np.ndarray]:
+        """
+        Pops exactly n samples if available.
+
+        Args:
+            n (int): Number of samples to read.
+
+        Returns:
+            Optional[np.ndarray]: A copy of the samples, or None if fewer than n are buffered.
+        """
+        with self._lock:
+            if n > self._available:
+                return None
+            end = self._read_pos + n
+            if end <= self.capacity:
+                out = self._buffer[self._read_pos:end].copy()
+            else:
+                out = np.concatenate((self._buffer[self._read_pos:], self._buffer[:end - self.capacity]))
+            self._read_pos = end % self.capacity
+            self._available -= n
+            return out
+
+    def clear(self) -> None:
+        """
+        Discards all buffered samples.
+        """
+        with self._lock:
+            self._read_pos = self._write_pos
+            self._available = 0
+
+
+class ArrayAudioSource:
+    """
+    Replays an in-memory waveform as if it came from a microphone.
+    """
+    def __init__(self, audio: np.ndarray, samplerate: int = 16000, realtime: bool = False) -> None:
+        audio = np.asarray(audio, dtype=np.float32)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        self.audio = audio
+        self.samplerate = samplerate
+        self.realtime = realtime
+        self._pos = 0
+
+    def read(self, n: int) -> Optional[np.ndarray]:
+        """
+        Returns the next n samples (fewer at the end), or None when exhausted.
+        """
+        if self._pos >= len(self.audio):
+            return None
+        chunk = self.audio[self._pos:self._pos + n]
+        self._pos += len(chunk)
+        return chunk
+
+    def rewind(self) -> None:
+        """
+        Restarts playback from the first sample.
+        """
+        self._pos = 0
+
+
+class WavAudioSource(ArrayAudioSource):
+    """
+    Replays a 16-bit PCM WAV file as if it came from a microphone.
+    """
+    def __init__(self, path: str, realtime: bool = False) -> None:
+        audio, samplerate = read_wav(path)
+        super().__init__(audio, samplerate=samplerate, realtime=realtime)
+        self.path = path
+
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    """
+    Reads a 16-bit PCM WAV file into a mono float32 array.
+
+    Args:
+        path (str): Path to the WAV file.
+
+    Returns:
+        Tuple[np.ndarray, int]: The waveform in [-1, 1] and its sample rate.
+    """
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"Unsupported sample width in {path}: {wf.getsampwidth()} bytes")
+        channels = wf.getnchannels()
+        samplerate = wf.getframerate()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype='<i2')
+    audio = pcm.astype(np.float32) / 32768.0
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    return audio, samplerate
+
+
+def write_wav(path: str, audio: np.ndarray, samplerate: int = 16000) -> None:
+    """
+    Writes a mono float32 waveform as a 16-bit PCM WAV file.
+
+    Args:
+        path (str): Destination path.
+        audio (np.ndarray): Waveform in [-1, 1].
+        samplerate (int): Sample rate of the audio.
+    """
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(samplerate)
+        wf.writeframes(pcm.tobytes())
+
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """
+    Linearly resamples a mono waveform; returns the input unchanged if the rates match.
+    """
+    if src_rate == dst_rate or len(audio) == 0:
+        return audio
+    n_out = int(round(len(audio) * dst_rate / src_rate))
+    positions = np.arange(n_out) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
@@ -0,0 +1,105 @@
+"""
+Barge-in module: lets the user interrupt the assistant while it is speaking or working.
+"""
+from typing import Any, AsyncIterable, Dict, Optional, Set
+import asyncio
+import numpy as np
+from core.utils import logger
+
+
+class EchoSuppressor:
+    """
+    Tells user speech apart from the assistant's own voice picked up by the microphone.
+
+    While audio is playing, a voiced microphone frame only counts as the user if it
+    is louder than the block being played plus `echo_margin_db`. The margin is
+    negative because the speaker-to-microphone path attenuates the playback.
+    """
+    def __init__(self, vad: Any, echo_margin_db: float = -6.0) -> None:
+        self.vad = vad
+        self.echo_margin_db = echo_margin_db
+
+    def is_user_speech(self, frame: np.ndarray, playback_level_db: Optional[float]) -> bool:
+        """
+        Classifies one microphone frame given the current playback level (None if silent).
+        """
+        if not self.vad.is_speech(frame):
+            return False
+        if playback_level_db is None:
+            return True
+        mic_level_db = 10 * np.log10(np.mean(np.square(frame, dtype=np.float32)) + 1e-10)
+        return mic_level_db > playback_level_db + self.echo_margin_db
+
+
+class BargeInMonitor:
+    """
+    Watches the microphone during a turn and cancels the turn when the user speaks.
+
+    Pending work (planning, dispatch, playback tasks) is registered with `register`;
+    on barge-in, TTS playback is stopped and every registered task is cancelled,
+    so each stage unwinds through its own CancelledError handling.
+    """
+    def __init__(self, tts: Any, vad: Any, config: Dict[str, Any]) -> None:
+        barge_config = config.get('barge_in', {})
+        self.tts = tts
+        self.enabled: bool = barge_config.get('enabled', True)
+        self.min_speech_frames: int = barge_config.get('min_speech_frames', 5)
+        self.suppressor = EchoSuppressor(vad, barge_config.get('echo_margin_db', -6.0))
+        self.tasks: Set[asyncio.Task] = set()
+        self.interruptions = 0
+        self.barged_in = asyncio.Event()
+        self._speech_run = 0
+
+    @property
+    def active(self) -> bool:
+        """
+        True while the assistant is speaking or has registered work in flight.
+        """
+        return bool(getattr(self.tts, 'speaking', False)) or any(not t.done() for t in self.tasks)
+
+    def register(self, task: asyncio.Task) -> asyncio.Task:
+        """
+        Makes a task cancellable by barge-in for as long as it runs.
+
+        Registering new work starts a new turn, so `barged_in` is reset.
+        """
+        self.barged_in.clear()
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def interrupt(self) -> None:
+        """
+        Stops playback and cancels all registered work.
+        """
+        logger.info("Barge-in: user spoke, cancelling current turn.")
+        self.interruptions += 1
+        self.tts.stop()
+        for task in list(self.tasks):
+            task.cancel()
+        self.barged_in.set()
+
+    def feed(self, frame: np.ndarray) -> bool:
+        """
+        Consumes one microphone frame; returns True if it triggered a barge-in.
+        """
+        if not self.enabled or not self.active:
+            self._speech_run = 0
+            return False
+        level = getattr(self.tts, 'playback_level_db', None) if getattr(self.tts, 'speaking', False) else None
+        if self.suppressor.is_user_speech(frame, level):
+            self._speech_run += 1
+        else:
+            self._speech_run = 0
+        if self._speech_run >= self.min_speech_frames:
+            self._speech_run = 0
+            self.interrupt()
+            return True
+        return False
+
+    async def run(self, frames: AsyncIterable[np.ndarray]) -> None:
+        """
+        Feeds a frame stream (e.g. `Listener.stream_frames`) until it ends or the task is cancelled.
+        """
+        async for frame in frames:
+            self.feed(frame)
@@ -0,0 +1,160 @@
+"""
+Embedder module: local CPU sentence embeddings with quantized caching.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import importlib.util
+import numpy as np
+from core.array_cache import ArrayCache, content_key
+from core.model_cache import ModelKey, get_model_registry
+from core.utils import logger, load_config
+
+STORAGE_DTYPES = ('float32', 'float16', 'int8')
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> np.ndarray:
+    """
+    Converts unit-norm float vectors to the storage dtype.
+
+    int8 scales each vector so its largest component maps to 127; the scale is
+    not stored because `dequantize` re-normalizes.
+    """
+    if dtype == 'int8':
+        peak = np.max(np.abs(vectors), axis=-1, keepdims=True)
+        return np.round(vectors / np.maximum(peak, 1e-12) * 127).astype(np.int8)
+    return vectors.astype(dtype)
+
+
+def dequantize(vectors: np.ndarray) -> np.ndarray:
+    """
+    Converts stored vectors back to float32; int8 vectors are rescaled and re-normalized.
+    """
+    if vectors.dtype == np.int8:
+        restored = vectors.astype(np.float32) / 127
+        norms = np.linalg.norm(restored, axis=-1, keepdims=True)
+        return restored / np.maximum(norms, 1e-12)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+class Embedder:
+    """
+    Encodes text with a small sentence-transformers model on the CPU.
+
+    The model lives in the shared model registry and is loaded on first use
+    (`embedder.backend: onnx` runs it through ONNX Runtime). Texts are encoded
+    in batches of `batch_size`; each text's vector is cached by a hash of model
+    and text, in memory and on disk, stored as `storage_dtype` (float16 halves
+    the footprint, int8 quarters it; both keep cosine similarity to the
+    original above 0.999 for unit-norm vectors). Cached texts never reach the model.
+    """
+    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        config = config if config is not None else load_config()
+        embedder_config = config.get('embedder', {})
+        cache_config = embedder_config.get('cache', {})
+        self.model_name: str = embedder_config.get('model', 'sentence-transformers/all-MiniLM-L6-v2')
+        self.backend: str = embedder_config.get('backend', 'torch')
+        self.device: str = embedder_config.get('device', 'cpu')
+        self.batch_size: int = embedder_config.get('batch_size', 32)
+        self.normalize: bool = embedder_config.get('normalize', True)
+        self.storage_dtype: str = embedder_config.get('storage_dtype', 'float16')
+        if self.storage_dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage_dtype '{self.storage_dtype}'. Available: {list(STORAGE_DTYPES)}")
+        if self.storage_dtype == 'int8' and not self.normalize:
+            logger.warning("int8 embedding storage needs normalized vectors; using float16.")
+            self.storage_dtype = 'float16'
+        self.cache: Optional[ArrayCache] = None
+        if cache_config.get('enabled', True):
+            try:
+                self.cache = ArrayCache(cache_config.get('dir', './data/embedding_cache'),
+                                        max_bytes=int(cache_config.get('max_mb', 64) * 2**20),
+                                        memory_items=cache_config.get('memory_items', 4096))
+            except Exception as e:
+                logger.error(f"Failed to open embedding cache, caching disabled: {e}")
+
+    @staticmethod
+    def available() -> bool:
+        """
+        Whether sentence-transformers is installed.
+        """
+        return importlib.util.find_spec('sentence_transformers') is not None
+
+    @property
+    def cache_key(self) -> ModelKey:
+        return ('sentence-transformers', self.model_name, self.device, self.backend)
+
+    @property
+    def model(self) -> Any:
+        """
+        The shared model instance, loaded (and warmed up) on first access.
+        """
+        return get_model_registry().get(self.cache_key, self._load_model, self._warm_up)
+
+    def _load_model(self) -> Any:
+        from sentence_transformers import SentenceTransformer
+        if self.backend == 'torch':
+            return SentenceTransformer(self.model_name, device=self.device)
+        return SentenceTransformer(self.model_name, device=self.device, backend=self.backend)
+
+    def _warm_up(self, model: Any) -> None:
+        try:
+            model.encode(['warm up'], normalize_embeddings=self.normalize)
+        except Exception as e:
+            logger.warning(f"Embedder warm-up failed: {e}")
+
+    def preload(self) -> None:
+        """
+        Loads the model ahead of its first use.
+        """
+        self.model
+
+    @property
+    def dimension(self) -> int:
+        return int(self.model.get_sentence_embedding_dimension())
+
+    def _text_key(self, text: str) -> str:
+        return content_key(self.model_name, self.backend, self.normalize, text)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embeds texts, encoding only those missing from the cache.
+
+        Args:
+            texts (Sequence[str]): Texts to embed.
+
+        Returns:
+            np.ndarray: (len(texts), dimension) float32 matrix; rows are unit-norm when `normalize` is set.
+        """
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            cached = self.cache.get(self._text_key(text)) if self.cache is not None else None
+            if cached is not None:
+                vectors[i] = dequantize(cached)
+            else:
+                missing.setdefault(text, []).append(i)
+        if missing:
+            unique = list(missing)
+            encoded = np.asarray(self.model.encode(unique, batch_size=self.batch_size,
+                                                   normalize_embeddings=self.normalize,
+                                                   convert_to_numpy=True), dtype=np.float32)
+            for text, vector in zip(unique, encoded):
+                stored = quantize(vector, self.storage_dtype)
+                if self.cache is not None:
+                    self.cache.put(self._text_key(text), stored)
+                restored = dequantize(stored)
+                for i in missing[text]:
+                    vectors[i] = restored
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack(vectors)
+
+    def embed(self, text: str) -> List[float]:
+        """
+        Embeds one text as a list, the form `core.memory.Memory` and the plan cache expect.
+        """
+        return self.encode([text])[0].tolist()
+
+    def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Embeds texts as lists, for `Memory.ingest_many` / `Memory.query_many`.
+        """
+        return self.encode(texts).tolist()
@@ -0,0 +1,125 @@
+"""
+Intent router module: matches transcripts to skill triggers without calling the LLM.
+"""
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+from dataclasses import dataclass, field
+import re
+from core.text import normalize_command
+
+_SLOT = re.compile(r'\{(\w+)\}')
+_WILDCARD = ''
+
+
+@dataclass
+class Intent:
+    """
+    A routed transcript.
+
+    Attributes:
+        skill (Any): The skill module (or object) whose trigger matched.
+        trigger (str): The trigger as declared by the skill.
+        slots (Dict[str, str]): Values captured by `{slot}` placeholders.
+    """
+    skill: Any
+    trigger: str
+    slots: Dict[str, str] = field(default_factory=dict)
+
+
+def trigger_regex(trigger: str, prefix: str) -> Tuple[str, str]:
+    """
+    Compiles one trigger to a regex over normalized text.
+
+    Args:
+        trigger (str): Trigger phrase, e.g. "set a timer for {minutes} minutes".
+        prefix (str): Prepended to slot group names, so several triggers can share one alternation.
+
+    Returns:
+        Tuple[str, str]: The regex source and the trigger's first literal word ('' if it starts with a slot).
+    """
+    parts = _SLOT.split(trigger)
+    pieces = []
+    for i, part in enumerate(parts):
+        if i % 2:
+            pieces.append(f"(?P<{prefix}{part}>.+?)")
+        elif normalize_command(part):
+            pieces.append(re.escape(normalize_command(part)))
+    first = normalize_command(parts[0]).split(' ')[0] if normalize_command(parts[0]) else _WILDCARD
+    return ' '.join(pieces), first
+
+
+class IntentRouter:
+    """
+    Index of skill triggers, matched against the whole normalized transcript.
+
+    Triggers are phrases such as "what time is it" or "set a timer for
+    {minutes} minutes". Literal triggers live in a dict keyed by normalized
+    text, so they resolve with a single hash lookup. Triggers with slots are
+    bucketed by their first word (one trie level) and each bucket is compiled
+    into a single alternation regex, so a lookup tries one regex, plus the
+    bucket of triggers that start with a slot. Earlier registrations win.
+    """
+    def __init__(self) -> None:
+        self._literal: Dict[str, Intent] = {}
+        self._patterns: Dict[str, List[Tuple[Any, str]]] = {}
+        self._compiled: Optional[Dict[str, Tuple[Pattern[str], Dict[str, Tuple[Any, str, List[str]]]]]] = None
+        self.size = 0
+
+    @classmethod
+    def from_skills(cls, skills: List[Any]) -> 'IntentRouter':
+        """
+        Builds a router from every skill's `TRIGGERS` list.
+        """
+        router = cls()
+        for skill in skills:
+            for trigger in getattr(skill, 'TRIGGERS', []):
+                router.add(skill, trigger)
+        return router
+
+    def add(self, skill: Any, trigger: str) -> None:
+        """
+        Registers a trigger phrase for a skill.
+        """
+        self.size += 1
+        if _SLOT.search(trigger):
+            _, first = trigger_regex(trigger, '')
+            self._patterns.setdefault(first, []).append((skill, trigger))
+            self._compiled = None
+        else:
+            self._literal.setdefault(normalize_command(trigger), Intent(skill, trigger))
+
+    def _compile(self) -> Dict[str, Tuple[Pattern[str], Dict[str, Tuple[Any, str, List[str]]]]]:
+        compiled = {}
+        for first, entries in self._patterns.items():
+            alternatives, owners = [], {}
+            for i, (skill, trigger) in enumerate(entries):
+                regex, _ = trigger_regex(trigger, f"_{i}_")
+                alternatives.append(f"(?P<_{i}>{regex})")
+                owners[f"_{i}"] = (skill, trigger, _SLOT.findall(trigger))
+            compiled[first] = (re.compile('|'.join(alternatives)), owners)
+        return compiled
+
+    def route(self, text: str) -> Optional[Intent]:
+        """
+        Returns the intent whose trigger matches the whole transcript, or None.
+        """
+        key = normalize_command(text)
+        intent = self._literal.get(key)
+        if intent is not None:
+            return Intent(intent.skill, intent.trigger)
+        if not self._patterns:
+            return None
+        if self._compiled is None:
+            self._compiled = self._compile()
+        first = key.split(' ', 1)[0]
+        for bucket in (first, _WILDCARD) if first else (_WILDCARD,):
+            if bucket not in self._compiled:
+                continue
+            pattern, owners = self._compiled[bucket]
+            match = pattern.fullmatch(key)
+            if match is None:
+                continue
+            # The outer group of the matching alternative closes last.
+            name = match.lastgroup
+            skill, trigger, slot_names = owners[name]
+            return Intent(skill, trigger, {slot: match.group(f"{name}_{slot}") for slot in slot_names})
+        return None
@@ -1,21 +1,124 @@
 """
 Listener module for hotkey/wake-word detection and audio recording.
 """
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, FrozenSet, Optional
+import asyncio
+from contextlib import aclosing
 import numpy as np
-import sounddevice as sd
-from services.utils import logger, load_config
+from core.audio import AudioRingBuffer, ArrayAudioSource
+from core.vad import Endpointer, Utterance, create_vad
+from core.tracing import traced
+from core.wakeword import WakeWordDetector
+from core.utils import logger, load_config, subscribe_config
+
+# sounddevice needs the PortAudio library, so it is imported when audio is first recorded.
+sd: Any = None
+
+
+def _load_sounddevice() -> Any:
+    global sd
+    if sd is None:
+        import sounddevice as sd
+    return sd
+
+
+_SECTIONS = ('listener', 'vad', 'wakeword')
+
+
+class _FrameTap:
+    """
+    One consumer's ring buffer of captured audio, written from any thread.
+    """
+    def __init__(self, capacity: int, loop: asyncio.AbstractEventLoop) -> None:
+        self.ring = AudioRingBuffer(capacity)
+        self.ready = asyncio.Event()
+        self._loop = loop
+
+    def write(self, samples: np.ndarray) -> None:
+        self.ring.write(samples)
+        self._loop.call_soon_threadsafe(self.ready.set)
+
+    async def frames(self, blocksize: int) -> AsyncIterator[np.ndarray]:
+        while True:
+            self.ready.clear()
+            frame = self.ring.read(blocksize)
+            if frame is None:
+                await self.ready.wait()
+                continue
+            yield frame
+
 
 class Listener:
     """
     Handles hotkey or wake-word detection and records audio chunks.
     """
     def __init__(self) -> None:
-        self.config = load_config()
+        self.wake_detector: Optional[WakeWordDetector] = None
+        self._pending_config: Optional[Dict[str, Any]] = None
+        self._taps: FrozenSet[_FrameTap] = frozenset()
+        self._configure(load_config())
+        subscribe_config(self.apply_config)
+
+    def apply_config(self, config: Dict[str, Any]) -> None:
+        """
+        Queues the `listener`, `vad` and `wakeword` sections; called again whenever the config changes on disk.
+
+        The config watcher calls this from its own thread while audio may be
+        streaming, so the new settings are applied when the next recording or
+        stream starts; a running stream keeps its samplerate, frame size, VAD and
+        wake-word detector.
+        """
+        if all(config.get(k) == self.config.get(k) for k in _SECTIONS):
+            self._pending_config = None
+            return
+        self._pending_config = config
+
+    def _apply_pending_config(self) -> None:
+        config, self._pending_config = self._pending_config, None
+        if config is not None:
+            self._configure(config)
+
+    def _configure(self, config: Dict[str, Any]) -> None:
+        previous: Optional[Dict[str, Any]] = getattr(self, 'config', None)
+        self.config = config
+        changed = set(_SECTIONS) if previous is None else {k for k in _SECTIONS if config.get(k) != previous.get(k)}
+        if not changed:
+            return
+        previous_timing = (getattr(self, 'samplerate', None), getattr(self, 'frame_ms', None))
         self.samplerate: int = self.config.get('listener', {}).get('samplerate', 16000)
         self.channels: int = self.config.get('listener', {}).get('channels', 1)
         self.duration: float = self.config.get('listener', {}).get('duration', 3.0)  # seconds
+        self.frame_ms: int = self.config.get('listener', {}).get('frame_ms', 30)
+        self.buffer_seconds: float = self.config.get('listener', {}).get('buffer_seconds', 10.0)
+        timing_changed = previous_timing != (self.samplerate, self.frame_ms)
+        if timing_changed or 'vad' in changed:
+            self.vad = create_vad(self.config, self.samplerate, self.frame_ms)
+        if timing_changed or changed & {'vad', 'wakeword'}:
+            self._configure_wake_detector(timing_changed)
+
+    def _configure_wake_detector(self, timing_changed: bool) -> None:
+        """
+        Rebuilds the wake-word detector, keeping templates enrolled at runtime when the frame timing allows.
+        """
+        previous = self.wake_detector
+        self.wake_detector = None
+        if not self.config.get('wakeword', {}).get('enabled', False):
+            return
+        self.wake_detector = WakeWordDetector(self.config, self.samplerate, self.frame_ms)
+        enrolled = getattr(previous, 'enrolled_templates', [])
+        if enrolled and timing_changed:
+            logger.warning(f"Dropping {len(enrolled)} enrolled wake-word template(s): samplerate or frame size changed.")
+        elif enrolled:
+            self.wake_detector.adopt(enrolled)
+
+    @property
+    def blocksize(self) -> int:
+        """
+        Number of samples per streamed frame.
+        """
+        return int(self.samplerate * self.frame_ms / 1000)
 
+    @traced('listener.record_audio')
     def record_audio(self) -> Optional[np.ndarray]:
         """
         Records an audio chunk from the default microphone.
@@ -23,11 +126,188 @@ class Listener:
         Returns:
             np.ndarray: The recorded audio waveform, or None if recording fails.
         """
+        self._apply_pending_config()
         try:
             logger.info(f"Recording audio: {self.duration}s @ {self.samplerate}Hz, {self.channels} channel(s)")
-            audio = sd.rec(int(self.duration * self.samplerate), samplerate=self.samplerate, channels=self.channels, dtype='float32')
-            sd.wait()
+            sounddevice = _load_sounddevice()
+            audio = sounddevice.rec(int(self.duration * self.samplerate), samplerate=self.samplerate, channels=self.channels, dtype='float32')
+            sounddevice.wait()
             return audio.flatten()
         except Exception as e:
             logger.error(f"Audio recording failed: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+    async def stream_frames(self, source: Optional[ArrayAudioSource] = None) -> AsyncIterator[np.ndarray]:
+        """
+        Continuously yields mono float32 frames of `blocksize` samples.
+
+        Pending config changes are applied first; the stream then keeps its
+        samplerate and frame size until it ends.
+
+        Args:
+            source (Optional[ArrayAudioSource]): Injected audio (array or WAV file) to
+                replay instead of the microphone. The last frame may be shorter.
+
+        Yields:
+            np.ndarray: The next audio frame.
+        """
+        self._apply_pending_config()
+        async for frame in self._stream_frames(source):
+            yield frame
+
+    async def _stream_frames(self, source: Optional[ArrayAudioSource]) -> AsyncIterator[np.ndarray]:
+        samplerate, blocksize, channels = self.samplerate, self.blocksize, self.channels
+        if source is not None:
+            async for frame in self._stream_source(source, samplerate, blocksize):
+                yield frame
+            return
+        tap = _FrameTap(int(self.buffer_seconds * samplerate), asyncio.get_running_loop())
+
+        def callback(indata: np.ndarray, frames: int, time_info, status) -> None:
+            if status:
+                logger.warning(f"Input stream status: {status}")
+            samples = indata[:, 0] if channels == 1 else indata.mean(axis=1)
+            tap.write(samples)
+            self._publish(samples)
+
+        logger.info(f"Streaming audio: {self.frame_ms}ms frames @ {samplerate}Hz, {channels} channel(s)")
+        sounddevice = _load_sounddevice()
+        with sounddevice.InputStream(samplerate=samplerate, channels=channels, dtype='float32',
+                                     blocksize=blocksize, callback=callback):
+            async for frame in tap.frames(blocksize):
+                yield frame
+
+    async def _stream_source(self, source: ArrayAudioSource, samplerate: int,
+                             blocksize: int) -> AsyncIterator[np.ndarray]:
+        """
+        Yields frames from an injected source, paced in real time if requested.
+        """
+        if source.samplerate != samplerate:
+            logger.warning(f"Source samplerate {source.samplerate}Hz differs from listener {samplerate}Hz")
+        delay = blocksize / samplerate if source.realtime else 0
+        while True:
+            frame = source.read(blocksize)
+            if frame is None:
+                return
+            self._publish(frame)
+            yield frame
+            await asyncio.sleep(delay)
+
+    def _publish(self, samples: np.ndarray) -> None:
+        for tap in self._taps:
+            tap.write(samples)
+
+    async def monitor_frames(self) -> AsyncIterator[np.ndarray]:
+        """
+        Yields a copy of the audio captured by the running streams, without opening another one.
+
+        Each caller reads from its own ring buffer, so a barge-in monitor can
+        watch the microphone while `utterances` keeps endpointing the same audio.
+        Frames from injected sources are shared the same way.
+
+        Yields:
+            np.ndarray: The next frame of `blocksize` samples.
+        """
+        tap = _FrameTap(int(self.buffer_seconds * self.samplerate), asyncio.get_running_loop())
+        self._taps = self._taps | {tap}
+        try:
+            async for frame in tap.frames(self.blocksize):
+                yield frame
+        finally:
+            self._taps = self._taps - {tap}
+
+    def create_endpointer(self) -> Endpointer:
+        """
+        Builds an endpointer configured from the `vad` config section.
+        """
+        vad_config = self.config.get('vad', {})
+        return Endpointer(self.vad, samplerate=self.samplerate,
+                          start_frames=vad_config.get('start_frames', 3),
+                          hangover_ms=vad_config.get('hangover_ms', 500),
+                          pre_roll_ms=vad_config.get('pre_roll_ms', 150),
+                          max_utterance_s=vad_config.get('max_utterance_s', 15.0))
+
+    async def utterances(self, source: Optional[ArrayAudioSource] = None) -> AsyncIterator[Utterance]:
+        """
+        Yields endpointed utterances, with leading and trailing silence removed.
+
+        Args:
+            source (Optional[ArrayAudioSource]): Injected audio to replay instead of the microphone.
+
+        Yields:
+            Utterance: Speech audio with its start/end timestamps in the stream.
+        """
+        self._apply_pending_config()
+        endpointer = self.create_endpointer()
+        async for frame in self._stream_frames(source):
+            utterance = endpointer.feed(frame)
+            if utterance is not None:
+                yield utterance
+        utterance = endpointer.flush()
+        if utterance is not None:
+            yield utterance
+
+    async def wake_gated_utterances(self, source: Optional[ArrayAudioSource] = None) -> AsyncIterator[Utterance]:
+        """
+        Yields only the utterances that follow a wake-word hit or hotkey press.
+
+        While asleep, frames go through the wake-word detector alone; the endpointer
+        runs only once woken, and the listener falls back asleep after one utterance
+        or after `wakeword.listen_timeout_s` without speech. Without a detector this
+        is equivalent to `utterances`.
+
+        Args:
+            source (Optional[ArrayAudioSource]): Injected audio to replay instead of the microphone.
+
+        Yields:
+            Utterance: The command spoken after the wake word.
+        """
+        self._apply_pending_config()
+        detector = self.wake_detector
+        if detector is None:
+            async for utterance in self.utterances(source):
+                yield utterance
+            return
+        timeout_s = self.config.get('wakeword', {}).get('listen_timeout_s', 5.0)
+        timeout_frames = int(timeout_s * 1000 / self.frame_ms)
+        endpointer = self.create_endpointer()
+        awake = False
+        idle_frames = 0
+        async for frame in self._stream_frames(source):
+            if not awake:
+                endpointer.advance(len(frame))
+                if detector.process(frame):
+                    awake = True
+                    idle_frames = 0
+                    endpointer.reset()
+                continue
+            utterance = endpointer.feed(frame)
+            if utterance is not None:
+                awake = False
+                detector.reset()
+                yield utterance
+            elif not endpointer.in_speech:
+                idle_frames += 1
+                if idle_frames >= timeout_frames:
+                    logger.info("No command after wake word, going back to sleep.")
+                    awake = False
+                    detector.reset()
+        if awake:
+            utterance = endpointer.flush()
+            if utterance is not None:
+                yield utterance
+
+    async def listen_utterance(self, source: Optional[ArrayAudioSource] = None) -> Optional[Utterance]:
+        """
+        Waits for the next utterance and returns it as soon as the hangover expires.
+
+        Returns:
+            Optional[Utterance]: The utterance, or None if the stream ended or failed.
+        """
+        try:
+            async with aclosing(self.utterances(source)) as utterances:
+                async for utterance in utterances:
+                    return utterance
+        except Exception as e:
+            logger.error(f"Listening failed: {e}")
+        return None
@@ -1,44 +1,185 @@
 """
-Memory module for vector DB operations using Chroma.
+Memory module for vector DB operations (Chroma or an in-process NumPy index).
 """
-from typing import List, Optional
-import chromadb
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import atexit
+import threading
+from core.array_cache import content_key
+from core.memory_backends import Match, MemoryBackend, create_memory_backend
 from core.utils import logger, load_config
 
+
+def document_id(metadata: dict) -> str:
+    """
+    Stable id derived from the metadata, so identical content is stored once.
+    """
+    return content_key(sorted(metadata.items()))
+
+
 class Memory:
     """
-    Wraps Chroma vector DB for ingesting and querying embeddings.
+    Wraps a vector store for ingesting and querying embeddings.
+
+    `memory.backend` selects ChromaDB (`chroma`) or the in-process memory-mapped
+    index (`numpy`, see `core.memory_backends.NumpyBackend`).
+
+    `ingest_many` and `query_many` send vectors in chunks of `memory.batch_size`
+    per round-trip. `ingest_later` buffers writes instead: a background thread
+    upserts them once `memory.write_behind.flush_size` are pending or every
+    `flush_interval_s`. Queries flush pending writes first, so they always see
+    what was ingested before them.
     """
-    def __init__(self) -> None:
+    def __init__(self, collection: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Args:
+            collection (Optional[str]): Collection name; defaults to `memory.collection`.
+            metadata (Optional[Dict[str, Any]]): Collection metadata, e.g. {'hnsw:space': 'cosine'}
+                (Chroma only; the NumPy index always uses cosine distance).
+        """
         self.config = load_config()
+        memory_config = self.config.get('memory', {})
+        write_behind_config = memory_config.get('write_behind', {})
         try:
-            persistent_path = self.config.get('memory', {}).get('persistent_client_path', './data/chroma_db')
-            self.client = chromadb.PersistentClient(path=persistent_path)
-            self.collection = self.client.create_collection(self.config.get('memory', {}).get('collection', 'default'))
+            name = collection or memory_config.get('collection', 'default')
+            self.backend: MemoryBackend = create_memory_backend(memory_config, name, metadata)
         except Exception as e:
-            logger.error(f"Failed to initialize Chroma DB: {e}")
+            logger.error(f"Failed to initialize memory backend: {e}")
             raise
+        self.batch_size: int = memory_config.get('batch_size', 256)
+        if self.backend.max_batch_size:
+            self.batch_size = min(self.batch_size, self.backend.max_batch_size)
+        self.flush_size: int = write_behind_config.get('flush_size', 64)
+        self.flush_interval_s: float = write_behind_config.get('flush_interval_s', 1.0)
+        self._pending: Dict[str, Tuple[List[float], dict]] = {}
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        self.flushes = 0
 
-    def ingest(self, embedding: List[float], metadata: dict) -> bool:
+    def ingest(self, embedding: List[float], metadata: dict, doc_id: Optional[str] = None) -> bool:
         """
         Ingests an embedding and its metadata into the vector DB.
 
         Args:
             embedding (List[float]): The embedding vector.
             metadata (dict): Associated metadata.
+            doc_id (Optional[str]): Entry id; defaults to a hash of the metadata, so
+                re-ingesting the same content replaces it instead of duplicating it.
 
         Returns:
             bool: True if successful, False otherwise.
         """
         try:
-            # TODO : which embedding ? do a benchmarck ?
-            self.collection.add(embeddings=[embedding], metadatas=[metadata])
+            doc_id = doc_id or document_id(metadata)
+            self.backend.upsert([doc_id], [embedding], [metadata])
             logger.info("Embedding ingested successfully.")
             return True
         except Exception as e:
             logger.error(f"Ingest failed: {e}")
             return False
 
+    def ingest_many(self, embeddings: Sequence[List[float]], metadatas: Sequence[dict],
+                    ids: Optional[Sequence[str]] = None) -> bool:
+        """
+        Ingests many embeddings with one upsert per `batch_size` chunk.
+
+        Args:
+            embeddings (Sequence[List[float]]): The embedding vectors.
+            metadatas (Sequence[dict]): Metadata for each vector.
+            ids (Optional[Sequence[str]]): Entry ids; default to content hashes.
+                Repeated ids keep their last vector.
+
+        Returns:
+            bool: True if successful, False otherwise.
+        """
+        if len(embeddings) != len(metadatas) or (ids is not None and len(ids) != len(embeddings)):
+            logger.error("Ingest failed: embeddings, metadatas and ids differ in length.")
+            return False
+        ids = ids or [document_id(m) for m in metadatas]
+        entries = dict(zip(ids, zip(embeddings, metadatas)))
+        return self._upsert(entries)
+
+    def _upsert(self, entries: Dict[str, Tuple[List[float], dict]]) -> bool:
+        items = list(entries.items())
+        try:
+            for start in range(0, len(items), self.batch_size):
+                chunk = items[start:start + self.batch_size]
+                self.backend.upsert([doc_id for doc_id, _ in chunk],
+                                    [embedding for _, (embedding, _) in chunk],
+                                    [metadata for _, (_, metadata) in chunk])
+            logger.info(f"Ingested {len(items)} embeddings.")
+            return True
+        except Exception as e:
+            logger.error(f"Ingest failed: {e}")
+            return False
+
+    def ingest_later(self, embedding: List[float], metadata: dict, doc_id: Optional[str] = None) -> None:
+        """
+        Buffers an embedding for the background writer and returns immediately.
+
+        Args:
+            embedding (List[float]): The embedding vector.
+            metadata (dict): Associated metadata.
+            doc_id (Optional[str]): Entry id; defaults to a hash of the metadata.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Memory is closed")
+            self._pending[doc_id or document_id(metadata)] = (embedding, metadata)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_behind, name='memory-writer', daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+            if len(self._pending) >= self.flush_size:
+                self._cond.notify()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> bool:
+        """
+        Writes every buffered embedding now.
+
+        Returns:
+            bool: True if successful (or nothing was pending), False otherwise.
+        """
+        with self._write_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return True
+            self.flushes += 1
+            if self._upsert(batch):
+                return True
+            with self._cond:
+                # Keep failed writes for the next flush unless newer values arrived meanwhile.
+                self._pending = {**batch, **self._pending}
+            return False
+
+    def _write_behind(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._pending) >= self.flush_size,
+                                    timeout=self.flush_interval_s)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def close(self) -> None:
+        """
+        Flushes buffered writes and stops the background writer.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._writer is not None and self._writer is not threading.current_thread():
+            self._writer.join()
+        self.flush()
+        self.backend.close()
+
     def query(self, embedding: List[float], n_results: int = 1) -> Optional[List[dict]]:
         """
         Queries the vector DB for similar embeddings.
@@ -51,9 +192,64 @@ class Memory:
             Optional[List[dict]]: List of matching metadata dicts, or None if failed.
         """
         try:
-            # TODO : which method for queries ?
-            results = self.collection.query(query_embeddings=[embedding], n_results=n_results)
-            return results.get('metadatas')
+            self.flush()
+            return [[metadata for _, metadata, _ in matches]
+                    for matches in self.backend.query([embedding], n_results=n_results)]
+        except Exception as e:
+            logger.error(f"Query failed: {e}")
+            return None
+
+    def query_scored(self, embedding: List[float], n_results: int = 1,
+                     where: Optional[Dict[str, Any]] = None) -> Optional[List[Match]]:
+        """
+        Queries the vector DB and returns (id, metadata, distance) tuples, nearest first.
+
+        Args:
+            embedding (List[float]): The query embedding.
+            n_results (int): Number of results to return.
+            where (Optional[Dict[str, Any]]): Chroma metadata filter.
+
+        Returns:
+            Optional[List[Match]]: Matches, or None if failed.
+        """
+        results = self.query_many([embedding], n_results=n_results, where=where)
+        return results[0] if results is not None else None
+
+    def query_many(self, embeddings: Sequence[List[float]], n_results: int = 1,
+                   where: Optional[Dict[str, Any]] = None) -> Optional[List[List[Match]]]:
+        """
+        Queries many embeddings with one round-trip per `batch_size` chunk.
+
+        Args:
+            embeddings (Sequence[List[float]]): The query embeddings.
+            n_results (int): Number of results per query.
+            where (Optional[Dict[str, Any]]): Chroma metadata filter.
+
+        Returns:
+            Optional[List[List[Match]]]: (id, metadata, distance) matches per query, or None if failed.
+        """
+        try:
+            self.flush()
+            matches: List[List[Match]] = []
+            for start in range(0, len(embeddings), self.batch_size):
+                matches.extend(self.backend.query(embeddings[start:start + self.batch_size],
+                                                  n_results=n_results, where=where))
+            return matches
         except Exception as e:
             logger.error(f"Query failed: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Deletes entries by id and/or metadata filter.
+
+        Returns:
+            bool: True if successful, False otherwise.
+        """
+        try:
+            self.flush()
+            self.backend.delete(ids=ids, where=where)
+            return True
+        except Exception as e:
+            logger.error(f"Delete failed: {e}")
+            return False
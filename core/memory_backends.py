@@ -0,0 +1,379 @@
+"""
+Memory backends module: vector stores behind `core.memory.Memory`, selected from config.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+from abc import ABC, abstractmethod
+import json
+import os
+import threading
+import numpy as np
+from core.utils import logger
+
+# (id, metadata, cosine or backend distance)
+Match = Tuple[str, dict, float]
+
+MEMORY_BACKENDS: Dict[str, Type['MemoryBackend']] = {}
+
+
+def register_memory_backend(name: str) -> Callable[[Type['MemoryBackend']], Type['MemoryBackend']]:
+    """
+    Class decorator adding a memory backend to the registry under `name`.
+    """
+    def decorator(cls: Type['MemoryBackend']) -> Type['MemoryBackend']:
+        cls.name = name
+        MEMORY_BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def matches_where(metadata: dict, where: Dict[str, Any]) -> bool:
+    """
+    Evaluates a Chroma-style metadata filter: equality, $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte, $and/$or.
+    """
+    for key, condition in where.items():
+        if key == '$and':
+            if not all(matches_where(metadata, c) for c in condition):
+                return False
+        elif key == '$or':
+            if not any(matches_where(metadata, c) for c in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                if op == '$eq' and value != operand or op == '$ne' and value == operand:
+                    return False
+                if op == '$in' and value not in operand or op == '$nin' and value in operand:
+                    return False
+                if op in ('$gt', '$gte', '$lt', '$lte'):
+                    if value is None:
+                        return False
+                    if (op == '$gt' and not value > operand or op == '$gte' and not value >= operand
+                            or op == '$lt' and not value < operand or op == '$lte' and not value <= operand):
+                        return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class MemoryBackend(ABC):
+    """
+    Base class for vector stores.
+
+    Backends upsert by id, answer batched nearest-neighbour queries, and delete
+    by id or metadata filter. `max_batch_size` caps how many vectors one call may carry.
+    """
+    name = 'base'
+    max_batch_size: Optional[int] = None
+
+    def __init__(self, memory_config: Dict[str, Any], collection: str,
+                 metadata: Optional[Dict[str, Any]] = None) -> None:
+        self.memory_config = memory_config
+        self.collection_name = collection
+
+    @abstractmethod
+    def upsert(self, ids: List[str], embeddings: Sequence[List[float]], metadatas: List[dict]) -> None:
+        """
+        Inserts or replaces vectors by id.
+        """
+
+    @abstractmethod
+    def query(self, embeddings: Sequence[List[float]], n_results: int = 1,
+              where: Optional[Dict[str, Any]] = None) -> List[List[Match]]:
+        """
+        Top `n_results` matches per query vector, optionally filtered by metadata.
+        """
+
+    @abstractmethod
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Removes vectors by id or metadata filter.
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """
+        Number of stored vectors.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+@register_memory_backend('chroma')
+class ChromaBackend(MemoryBackend):
+    """
+    ChromaDB persistent collection (HNSW index, separate storage engine).
+    """
+    def __init__(self, memory_config: Dict[str, Any], collection: str,
+                 metadata: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(memory_config, collection, metadata)
+        import chromadb
+        persistent_path = memory_config.get('persistent_client_path', './data/chroma_db')
+        self.client = chromadb.PersistentClient(path=persistent_path)
+        self.collection = self.client.get_or_create_collection(collection, metadata=metadata)
+        max_batch = getattr(self.client, 'max_batch_size', None)
+        if isinstance(max_batch, int) and max_batch > 0:
+            self.max_batch_size = max_batch
+
+    def upsert(self, ids: List[str], embeddings: Sequence[List[float]], metadatas: List[dict]) -> None:
+        self.collection.upsert(ids=ids, embeddings=list(embeddings), metadatas=metadatas)
+
+    def query(self, embeddings: Sequence[List[float]], n_results: int = 1,
+              where: Optional[Dict[str, Any]] = None) -> List[List[Match]]:
+        results = self.collection.query(query_embeddings=list(embeddings), n_results=n_results, where=where,
+                                        include=['metadatas', 'distances'])
+        return [list(zip(*row)) for row in zip(results['ids'], results['metadatas'], results['distances'])]
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        self.collection.delete(ids=ids, where=where)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+@register_memory_backend('numpy')
+class NumpyBackend(MemoryBackend):
+    """
+    In-process index: a memory-mapped float32/float16 matrix plus a JSONL metadata sidecar.
+
+    Vectors are L2-normalized on insert and appended to `vectors.bin`, which
+    grows by doubling; `meta.jsonl` gets one line per appended row and one
+    tombstone per delete, so writes never rewrite existing data. An upsert of a
+    known id appends a new row and retires the old one (`compact` reclaims the
+    space). Opening the index maps the matrix without reading it and replays
+    the sidecar. `header.json` names the current generation of both files, so
+    `compact` can write a new generation and switch to it with one atomic
+    rename. Queries are a brute-force dot product over the matrix in
+    `chunk_rows` blocks followed by `argpartition` top-k, optionally restricted
+    by a metadata filter whose row mask is cached and extended as rows are
+    appended; distances are cosine distances (1 - similarity).
+    """
+    def __init__(self, memory_config: Dict[str, Any], collection: str,
+                 metadata: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(memory_config, collection, metadata)
+        numpy_config = memory_config.get('numpy', {})
+        self.directory = os.path.join(numpy_config.get('path', './data/vector_index'), collection)
+        self.dtype = np.dtype(numpy_config.get('dtype', 'float32'))
+        self.chunk_rows: int = numpy_config.get('chunk_rows', 65536)
+        self.dim: Optional[int] = None
+        self._matrix: Optional[np.memmap] = None
+        self._capacity = 0
+        self._generation = 0
+        self._ids: List[str] = []
+        self._metadatas: List[dict] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._rows: Dict[str, int] = {}
+        self._filter_masks: Dict[str, np.ndarray] = {}
+        self._lock = threading.RLock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._open()
+
+    def _data_path(self, name: str, extension: str, generation: int) -> str:
+        # Generation 0 keeps the original file names, so existing indexes open unchanged.
+        suffix = f".{generation}" if generation else ''
+        return os.path.join(self.directory, f"{name}{suffix}.{extension}")
+
+    @property
+    def _vectors_path(self) -> str:
+        return self._data_path('vectors', 'bin', self._generation)
+
+    @property
+    def _meta_path(self) -> str:
+        return self._data_path('meta', 'jsonl', self._generation)
+
+    @property
+    def _header_path(self) -> str:
+        return os.path.join(self.directory, 'header.json')
+
+    def _open(self) -> None:
+        if not os.path.exists(self._header_path):
+            return
+        with open(self._header_path, 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        self.dim, self.dtype = header['dim'], np.dtype(header['dtype'])
+        self._generation = header.get('generation', 0)
+        alive: List[bool] = []
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if 'delete' in entry:
+                        row = self._rows.pop(entry['delete'], None)
+                        if row is not None:
+                            alive[row] = False
+                        continue
+                    previous = self._rows.get(entry['id'])
+                    if previous is not None:
+                        alive[previous] = False
+                    self._rows[entry['id']] = len(self._ids)
+                    self._ids.append(entry['id'])
+                    self._metadatas.append(entry['metadata'])
+                    alive.append(True)
+        row_bytes = self.dim * self.dtype.itemsize
+        self._capacity = os.path.getsize(self._vectors_path) // row_bytes if os.path.exists(self._vectors_path) else 0
+        if self._capacity < len(self._ids):
+            logger.warning(f"Vector index {self.directory} is truncated; dropping {len(self._ids) - self._capacity} rows.")
+            for doc_id in self._ids[self._capacity:]:
+                self._rows.pop(doc_id, None)
+            del self._ids[self._capacity:], self._metadatas[self._capacity:], alive[self._capacity:]
+        self._alive = np.zeros(self._capacity, dtype=bool)
+        self._alive[:len(alive)] = alive
+        if self._capacity:
+            self._matrix = np.memmap(self._vectors_path, dtype=self.dtype, mode='r+', shape=(self._capacity, self.dim))
+
+    def _write_header(self) -> None:
+        tmp_path = f"{self._header_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'dim': self.dim, 'dtype': self.dtype.name, 'generation': self._generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._header_path)
+
+    def _grow(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, 2 * self._capacity, 1024)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self._vectors_path, 'ab') as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self._matrix = np.memmap(self._vectors_path, dtype=self.dtype, mode='r+', shape=(capacity, self.dim))
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._capacity] = self._alive
+        self._alive, self._capacity = alive, capacity
+
+    def upsert(self, ids: List[str], embeddings: Sequence[List[float]], metadatas: List[dict]) -> None:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self._write_header()
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-d embeddings, got {vectors.shape[1]}-d")
+            start = len(self._ids)
+            self._grow(start + len(ids))
+            self._matrix[start:start + len(ids)] = vectors.astype(self.dtype)
+            self._matrix.flush()
+            with open(self._meta_path, 'a', encoding='utf-8') as f:
+                for doc_id, metadata in zip(ids, metadatas):
+                    f.write(json.dumps({'id': doc_id, 'metadata': metadata}) + '\n')
+            for offset, (doc_id, metadata) in enumerate(zip(ids, metadatas)):
+                previous = self._rows.get(doc_id)
+                if previous is not None:
+                    self._alive[previous] = False
+                self._rows[doc_id] = start + offset
+                self._ids.append(doc_id)
+                self._metadatas.append(metadata)
+            self._alive[start:start + len(ids)] = True
+
+    def _filter_mask(self, where: Dict[str, Any], n: int) -> np.ndarray:
+        # A row's metadata never changes (updates append a new row), so masks only grow.
+        key = json.dumps(where, sort_keys=True)
+        mask = self._filter_masks.get(key, np.zeros(0, dtype=bool))
+        if len(mask) < n:
+            tail = np.fromiter((matches_where(m, where) for m in self._metadatas[len(mask):n]),
+                               dtype=bool, count=n - len(mask))
+            mask = np.concatenate([mask, tail])
+            if len(self._filter_masks) >= 32 and key not in self._filter_masks:
+                self._filter_masks.pop(next(iter(self._filter_masks)))
+            self._filter_masks[key] = mask
+        return mask[:n]
+
+    def query(self, embeddings: Sequence[List[float]], n_results: int = 1,
+              where: Optional[Dict[str, Any]] = None) -> List[List[Match]]:
+        queries = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        with self._lock:
+            n = len(self._ids)
+            mask = self._alive[:n].copy()
+            if where:
+                mask &= self._filter_mask(where, n)
+            k = min(n_results, int(mask.sum()))
+            if k == 0:
+                return [[] for _ in queries]
+            scores = np.empty((len(queries), n), dtype=np.float32)
+            for start in range(0, n, self.chunk_rows):
+                block = self._matrix[start:min(start + self.chunk_rows, n)]
+                if block.dtype != np.float32:
+                    block = block.astype(np.float32)
+                scores[:, start:start + len(block)] = queries @ block.T
+            scores[:, ~mask] = -np.inf
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            results = []
+            for row, candidates in zip(scores, top):
+                order = candidates[np.argsort(-row[candidates])]
+                results.append([(self._ids[j], self._metadatas[j], float(1.0 - row[j])) for j in order])
+            return results
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            targets = set(ids or [])
+            if where:
+                targets |= {doc_id for doc_id, row in self._rows.items() if matches_where(self._metadatas[row], where)}
+            targets &= set(self._rows)
+            if not targets:
+                return
+            with open(self._meta_path, 'a', encoding='utf-8') as f:
+                for doc_id in targets:
+                    f.write(json.dumps({'delete': doc_id}) + '\n')
+            for doc_id in targets:
+                self._alive[self._rows.pop(doc_id)] = False
+
+    def count(self) -> int:
+        return len(self._rows)
+
+    def compact(self) -> None:
+        """
+        Rewrites the index with live rows only, reclaiming space from updates and deletes.
+
+        Both files are written as the next generation and take effect together
+        when the header is replaced; a crash before that leaves the old generation intact.
+        """
+        with self._lock:
+            if self._matrix is None:
+                return
+            live = np.flatnonzero(self._alive[:len(self._ids)])
+            vectors = np.array(self._matrix[live])
+            entries = [(self._ids[i], self._metadatas[i]) for i in live]
+            self._matrix.flush()
+            self._matrix = None
+            old_paths = (self._vectors_path, self._meta_path)
+            generation = self._generation + 1
+            with open(self._data_path('vectors', 'bin', generation), 'wb') as f:
+                vectors.tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._data_path('meta', 'jsonl', generation), 'w', encoding='utf-8') as f:
+                for doc_id, metadata in entries:
+                    f.write(json.dumps({'id': doc_id, 'metadata': metadata}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._generation = generation
+            self._write_header()
+            for path in old_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            self._ids, self._metadatas, self._rows, self._filter_masks = [], [], {}, {}
+            self._alive, self._capacity = np.zeros(0, dtype=bool), 0
+            self._open()
+            logger.info(f"Compacted vector index {self.directory} to {len(live)} rows.")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+
+
+def create_memory_backend(memory_config: Dict[str, Any], collection: str,
+                          metadata: Optional[Dict[str, Any]] = None) -> MemoryBackend:
+    """
+    Instantiates the backend named by `memory.backend` (default: chroma).
+    """
+    name = memory_config.get('backend', 'chroma')
+    if name not in MEMORY_BACKENDS:
+        raise ValueError(f"Unknown memory backend '{name}'. Available: {sorted(MEMORY_BACKENDS)}")
+    return MEMORY_BACKENDS[name](memory_config, collection, metadata)
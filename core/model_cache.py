@@ -0,0 +1,156 @@
+"""
+Model cache module: process-wide registry of lazily loaded, shared models.
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+import os
+import threading
+from core.utils import logger, load_config
+
+# (backend, model name, device, compute type)
+ModelKey = Tuple[str, str, str, str]
+
+
+def current_rss() -> int:
+    """
+    Resident set size of this process in bytes (0 where /proc is unavailable).
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return 0
+
+
+def estimate_model_size(model: Any) -> int:
+    """
+    Bytes held by a model: torch parameters and buffers if available, else 0.
+    """
+    size = getattr(model, 'size_bytes', None)
+    if isinstance(size, int):
+        return size
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return 0
+
+
+class ModelRegistry:
+    """
+    Loads each model once per process and shares it between components.
+
+    Entries are loaded on first `get`, kept in LRU order, and the least recently
+    used ones are evicted when the estimated total exceeds `max_bytes`. The size
+    of a model is its torch tensor footprint or, failing that, the RSS growth
+    observed while loading it. Components should call `get` on each use instead
+    of holding on to the model so that eviction actually frees memory.
+    """
+    def __init__(self, max_bytes: Optional[int] = None) -> None:
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[ModelKey, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, key: ModelKey) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(size for _, size in self._entries.values())
+
+    def get(self, key: ModelKey, loader: Callable[[], Any],
+            warm_up: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Returns the cached model for `key`, loading it on first use.
+
+        Concurrent callers asking for the same key wait for a single load.
+
+        Args:
+            key (ModelKey): (backend, model name, device, compute type).
+            loader (Callable[[], Any]): Builds the model; exceptions propagate.
+            warm_up (Optional[Callable[[Any], None]]): Run once right after loading.
+
+        Returns:
+            Any: The shared model instance.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+            logger.info(f"Loading model {key}")
+            rss_before = current_rss()
+            model = loader()
+            size = estimate_model_size(model) or max(current_rss() - rss_before, 0)
+            if warm_up is not None:
+                warm_up(model)
+            with self._lock:
+                self._entries[key] = (model, size)
+                self.loads += 1
+                self._evict_over_budget(keep=key)
+            logger.info(f"Model {key} loaded ({size / 2**20:.1f} MiB)")
+            return model
+
+    def preload(self, key: ModelKey, loader: Callable[[], Any],
+                warm_up: Optional[Callable[[Any], None]] = None) -> None:
+        """
+        Loads (and warms up) a model ahead of its first use.
+        """
+        self.get(key, loader, warm_up)
+
+    def evict(self, key: ModelKey) -> bool:
+        """
+        Drops a model from the cache; returns False if it was not loaded.
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+            self.evictions += 1
+            logger.info(f"Evicted model {key}")
+            return True
+
+    def clear(self) -> None:
+        """
+        Drops every cached model.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _evict_over_budget(self, keep: ModelKey) -> None:
+        if self.max_bytes is None:
+            return
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(k for k in self._entries if k != keep)
+            self._entries.pop(key)
+            self.evictions += 1
+            logger.info(f"Evicted model {key} to stay under {self.max_bytes / 2**20:.0f} MiB")
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Returns the process-wide registry, sized from `model_cache.max_memory_mb`.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            max_mb = load_config().get('model_cache', {}).get('max_memory_mb')
+            _registry = ModelRegistry(int(max_mb * 2**20) if max_mb else None)
+        return _registry
@@ -0,0 +1,160 @@
+"""
+Plan cache module: two-tier cache of LLM plans keyed by what the user said.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import copy
+import json
+import threading
+import time
+from core.array_cache import content_key
+from core.text import normalize_command
+from core.utils import logger, load_config
+
+
+class PlanCache:
+    """
+    Caches validated plans so repeated voice commands skip the LLM.
+
+    The exact tier is an in-memory LRU keyed by the normalized command. The
+    semantic tier stores each command's embedding in a `core.memory.Memory`
+    collection (cosine space) and serves a near-duplicate command when its
+    similarity reaches `threshold`; it is only active when both a memory and an
+    `embed` callable are given. Entries in both tiers expire after `ttl_s`.
+    """
+    def __init__(self, config: Optional[Dict[str, Any]] = None, memory: Any = None,
+                 embed: Optional[Callable[[str], List[float]]] = None) -> None:
+        config = config if config is not None else load_config()
+        cache_config = config.get('plan_cache', {})
+        semantic_config = cache_config.get('semantic', {})
+        self.max_items: int = cache_config.get('max_items', 256)
+        self.ttl_s: Optional[float] = cache_config.get('ttl_s', 86400.0)
+        self.threshold: float = semantic_config.get('threshold', 0.92)
+        self.memory = memory
+        self.embed = embed
+        self._exact: 'OrderedDict[str, Tuple[Dict[str, Any], float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any],
+                    embed: Optional[Callable[[str], List[float]]] = None) -> 'PlanCache':
+        """
+        Builds the cache, opening the semantic tier's collection when enabled and an embedder is given.
+        """
+        semantic_config = config.get('plan_cache', {}).get('semantic', {})
+        memory = None
+        if embed is not None and semantic_config.get('enabled', True):
+            try:
+                from core.memory import Memory
+                memory = Memory(semantic_config.get('collection', 'plan_cache'), metadata={'hnsw:space': 'cosine'})
+            except Exception as e:
+                logger.warning(f"Semantic plan cache disabled: {e}")
+        return cls(config, memory=memory, embed=embed if memory is not None else None)
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.memory is not None and self.embed is not None
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters per tier and the exact tier's size.
+        """
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            'exact_hits': self.exact_hits,
+            'semantic_hits': self.semantic_hits,
+            'misses': self.misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'exact_items': len(self._exact),
+            'semantic_enabled': self.semantic_enabled,
+        }
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_s is not None and time.time() - stored_at > self.ttl_s
+
+    def _remember(self, key: str, plan: Dict[str, Any], stored_at: float) -> None:
+        self._exact[key] = (plan, stored_at)
+        self._exact.move_to_end(key)
+        while len(self._exact) > self.max_items:
+            self._exact.popitem(last=False)
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a copy of the cached plan for a command (or a near-duplicate of it), or None.
+
+        The semantic tier embeds the text and queries the vector store, so call
+        this off the event loop when it is enabled.
+        """
+        key = normalize_command(text)
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is not None:
+                if not self._expired(entry[1]):
+                    self._exact.move_to_end(key)
+                    self.exact_hits += 1
+                    return copy.deepcopy(entry[0])
+                del self._exact[key]
+        plan = self._semantic_get(key) if self.semantic_enabled else None
+        with self._lock:
+            if plan is None:
+                self.misses += 1
+            else:
+                self.semantic_hits += 1
+        return plan
+
+    def _semantic_get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            matches = self.memory.query_scored(self.embed(key), n_results=1)
+        except Exception as e:
+            logger.warning(f"Semantic plan cache lookup failed: {e}")
+            return None
+        if not matches:
+            return None
+        doc_id, metadata, distance = matches[0]
+        similarity = 1.0 - distance
+        if similarity < self.threshold:
+            return None
+        if self._expired(metadata.get('stored_at', 0.0)):
+            self.memory.delete(ids=[doc_id])
+            return None
+        logger.info(f"Semantic plan cache hit: '{key}' ~ '{metadata.get('text')}' ({similarity:.3f})")
+        plan = json.loads(metadata['plan'])
+        with self._lock:
+            self._remember(key, copy.deepcopy(plan), metadata.get('stored_at', time.time()))
+        return plan
+
+    def put(self, text: str, plan: Dict[str, Any]) -> None:
+        """
+        Stores a validated plan for a command in both tiers.
+        """
+        key = normalize_command(text)
+        stored_at = time.time()
+        with self._lock:
+            self._remember(key, copy.deepcopy(plan), stored_at)
+        if self.semantic_enabled:
+            try:
+                metadata = {'kind': 'plan', 'text': key, 'plan': json.dumps(plan), 'stored_at': stored_at}
+                self.memory.ingest(self.embed(key), metadata, doc_id=content_key('plan', key))
+            except Exception as e:
+                logger.warning(f"Semantic plan cache store failed: {e}")
+
+    def invalidate(self, text: Optional[str] = None) -> None:
+        """
+        Forgets one command's plan, or every cached plan when `text` is None.
+        """
+        key = normalize_command(text) if text is not None else None
+        with self._lock:
+            if key is None:
+                self._exact.clear()
+            else:
+                self._exact.pop(key, None)
+        if self.memory is not None:
+            if key is None:
+                self.memory.delete(where={'kind': 'plan'})
+            else:
+                self.memory.delete(ids=[content_key('plan', key)])
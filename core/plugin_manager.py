@@ -1,27 +1,149 @@
 """
 Plugin manager module for skill discovery and loading.
 """
-from typing import List, Any
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import ast
+import hashlib
+import json
 import os
+import threading
 import importlib.util
+from core.intent_router import Intent, IntentRouter
 from core.utils import logger, load_config
 
+DEFAULT_SKILLS_DIR = os.path.join(os.path.dirname(__file__), 'skills')
+
+
+def scan_skill(path: str) -> Dict[str, Any]:
+    """
+    Builds a skill's manifest entry by parsing its source, without importing it.
+
+    Args:
+        path (str): Path to the skill module.
+
+    Returns:
+        Dict[str, Any]: name, path, mtime_ns, size, sha256, triggers, and whether
+            `TRIGGERS` is a literal and `run` / `can_handle` are defined.
+    """
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        source = f.read()
+    entry: Dict[str, Any] = {
+        'name': os.path.basename(path)[:-3],
+        'path': path,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': hashlib.sha256(source).hexdigest(),
+        'triggers': [],
+        'static_triggers': True,
+        'has_run': False,
+        'has_can_handle': False,
+    }
+    for node in ast.parse(source, filename=path).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            names, value = [node.name], None
+        elif isinstance(node, ast.Assign):
+            names, value = [t.id for t in node.targets if isinstance(t, ast.Name)], node.value
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            names, value = [node.target.id], node.value
+        else:
+            continue
+        entry['has_run'] = entry['has_run'] or 'run' in names
+        entry['has_can_handle'] = entry['has_can_handle'] or 'can_handle' in names
+        if 'TRIGGERS' in names and value is not None:
+            try:
+                entry['triggers'] = [str(t) for t in ast.literal_eval(value)]
+                entry['static_triggers'] = True
+            except ValueError:
+                entry['static_triggers'] = False
+    return entry
+
+
+class LazySkill:
+    """
+    Stand-in for a skill module that imports it on first use.
+
+    Its name and triggers come from the manifest, so routing never imports a
+    skill; `run` and `can_handle` import the module the first time they are used.
+    """
+    def __init__(self, entry: Dict[str, Any]) -> None:
+        self.entry = entry
+        self.__name__: str = entry['name']
+        self.TRIGGERS: List[str] = entry['triggers']
+        self._module: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    @property
+    def module(self) -> Any:
+        """
+        The imported skill module.
+        """
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    spec = importlib.util.spec_from_file_location(self.__name__, self.entry['path'])
+                    if spec is None or spec.loader is None:
+                        raise ImportError(f"Cannot load skill from {self.entry['path']}")
+                    module = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(module)
+                    self._module = module
+                    logger.info(f"Loaded skill: {self.__name__}")
+        return self._module
+
+    @property
+    def has_can_handle(self) -> bool:
+        return self.entry['has_can_handle']
+
+    @property
+    def can_handle(self) -> Optional[Callable[[str], bool]]:
+        return self.module.can_handle if self.entry['has_can_handle'] else None
+
+    def run(self, text: str, slots: Dict[str, str]) -> Any:
+        return self.module.run(text, slots)
+
+
 class PluginManager:
     """
-    Discovers and loads skills from services/skills.
+    Discovers and loads skills from `skills.dir` (default: core/skills).
+
+    A skill module defines `run(text, slots) -> plan` and declares when it
+    applies with a `TRIGGERS` list of phrases (which may contain `{slot}`
+    placeholders) and/or a `can_handle(text)` predicate. Triggers are compiled
+    into an `IntentRouter` so transcripts are routed without calling the LLM.
+
+    Skills are indexed from a manifest persisted at `skills.manifest_path`:
+    entries whose file mtime and size are unchanged are reused as is, and
+    changed files are re-parsed with `ast`, so startup imports nothing. A skill
+    is imported the first time it runs (or when its `TRIGGERS` is not a literal).
+    `refresh` (polled by `start_watching`) reloads only the skills whose content
+    changed.
     """
-    def __init__(self) -> None:
-        self.config = load_config()
-        self.skills_dir = os.path.join(os.path.dirname(__file__), 'skills')
+    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        self.config = config if config is not None else load_config()
+        skills_config = self.config.get('skills', {})
+        self.skills_dir: str = skills_config.get('dir') or DEFAULT_SKILLS_DIR
+        self.manifest_path: Optional[str] = skills_config.get('manifest_path', './data/skills_manifest.json')
+        self.reload_interval_s: float = skills_config.get('reload_interval_s', 2.0)
         self.skills: List[Any] = []
+        self.router = IntentRouter()
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        self._by_name: Dict[str, LazySkill] = {}
+        self._refresh_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
 
     def discover_skills(self) -> List[str]:
         """
         Discovers available skill modules.
         """
         try:
-            skills = [f[:-3] for f in os.listdir(self.skills_dir) if f.endswith('.py') and not f.startswith('_')]
-            logger.info(f"Discovered skills: {skills}")
+            skills = sorted(f[:-3] for f in os.listdir(self.skills_dir) if f.endswith('.py') and not f.startswith('_'))
+            logger.debug(f"Discovered skills: {skills}")
             return skills
         except Exception as e:
             logger.error(f"Skill discovery failed: {e}")
@@ -29,17 +151,181 @@ class PluginManager:
 
     def load_skills(self) -> None:
         """
-        Loads and validates skill modules.
+        Indexes skills from the persisted manifest, re-parsing only files that changed.
         """
-        self.skills = []
-        for skill_name in self.discover_skills():
+        self.manifest = self._read_manifest()
+        self._by_name = {}
+        self.refresh(force=True)
+        logger.info(f"Indexed {len(self.skills)} skills, {self.router.size} triggers.")
+
+    def refresh(self, force: bool = False) -> List[str]:
+        """
+        Rescans the skills directory and reloads skills whose content changed.
+
+        Changed skills are re-indexed and their modules dropped, so the next
+        invocation imports the new code; unchanged skills keep their modules.
+
+        Args:
+            force (bool): Rebuild the index even if nothing changed.
+
+        Returns:
+            List[str]: Names of added, modified or removed skills.
+        """
+        with self._refresh_lock:
+            entries: Dict[str, Dict[str, Any]] = {}
+            changed: List[str] = []
+            for name in self.discover_skills():
+                path = os.path.join(self.skills_dir, f"{name}.py")
+                previous = self.manifest.get(name)
+                try:
+                    stat = os.stat(path)
+                    if (previous is not None and previous['path'] == path and previous['mtime_ns'] == stat.st_mtime_ns
+                            and previous['size'] == stat.st_size):
+                        entries[name] = previous
+                        continue
+                    entry = scan_skill(path)
+                except Exception as e:
+                    logger.error(f"Failed to index skill {name}: {e}")
+                    continue
+                if previous is None or previous['sha256'] != entry['sha256']:
+                    changed.append(name)
+                entries[name] = entry
+            changed.extend(sorted(set(self.manifest) - set(entries)))
+            if entries != self.manifest:
+                self.manifest = entries
+                self._write_manifest()
+            if changed or force:
+                self._rebuild(changed)
+            return changed
+
+    def _rebuild(self, changed: List[str]) -> None:
+        by_name: Dict[str, LazySkill] = {}
+        for name, entry in self.manifest.items():
+            if not entry['has_run']:
+                if name in changed or name not in self._by_name:
+                    logger.error(f"Skill {name} has no run() function; skipped.")
+                continue
+            skill = self._by_name.get(name)
+            if skill is None or name in changed:
+                skill = LazySkill(entry)
+                if not entry['static_triggers']:
+                    try:
+                        skill.TRIGGERS = list(getattr(skill.module, 'TRIGGERS', []))
+                    except Exception as e:
+                        logger.error(f"Failed to load skill {name}: {e}")
+                        continue
+            by_name[name] = skill
+        self._by_name = by_name
+        self.skills = list(by_name.values())
+        self.router = IntentRouter.from_skills(self.skills)
+        if changed:
+            logger.info(f"Skills reindexed ({', '.join(changed)}); {self.router.size} triggers.")
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('skills_dir') != os.path.abspath(self.skills_dir):
+                return {}
+            return manifest.get('skills', {})
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable skills manifest {self.manifest_path}: {e}")
+            return {}
+
+    def _write_manifest(self) -> None:
+        if not self.manifest_path:
+            return
+        tmp_path = f"{self.manifest_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'skills_dir': os.path.abspath(self.skills_dir), 'skills': self.manifest}, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except Exception as e:
+            logger.error(f"Failed to write skills manifest {self.manifest_path}: {e}")
+
+    def start_watching(self, interval_s: Optional[float] = None) -> None:
+        """
+        Polls the skills directory in a daemon thread and hot-reloads changed skills.
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        interval = interval_s if interval_s is not None else self.reload_interval_s
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name='skill-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """
+        Stops the hot-reload thread.
+        """
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval_s: float) -> None:
+        while not self._stop_watching.wait(interval_s):
             try:
-                skill_path = os.path.join(self.skills_dir, f"{skill_name}.py")
-                spec = importlib.util.spec_from_file_location(skill_name, skill_path)
-                if spec and spec.loader:
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    self.skills.append(module)
-                    logger.info(f"Loaded skill: {skill_name}")
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Skill hot reload failed: {e}")
+
+    def route(self, text: str) -> Optional[Intent]:
+        """
+        Matches a transcript to a skill: trigger index first, then `can_handle` predicates in load order.
+
+        Args:
+            text (str): The transcript.
+
+        Returns:
+            Optional[Intent]: The routed intent, or None if the LLM should plan it.
+        """
+        intent = self.router.route(text)
+        if intent is not None:
+            return intent
+        return self._route_predicates(text)
+
+    async def route_async(self, text: str) -> Optional[Intent]:
+        """
+        `route` for the event loop.
+
+        Trigger hits are answered inline. On a miss, the `can_handle` predicates
+        (which import their skills on first use) run in a worker thread, and only
+        when some skill declares one.
+        """
+        intent = self.router.route(text)
+        if intent is not None or not any(self._declares_can_handle(skill) for skill in self.skills):
+            return intent
+        return await asyncio.to_thread(self._route_predicates, text)
+
+    @staticmethod
+    def _declares_can_handle(skill: Any) -> bool:
+        if isinstance(skill, LazySkill):
+            return skill.has_can_handle
+        return getattr(skill, 'can_handle', None) is not None
+
+    def _route_predicates(self, text: str) -> Optional[Intent]:
+        for skill in self.skills:
+            try:
+                can_handle = getattr(skill, 'can_handle', None)
+                if can_handle is not None and can_handle(text):
+                    return Intent(skill, '')
             except Exception as e:
-                logger.error(f"Failed to load skill {skill_name}: {e}") 
\ No newline at end of file
+                logger.error(f"can_handle failed in skill {skill.__name__}: {e}")
+        return None
+
+    async def run(self, intent: Intent, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Runs the routed skill (sync or async `run`) and returns its plan, or None on failure.
+        """
+        try:
+            result = intent.skill.run(text, intent.slots)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
+        except Exception as e:
+            logger.error(f"Skill {intent.skill.__name__} failed: {e}")
+            return None
@@ -0,0 +1,42 @@
+"""
+Clock skill: answers time and date questions locally.
+"""
+from typing import Any, Dict
+from datetime import datetime
+
+TRIGGERS = [
+    "what time is it",
+    "what's the time",
+    "tell me the time",
+    "what's the date",
+    "what day is it",
+    "what's today's date",
+    "what time is it in {place}",
+]
+
+
+def can_handle(text: str) -> bool:
+    """
+    Fallback check used when no trigger matched verbatim.
+    """
+    lowered = text.lower().rstrip('?.! ')
+    return lowered.endswith(('the time', 'time is it', 'the time please'))
+
+
+def run(text: str, slots: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Returns a plan with no steps whose response states the local time or date.
+
+    Args:
+        text (str): The transcript.
+        slots (Dict[str, str]): Captured trigger slots (`place` is not supported yet).
+
+    Returns:
+        Dict[str, Any]: Plan in the orchestrator's format.
+    """
+    now = datetime.now()
+    if 'place' in slots:
+        return {'steps': [], 'response': f"I only know the local time. It's {now:%H:%M}."}
+    if 'date' in text.lower() or 'day' in text.lower():
+        return {'steps': [], 'response': f"Today is {now:%A, %B} {now.day}."}
+    return {'steps': [], 'response': f"It's {now:%H:%M}."}
@@ -1,24 +1,81 @@
 """
-STT module for speech-to-text using Whisper.
+STT module for speech-to-text using a configurable backend (Whisper by default).
 """
-from typing import Tuple, List, Union, Callback, Optional
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional
+from dataclasses import dataclass
+import asyncio
+import re
 import numpy as np
-import whisper
-from services.utils import logger, load_config
+from core.stt_backends import create_backend
+from core.tracing import traced
+from core.utils import logger, load_config, subscribe_config
+
+
+@dataclass
+class Hypothesis:
+    """
+    A streaming transcription result.
+
+    Attributes:
+        text (str): Best current transcript (stable prefix plus tentative tail).
+        stable (str): Prefix that will not change anymore.
+        is_final (bool): True once the audio stream has ended.
+    """
+    text: str
+    stable: str
+    is_final: bool = False
+
+
+def _word_key(word: str) -> str:
+    return re.sub(r"[^\w']", '', word.lower())
+
+
+def agreed_prefix(previous: List[str], current: List[str]) -> List[str]:
+    """
+    Longest common word prefix of two hypotheses, ignoring case and punctuation.
+    """
+    n = 0
+    for a, b in zip(previous, current):
+        if _word_key(a) != _word_key(b):
+            break
+        n += 1
+    return current[:n]
+
 
 class SpeechToText:
     """
-    Wraps Whisper to transcribe audio numpy arrays to text.
+    Transcribes audio numpy arrays to text with the backend selected by `stt.backend`.
     """
     def __init__(self) -> None:
         self.config = load_config()
         self.model_name: str = self.config.get('stt', {}).get('model', 'base')
+        self.stream_step_s: float = self.config.get('stt', {}).get('stream_step_s', 1.0)
+        self.stream_max_window_s: float = self.config.get('stt', {}).get('stream_max_window_s', 25.0)
+        self.backend = create_backend(self.config)
+        subscribe_config(self.apply_config, 'stt')
+
+    def apply_config(self, stt_config: Dict[str, Any]) -> None:
+        """
+        Applies a reloaded `stt` section. The backend is rebuilt with the new
+        model and device and loads on its next transcription (or `preload`).
+        """
+        self.stream_step_s = stt_config.get('stream_step_s', 1.0)
+        self.stream_max_window_s = stt_config.get('stream_max_window_s', 25.0)
+        self.model_name = stt_config.get('model', 'base')
+        self.backend = create_backend({'stt': stt_config})
+        logger.info(f"STT switched to {self.backend.name} ({self.model_name}).")
+
+    def preload(self) -> None:
+        """
+        Loads and warms up the model now instead of on the first transcription.
+        """
         try:
-            self.model = whisper.load_model(self.model_name)
+            self.backend.load()
         except Exception as e:
-            logger.error(f"Failed to load Whisper model: {e}")
+            logger.error(f"Failed to load STT model: {e}")
             raise
 
+    @traced('stt.transcribe')
     def transcribe(self, audio: np.ndarray, samplerate: int = 16000) -> Optional[str]:
         """
         Transcribes the given audio numpy array to text.
@@ -31,9 +88,81 @@ class SpeechToText:
             Optional[str]: Transcribed text, or None if failed.
         """
         try:
-            logger.info("Transcribing audio with Whisper...")
-            result = self.model.transcribe(audio, fp16=False, language='en', task='transcribe', sampling_rate=samplerate)
-            return result.get('text', '').strip()
+            logger.info(f"Transcribing audio with {self.backend.name}...")
+            return self.backend.transcribe(audio, samplerate)
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+    async def transcribe_stream(self, frames: AsyncIterable[np.ndarray], samplerate: int = 16000) -> AsyncIterator[Hypothesis]:
+        """
+        Transcribes audio while it is still being captured.
+
+        The growing window is re-decoded every `stt.stream_step_s` seconds of new audio
+        in a worker thread, without pausing frame consumption. Words on which two
+        consecutive decodes agree are committed (local agreement), so `stable` only
+        grows across partials; the final hypothesis comes from a full decode.
+        Windows longer than `stt.stream_max_window_s` are closed and a new one is started.
+
+        Args:
+            frames (AsyncIterable[np.ndarray]): Mono float32 frames, e.g. from `Listener.stream_frames`.
+            samplerate (int): Sample rate of the audio.
+
+        Yields:
+            Hypothesis: Partial hypotheses, then exactly one final hypothesis.
+        """
+        step = int(self.stream_step_s * samplerate)
+        max_window = int(self.stream_max_window_s * samplerate)
+        closed: List[str] = []  # words from windows that were already closed
+        chunks: List[np.ndarray] = []
+        window_samples = 0
+        pending = 0
+        previous: List[str] = []
+        committed: List[str] = []
+        decoding: Optional[asyncio.Task] = None
+        decoding_samples = 0  # window size the running decode started with
+
+        def hypothesis(words: List[str], is_final: bool = False) -> Hypothesis:
+            stable = closed + (words if is_final else committed)
+            return Hypothesis(text=' '.join(closed + words), stable=' '.join(stable), is_final=is_final)
+
+        def agree(text: Optional[str]) -> List[str]:
+            nonlocal previous, committed
+            words = (text or '').split()
+            prefix = agreed_prefix(previous, words)
+            if len(prefix) > len(committed):
+                committed = prefix
+            previous = words
+            return committed + words[len(committed):]
+
+        async for frame in frames:
+            chunks.append(frame)
+            window_samples += len(frame)
+            pending += len(frame)
+            if decoding is not None and decoding.done():
+                words = agree(decoding.result())
+                decoding = None
+                yield hypothesis(words)
+            if window_samples >= max_window:
+                if decoding is not None:
+                    await decoding
+                    decoding = None
+                text = await asyncio.to_thread(self.transcribe, np.concatenate(chunks), samplerate)
+                closed += (text or '').split()
+                chunks, window_samples, pending = [], 0, 0
+                previous, committed = [], []
+                yield hypothesis([])
+            elif decoding is None and pending >= step:
+                pending = 0
+                decoding_samples = window_samples
+                decoding = asyncio.create_task(asyncio.to_thread(self.transcribe, np.concatenate(chunks), samplerate))
+        words = []
+        if decoding is not None and decoding_samples == window_samples:
+            # The decode in flight already covers the whole window.
+            words = ((await decoding) or '').split()
+        elif chunks:
+            if decoding is not None:
+                await decoding
+            text = await asyncio.to_thread(self.transcribe, np.concatenate(chunks), samplerate)
+            words = (text or '').split()
+        yield hypothesis(words, is_final=True)
@@ -0,0 +1,149 @@
+"""
+STT backends module: pluggable speech-to-text engines selected from config.
+"""
+from typing import Any, Callable, Dict, Type
+from abc import ABC, abstractmethod
+import json
+import numpy as np
+from core.audio import resample
+from core.model_cache import ModelKey, get_model_registry
+from core.utils import logger
+
+STT_BACKENDS: Dict[str, Type['STTBackend']] = {}
+
+
+def register_backend(name: str) -> Callable[[Type['STTBackend']], Type['STTBackend']]:
+    """
+    Class decorator adding an STT backend to the registry under `name`.
+    """
+    def decorator(cls: Type['STTBackend']) -> Type['STTBackend']:
+        cls.name = name
+        STT_BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+class STTBackend(ABC):
+    """
+    Base class for speech-to-text engines.
+
+    Subclasses build their model in `_load_model` and decode in `_transcribe`;
+    engine packages are imported inside `_load_model` so unused engines cost
+    nothing. Models live in the shared model registry and are loaded on first use.
+    """
+    name = 'base'
+    samplerate = 16000
+
+    def __init__(self, stt_config: Dict[str, Any]) -> None:
+        self.stt_config = stt_config
+        self.model_name: str = stt_config.get('model', 'base')
+        self.device: str = stt_config.get('device', 'cpu')
+        self.compute_type: str = stt_config.get('compute_type', 'int8')
+        self.language: str = stt_config.get('language', 'en')
+        self.warm_up_on_load: bool = stt_config.get('warm_up', True)
+
+    @property
+    def cache_key(self) -> ModelKey:
+        return (self.name, self.model_name, self.device, self.compute_type)
+
+    @property
+    def model(self) -> Any:
+        """
+        The shared model instance, loaded (and warmed up) on first access.
+        """
+        warm_up = self.warm_up if self.warm_up_on_load else None
+        return get_model_registry().get(self.cache_key, self._load_model, warm_up)
+
+    def load(self) -> None:
+        """
+        Loads the model ahead of its first use.
+        """
+        self.model
+
+    @abstractmethod
+    def _load_model(self) -> Any:
+        """
+        Imports the engine and builds the model.
+        """
+
+    @abstractmethod
+    def _transcribe(self, model: Any, audio: np.ndarray, samplerate: int) -> str:
+        """
+        Decodes a mono float32 waveform with `model`.
+        """
+
+    def transcribe(self, audio: np.ndarray, samplerate: int = 16000) -> str:
+        """
+        Transcribes a mono float32 waveform; raises on failure.
+        """
+        return self._transcribe(self.model, audio, samplerate)
+
+    def warm_up(self, model: Any) -> None:
+        """
+        Runs one dummy decode so the first real request does not pay for lazy initialization.
+        """
+        try:
+            self._transcribe(model, np.zeros(self.samplerate // 2, dtype=np.float32), self.samplerate)
+            logger.info(f"STT backend {self.name} warmed up.")
+        except Exception as e:
+            logger.warning(f"STT warm-up failed for {self.name}: {e}")
+
+
+@register_backend('whisper')
+class WhisperBackend(STTBackend):
+    """
+    Reference OpenAI Whisper engine (PyTorch; fp32 on CPU).
+    """
+    def _load_model(self) -> Any:
+        import whisper
+        return whisper.load_model(self.model_name, device=self.device)
+
+    def _transcribe(self, model: Any, audio: np.ndarray, samplerate: int) -> str:
+        audio = resample(audio, samplerate, self.samplerate)
+        result = model.transcribe(audio, fp16=self.device != 'cpu', language=self.language, task='transcribe')
+        return result.get('text', '').strip()
+
+
+@register_backend('faster-whisper')
+class FasterWhisperBackend(STTBackend):
+    """
+    CTranslate2 Whisper engine; `compute_type: int8` quantizes weights for fast CPU inference.
+    """
+    def _load_model(self) -> Any:
+        from faster_whisper import WhisperModel
+        return WhisperModel(self.model_name, device=self.device, compute_type=self.compute_type,
+                            cpu_threads=self.stt_config.get('cpu_threads', 0))
+
+    def _transcribe(self, model: Any, audio: np.ndarray, samplerate: int) -> str:
+        audio = resample(audio, samplerate, self.samplerate)
+        segments, _ = model.transcribe(audio, language=self.language,
+                                       beam_size=self.stt_config.get('beam_size', 1))
+        return ''.join(segment.text for segment in segments).strip()
+
+
+@register_backend('vosk')
+class VoskBackend(STTBackend):
+    """
+    Kaldi-based Vosk engine for low-memory devices; `vosk_model_path` points at an unpacked model.
+    """
+    def _load_model(self) -> Any:
+        from vosk import Model
+        return Model(self.stt_config.get('vosk_model_path', self.model_name))
+
+    def _transcribe(self, model: Any, audio: np.ndarray, samplerate: int) -> str:
+        from vosk import KaldiRecognizer
+        recognizer = KaldiRecognizer(model, samplerate)
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2')
+        recognizer.AcceptWaveform(pcm.tobytes())
+        return json.loads(recognizer.FinalResult()).get('text', '').strip()
+
+
+def create_backend(config: Dict[str, Any]) -> STTBackend:
+    """
+    Instantiates the backend named by `stt.backend` (default: whisper).
+    """
+    stt_config = config.get('stt', {})
+    name = stt_config.get('backend', 'whisper')
+    if name not in STT_BACKENDS:
+        raise ValueError(f"Unknown STT backend '{name}'. Available: {sorted(STT_BACKENDS)}")
+    return STT_BACKENDS[name](stt_config)
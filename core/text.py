@@ -0,0 +1,26 @@
+"""
+Text module: normalization shared by the intent router, plan cache and conversation context.
+"""
+import re
+
+_NON_WORD = re.compile(r"[^\w\s']+")
+_SPACES = re.compile(r'\s+')
+# Words that point back at earlier turns ("do that again", "turn it off", "same as before").
+_BACK_REFERENCE = re.compile(r"\b(?:it|its|that|this|those|these|them|they|again|same|previous|last|another|"
+                             r"instead|too|also|else|before|earlier)\b")
+
+
+def normalize_command(text: str) -> str:
+    """
+    Lowercases, drops punctuation and collapses whitespace: "Open the browser!" -> "open the browser".
+    """
+    return _SPACES.sub(' ', _NON_WORD.sub(' ', text.lower())).strip()
+
+
+def refers_back(text: str) -> bool:
+    """
+    Whether a command points back at earlier turns ("do that again", "turn it off"), so its meaning depends on them.
+
+    Errs on the side of True: "make sure that ..." counts too.
+    """
+    return bool(_BACK_REFERENCE.search(normalize_command(text)))
@@ -0,0 +1,283 @@
+"""
+Tracing module: per-stage latency spans, quantile histograms and a Prometheus text surface.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+import numpy as np
+from core.utils import logger, load_config
+
+_trace_id: ContextVar[Optional[str]] = ContextVar('trace_id', default=None)
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace_id() -> Optional[str]:
+    """
+    The trace id of the current turn or request, if any.
+    """
+    return _trace_id.get()
+
+
+@contextmanager
+def trace(trace_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Tags every span opened inside the block (and tasks started from it) with one trace id.
+
+    Args:
+        trace_id (Optional[str]): Id to use, e.g. from an X-Trace-Id header; a new one by default.
+
+    Yields:
+        str: The trace id.
+    """
+    token = _trace_id.set(trace_id or new_trace_id())
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
+
+
+@dataclass
+class Span:
+    """
+    One timed operation. `start` is a monotonic timestamp, not wall-clock time.
+    """
+    name: str
+    trace_id: Optional[str]
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    duration_s: Optional[float] = None
+    error: Optional[str] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': round(self.start, 6),
+            'duration_ms': round(1000 * self.duration_s, 3) if self.duration_s is not None else None,
+            'error': self.error,
+            'attrs': self.attrs,
+        }
+
+
+class LatencyHistogram:
+    """
+    Count and sum of every observation, plus the latest `window` samples for quantiles.
+    """
+    def __init__(self, window: int = 1024) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.samples: deque = deque(maxlen=window)
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        self.count += 1
+        self.total += seconds
+        self.errors += int(error)
+        self.samples.append(seconds)
+
+    def quantiles(self, qs: List[float]) -> Dict[float, float]:
+        if not self.samples:
+            return {q: 0.0 for q in qs}
+        values = np.quantile(np.fromiter(self.samples, dtype=np.float64), qs)
+        return {q: float(v) for q, v in zip(qs, values)}
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Tracer:
+    """
+    Records spans into per-name latency histograms and, optionally, a JSON-lines file.
+
+    Spans nest through a context variable, so a span opened while another is
+    active becomes its child, including across `await` and `asyncio.to_thread`.
+    Histograms keep exact counts and sums and estimate p50/p95/p99 (or
+    `tracing.quantiles`) over the latest `tracing.window` samples. With
+    `tracing.dump_path` set, every finished span is appended there as one JSON line.
+    """
+    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        config = config if config is not None else load_config()
+        tracing_config = config.get('tracing', {})
+        self.enabled: bool = tracing_config.get('enabled', True)
+        self.window: int = tracing_config.get('window', 1024)
+        self.quantiles: List[float] = tracing_config.get('quantiles', [0.5, 0.95, 0.99])
+        self.namespace: str = tracing_config.get('namespace', 'jarl')
+        self.dump_path: Optional[str] = tracing_config.get('dump_path')
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._dump: Optional[TextIO] = None
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        """
+        Times the block as a span named `name`; attributes can be added to the yielded span.
+
+        Exceptions are recorded on the span and re-raised.
+        """
+        parent = _current_span.get()
+        span = Span(name, _trace_id.get(), uuid.uuid4().hex[:16], parent.span_id if parent else None,
+                    time.monotonic(), attrs=attrs)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration_s = time.monotonic() - span.start
+            self.record(span)
+
+    def traced(self, name: Optional[str] = None) -> Callable:
+        """
+        Decorator form of `span` for functions and coroutine functions.
+        """
+        return traced(name, tracer=self)
+
+    def record(self, span: Span) -> None:
+        """
+        Adds a finished span to its histogram and the trace dump.
+        """
+        if not self.enabled or span.duration_s is None:
+            return
+        with self._lock:
+            self._histogram(span.name).observe(span.duration_s, span.error is not None)
+            if self.dump_path:
+                self._write(span)
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Records a latency measured elsewhere (e.g. time to first audio).
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._histogram(name).observe(seconds)
+
+    def _histogram(self, name: str) -> LatencyHistogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram(self.window)
+        return histogram
+
+    def _write(self, span: Span) -> None:
+        try:
+            if self._dump is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.dump_path)), exist_ok=True)
+                self._dump = open(self.dump_path, 'a', encoding='utf-8', buffering=1)
+            self._dump.write(json.dumps(span.to_dict(), default=str) + '\n')
+        except Exception as e:
+            logger.warning(f"Trace dump disabled: {e}")
+            self.dump_path = None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-span count, errors, mean and quantiles in milliseconds.
+        """
+        with self._lock:
+            items = [(name, h.count, h.errors, h.total, h.quantiles(self.quantiles))
+                     for name, h in sorted(self.histograms.items())]
+        return {name: {'count': count, 'errors': errors,
+                       'mean_ms': round(1000 * total / count, 3) if count else 0.0,
+                       **{f"p{round(q * 100):g}_ms": round(1000 * v, 3) for q, v in quantiles.items()}}
+                for name, count, errors, total, quantiles in items}
+
+    def prometheus(self) -> str:
+        """
+        Renders the histograms in the Prometheus text exposition format (as summaries).
+        """
+        metric = f"{self.namespace}_span_duration_seconds"
+        errors = f"{self.namespace}_span_errors_total"
+        lines = [f"# HELP {metric} Latency of traced pipeline stages.", f"# TYPE {metric} summary"]
+        error_lines = [f"# HELP {errors} Traced operations that raised.", f"# TYPE {errors} counter"]
+        with self._lock:
+            for name, histogram in sorted(self.histograms.items()):
+                label = f'span="{_label(name)}"'
+                for q, v in histogram.quantiles(self.quantiles).items():
+                    lines.append(f'{metric}{{{label},quantile="{q:g}"}} {v:.6g}')
+                lines.append(f"{metric}_sum{{{label}}} {histogram.total:.6g}")
+                lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+                error_lines.append(f"{errors}{{{label}}} {histogram.errors}")
+        return '\n'.join(lines + error_lines) + '\n'
+
+    def reset(self) -> None:
+        """
+        Drops every histogram.
+        """
+        with self._lock:
+            self.histograms.clear()
+
+    def close(self) -> None:
+        """
+        Closes the trace dump.
+        """
+        with self._lock:
+            if self._dump is not None:
+                self._dump.close()
+                self._dump = None
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Returns the process-wide tracer, configured from the `tracing` section.
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+def span(name: str, **attrs: Any) -> Any:
+    """
+    `Tracer.span` on the process-wide tracer.
+    """
+    return get_tracer().span(name, **attrs)
+
+
+def traced(name: Optional[str] = None, tracer: Optional[Tracer] = None) -> Callable:
+    """
+    Decorator that records every call of a function or coroutine function as a span.
+
+    Args:
+        name (Optional[str]): Span name; defaults to the function's qualified name.
+        tracer (Optional[Tracer]): Tracer to record into; the process-wide one by default.
+    """
+    def decorate(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with (tracer or get_tracer()).span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with (tracer or get_tracer()).span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
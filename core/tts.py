@@ -1,10 +1,94 @@
 """
 TTS module for text-to-speech synthesis.
 """
-from typing import Optional
-from TTS.api import TTS as CoquiTTS
-from services.utils import logger, load_config
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple, Union
 import asyncio
+import re
+import threading
+import time
+import numpy as np
+from core.array_cache import ArrayCache, content_key
+from core.model_cache import ModelKey, get_model_registry
+from core.tracing import get_tracer, traced
+from core.utils import logger, load_config, subscribe_config
+
+# Coqui's TTS.api pulls in torch, and sounddevice needs the PortAudio library;
+# both are imported on first use instead of with this module.
+CoquiTTS: Any = None
+sd: Any = None
+
+
+def _load_coqui() -> Any:
+    global CoquiTTS
+    if CoquiTTS is None:
+        from TTS.api import TTS as CoquiTTS
+    return CoquiTTS
+
+
+def _load_sounddevice() -> Any:
+    global sd
+    if sd is None:
+        import sounddevice as sd
+    return sd
+
+
+_SENTENCE_END = re.compile(r'(?<=[.!?;:])\s+|\n+')
+_CLAUSE_END = re.compile(r'(?<=[,])\s+')
+
+
+class SentenceChunker:
+    """
+    Incrementally cuts a token stream into sentences suitable for synthesis.
+
+    A chunk is emitted as soon as a sentence terminator followed by whitespace is
+    seen. Runs longer than `max_chars` without one are cut at the last comma, or
+    at the last space if there is none.
+    """
+    def __init__(self, max_chars: int = 200) -> None:
+        self.max_chars = max_chars
+        self._buffer = ''
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Adds text and returns the chunks it completed.
+        """
+        parts = _SENTENCE_END.split(self._buffer + text)
+        chunks: List[str] = []
+        for part in parts[:-1]:
+            head, rest = self._cut_long(part)
+            chunks += head + ([rest.strip()] if rest.strip() else [])
+        head, self._buffer = self._cut_long(parts[-1])
+        return chunks + head
+
+    def _cut_long(self, text: str) -> Tuple[List[str], str]:
+        chunks = []
+        while len(text) > self.max_chars:
+            window = text[:self.max_chars]
+            clauses = _CLAUSE_END.split(window)
+            cut = len(window) - len(clauses[-1]) if len(clauses) > 1 else window.rfind(' ') + 1
+            if cut <= 0:
+                cut = self.max_chars
+            chunks.append(text[:cut].strip())
+            text = text[cut:]
+        return chunks, text
+
+    def flush(self) -> Optional[str]:
+        """
+        Returns whatever text is left at the end of the stream.
+        """
+        rest, self._buffer = self._buffer.strip(), ''
+        return rest or None
+
+
+def split_sentences(text: str, max_chars: int = 200) -> List[str]:
+    """
+    Splits a complete text into synthesis chunks.
+    """
+    chunker = SentenceChunker(max_chars)
+    chunks = chunker.feed(text)
+    rest = chunker.flush()
+    return chunks + ([rest] if rest else [])
+
 
 class TextToSpeech:
     """
@@ -12,14 +96,59 @@ class TextToSpeech:
     """
     def __init__(self) -> None:
         self.config = load_config()
-        self.model_name: str = self.config.get('tts', {}).get('model', 'tts_models/en/ljspeech/tacotron2-DDC')
+        self.apply_config(self.config.get('tts', {}))
+        self.speaking = False
+        self.playback_level_db: Optional[float] = None  # level of the block being played, for echo suppression
+        self._stop = threading.Event()
+        self._block = 1
+        cache_config = self.config.get('tts', {}).get('cache', {})
+        self.cache: Optional[ArrayCache] = None
+        if cache_config.get('enabled', True):
+            try:
+                self.cache = ArrayCache(cache_config.get('dir', './data/tts_cache'),
+                                        max_bytes=int(cache_config.get('max_mb', 256) * 2**20),
+                                        memory_items=cache_config.get('memory_items', 64))
+            except Exception as e:
+                logger.error(f"Failed to open TTS cache, caching disabled: {e}")
+        subscribe_config(self.apply_config, 'tts')
+
+    def apply_config(self, tts_config: Dict[str, Any]) -> None:
+        """
+        Applies the `tts` section; called again whenever it changes on disk.
+
+        A new model or device takes effect from the next synthesis (cached
+        audio is keyed by model, so it is never reused across voices).
+        """
+        self.model_name: str = tts_config.get('model', 'tts_models/en/ljspeech/tacotron2-DDC')
+        self.device: str = tts_config.get('device', 'cpu')
+        self.max_chunk_chars: int = tts_config.get('max_chunk_chars', 200)
+        self.prefetch: int = tts_config.get('prefetch_chunks', 2)
+        self.voice: Dict[str, Any] = {k: v for k, v in tts_config.items()
+                                      if k in ('speaker', 'language', 'speed') and v is not None}
+        self.playback_block_ms: int = tts_config.get('playback_block_ms', 50)
+
+    @property
+    def cache_key(self) -> ModelKey:
+        return ('coqui', self.model_name, self.device, 'float32')
+
+    @property
+    def tts(self) -> Any:
+        """
+        The shared Coqui model, loaded from the model registry on first access.
+        """
+        return get_model_registry().get(self.cache_key, lambda: _load_coqui()(self.model_name, gpu=self.device != 'cpu'))
+
+    def preload(self) -> None:
+        """
+        Loads the model now instead of on the first synthesis.
+        """
         try:
-            self.tts = CoquiTTS(self.model_name)
+            self.tts
         except Exception as e:
             logger.error(f"Failed to load TTS model: {e}")
             raise
 
-    async def speak(self, text: str) -> Optional[bytes]:
+    async def speak(self, text: str) -> Optional[np.ndarray]:
         """
         Synthesizes speech from text and plays it.
 
@@ -27,13 +156,157 @@ class TextToSpeech:
             text (str): Text to synthesize.
 
         Returns:
-            Optional[bytes]: The raw audio data, or None if failed.
+            Optional[np.ndarray]: The audio waveform, or None if failed.
         """
         try:
             logger.info(f"Synthesizing speech for: {text}")
-            audio = await asyncio.to_thread(self.tts.tts, text)
-            await asyncio.to_thread(self.tts.play, audio)
+            # Cleared before synthesis, so a `stop()` during synthesis also skips playback.
+            self._stop.clear()
+            audio = await asyncio.to_thread(self.synthesize, text)
+            stream = await self._open_stream()
+            completed = False
+            try:
+                completed = await asyncio.to_thread(self._write_blocks, stream, audio)
+            finally:
+                self._close_stream(stream, interrupted=not completed)
             return audio
         except Exception as e:
             logger.error(f"TTS synthesis failed: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+    @property
+    def output_samplerate(self) -> int:
+        """
+        Sample rate of the synthesized audio.
+        """
+        synthesizer = getattr(self.tts, 'synthesizer', None)
+        rate = getattr(synthesizer, 'output_sample_rate', None)
+        return rate if isinstance(rate, int) else self.config.get('tts', {}).get('samplerate', 22050)
+
+    @traced('tts.synthesize')
+    def synthesize(self, text: str) -> np.ndarray:
+        """
+        Synthesizes one chunk of text to a float32 waveform (blocking).
+
+        Results are cached as int16 PCM keyed by model, normalized text and voice
+        parameters, so repeated phrases skip the model entirely.
+        """
+        key = content_key(self.model_name, ' '.join(text.split()), sorted(self.voice.items()))
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached.astype(np.float32) / 32767
+        audio = np.asarray(self.tts.tts(text, **self.voice), dtype=np.float32)
+        if self.cache is not None:
+            self.cache.put(key, (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16))
+        return audio
+
+    def stop(self) -> None:
+        """
+        Interrupts playback within one block; `speak`/`speak_stream` return early.
+        """
+        self._stop.set()
+
+    async def _open_stream(self) -> Any:
+        samplerate = await asyncio.to_thread(lambda: self.output_samplerate)
+        stream = _load_sounddevice().OutputStream(samplerate=samplerate, channels=1, dtype='float32')
+        stream.start()
+        self._block = max(int(samplerate * self.playback_block_ms / 1000), 1)
+        self.speaking = True
+        return stream
+
+    def _close_stream(self, stream: Any, interrupted: bool) -> None:
+        # A write loop still running in its worker thread exits at its next block.
+        self._stop.set()
+        if interrupted:
+            stream.abort()
+        else:
+            stream.stop()
+        stream.close()
+        self.speaking = False
+        self.playback_level_db = None
+
+    def _write_blocks(self, stream: Any, audio: np.ndarray) -> bool:
+        """
+        Writes audio in short blocks (blocking); returns False if stopped midway.
+        """
+        for start in range(0, len(audio), self._block):
+            if self._stop.is_set():
+                return False
+            chunk = audio[start:start + self._block]
+            self.playback_level_db = float(10 * np.log10(np.mean(chunk ** 2) + 1e-10))
+            stream.write(chunk.reshape(-1, 1))
+        return True
+
+    async def _chunks(self, text: Union[str, AsyncIterable[str]]) -> AsyncIterator[str]:
+        chunker = SentenceChunker(self.max_chunk_chars)
+        if isinstance(text, str):
+            for chunk in chunker.feed(text):
+                yield chunk
+        else:
+            async for token in text:
+                for chunk in chunker.feed(token):
+                    yield chunk
+        rest = chunker.flush()
+        if rest:
+            yield rest
+
+    @traced('tts.speak')
+    async def speak_stream(self, text: Union[str, AsyncIterable[str]]) -> Optional[np.ndarray]:
+        """
+        Speaks text sentence by sentence, starting playback after the first sentence.
+
+        Chunk N+1 is synthesized in a worker thread while chunk N is written to an
+        output stream that stays open for the whole reply. At most
+        `tts.prefetch_chunks` synthesized chunks wait for playback. Playback can
+        be interrupted with `stop()` or by cancelling the calling task, in which
+        case buffered audio is dropped immediately.
+
+        Args:
+            text (Union[str, AsyncIterable[str]]): Full text, or a stream of LLM tokens.
+
+        Returns:
+            Optional[np.ndarray]: Audio of every chunk that started playing, or None if failed.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch)
+        played: List[np.ndarray] = []
+        started = time.monotonic()
+
+        async def produce() -> None:
+            try:
+                async for chunk in self._chunks(text):
+                    logger.info(f"Synthesizing chunk: {chunk}")
+                    await queue.put(await asyncio.to_thread(self.synthesize, chunk))
+            except Exception:
+                await queue.put(None)
+                raise
+            await queue.put(None)
+
+        async def consume() -> bool:
+            stream = await self._open_stream()
+            completed = False
+            try:
+                while (audio := await queue.get()) is not None:
+                    if not played:
+                        get_tracer().observe('tts.first_audio', time.monotonic() - started)
+                    played.append(audio)
+                    if not await asyncio.to_thread(self._write_blocks, stream, audio):
+                        return False
+                completed = True
+                return True
+            finally:
+                self._close_stream(stream, interrupted=not completed)
+
+        self._stop.clear()
+        producer = asyncio.create_task(produce())
+        try:
+            if await consume():
+                await producer
+            else:
+                logger.info("Speech interrupted.")
+            return np.concatenate(played) if played else np.zeros(0, dtype=np.float32)
+        except Exception as e:
+            logger.error(f"Streaming TTS failed: {e}")
+            return None
+        finally:
+            producer.cancel()
@@ -1,8 +1,11 @@
 """
 Utils module: config loader, structured logger, JSON schema loader.
 """
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import logging
+import threading
+import time
+import weakref
 import yaml
 import os
 import json
@@ -19,18 +22,311 @@ if not logger.hasHandlers():
     logger.addHandler(handler)
 
 
+def _positive(value: Any) -> bool:
+    return value > 0
+
+
+def _one_of(*choices: Any) -> Callable[[Any], bool]:
+    return lambda value: value in choices
+
+
+def _fractions(values: Any) -> bool:
+    return all(isinstance(v, (int, float)) and 0 < v < 1 for v in values)
+
+
+_NUMBER = (int, float)
+_OPTIONAL_NUMBER = (int, float, type(None))
+_OPTIONAL_STR = (str, type(None))
+
+# Dotted key -> (accepted types, optional check). Keys absent from the file fall
+# back to each component's default; present keys must match.
+CONFIG_SCHEMA: Dict[str, Tuple[Tuple[type, ...], Optional[Callable[[Any], bool]]]] = {
+    'listener.samplerate': ((int,), _positive),
+    'listener.channels': ((int,), _positive),
+    'listener.duration': (_NUMBER, _positive),
+    'listener.frame_ms': ((int,), _one_of(10, 20, 30)),
+    'listener.buffer_seconds': (_NUMBER, _positive),
+    'vad.backend': ((str,), _one_of('energy', 'webrtc')),
+    'vad.energy_threshold_db': (_NUMBER, None),
+    'vad.hangover_ms': ((int,), _positive),
+    'wakeword.enabled': ((bool,), None),
+    'wakeword.sensitivity': (_NUMBER, lambda v: 0 <= v <= 1),
+    'stt.backend': ((str,), _one_of('whisper', 'faster-whisper', 'vosk')),
+    'stt.model': ((str,), None),
+    'stt.device': ((str,), None),
+    'tts.model': ((str,), None),
+    'tts.samplerate': ((int,), _positive),
+    'tts.max_chunk_chars': ((int,), _positive),
+    'pipeline.queue_size': ((int,), _positive),
+    'pipeline.workers': ((int,), _positive),
+    'pipeline.stt_executor': ((str,), _one_of('thread', 'process')),
+    'orchestrator.llm_url': ((str,), None),
+    'orchestrator.model': (_OPTIONAL_STR, None),
+    'orchestrator.timeout_s': (_NUMBER, _positive),
+    'orchestrator.retries': ((int,), lambda v: v >= 0),
+    'orchestrator.max_concurrency': ((int,), _positive),
+    'dispatcher.max_concurrency': ((int,), _positive),
+    'dispatcher.timeout_s': (_OPTIONAL_NUMBER, lambda v: v is None or v > 0),
+    'browser_agent.timeout': (_NUMBER, _positive),
+    'browser_agent.max_pages': ((int,), _positive),
+    'browser_agent.fetch_mode': ((str,), _one_of('auto', 'http', 'browser')),
+    'memory.backend': ((str,), _one_of('chroma', 'numpy')),
+    'memory.batch_size': ((int,), _positive),
+    'context.token_budget': ((int,), _positive),
+    'tracing.enabled': ((bool,), None),
+    'tracing.quantiles': ((list, tuple), _fractions),
+    'config.hot_reload': ((bool,), None),
+    'config.check_interval_s': (_NUMBER, lambda v: v >= 0),
+    'startup.warm_up': ((list, tuple), lambda v: set(v) <= {'stt', 'tts', 'embedder', 'browser'}),
+    'startup.workers': ((int,), _positive),
+}
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return Config(value)
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class Config(dict):
+    """
+    Read-only config mapping; nested sections are Configs and lists are tuples.
+
+    Works wherever a plain dict did (`config.get('stt', {}).get('model')`) and
+    also allows attribute access (`config.stt.model`).
+    """
+    def __init__(self, data: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__({key: _freeze(value) for key, value in (data or {}).items()})
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (Config, (dict(self),))
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("Config is read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only  # type: ignore[assignment]
+
+    def get_path(self, path: str, default: Any = None) -> Any:
+        """
+        Looks up a dotted key such as 'stt.model'.
+        """
+        node: Any = self
+        for part in path.split('.'):
+            if not isinstance(node, dict) or part not in node:
+                return default
+            node = node[part]
+        return node
+
+
+def validate_config(config: Dict[str, Any]) -> List[str]:
+    """
+    Checks a parsed config against `CONFIG_SCHEMA`.
+
+    Returns:
+        List[str]: One message per invalid section or key (empty if valid).
+    """
+    if not isinstance(config, dict):
+        return [f"config must be a mapping, got {type(config).__name__}"]
+    problems = [f"section '{name}' must be a mapping" for name, section in config.items()
+                if name in {key.split('.')[0] for key in CONFIG_SCHEMA} and not isinstance(section, dict)]
+    for path, (types, check) in CONFIG_SCHEMA.items():
+        section, key = path.split('.', 1)
+        if not isinstance(config.get(section), dict) or key not in config[section]:
+            continue
+        value = config[section][key]
+        if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+            problems.append(f"{path}: expected {'/'.join(t.__name__ for t in types)}, got {value!r}")
+        elif check is not None and not check(value):
+            problems.append(f"{path}: invalid value {value!r}")
+    return problems
+
+
+def _drop_invalid(config: Dict[str, Any], problems: List[str]) -> Dict[str, Any]:
+    cleaned = {name: dict(section) if isinstance(section, dict) else section for name, section in config.items()}
+    for problem in problems:
+        path = problem.split(':', 1)[0]
+        if path.startswith("section '"):
+            cleaned.pop(path.split("'")[1], None)
+        elif '.' in path:
+            section, key = path.split('.', 1)
+            if isinstance(cleaned.get(section), dict):
+                cleaned[section].pop(key, None)
+    return cleaned
+
+
+class ConfigStore:
+    """
+    Loads the YAML config once and reloads it only when the file changes.
+
+    `get()` re-checks the file's mtime and size at most every
+    `config.check_interval_s` seconds. A changed file is re-parsed and
+    validated; subscribers whose section changed are then called with the new
+    section (or the whole config). Invalid keys in the first load are dropped
+    so component defaults apply. A reload that fails to parse or validate
+    keeps the previous config. `start_watching` polls in a background thread,
+    so changes apply even when nothing calls `get()`.
+    """
+    def __init__(self, path: str = CONFIG_PATH) -> None:
+        self.path = path
+        self.check_interval_s: float = 1.0
+        self.reloads = 0
+        self._config: Optional[Config] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+        self._lock = threading.RLock()
+        self._subscribers: List[Tuple[Optional[str], Callable[[], Optional[Callable[[Any], None]]]]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def get(self) -> Config:
+        """
+        The current config, re-read first if the file changed.
+        """
+        if self._config is None or time.monotonic() - self._checked >= self.check_interval_s:
+            self.reload()
+        return self._config
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Re-reads the file if it changed (or `force`) and notifies subscribers.
+
+        Returns:
+            bool: True if a new config was applied.
+        """
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                signature = None
+            if not force and self._config is not None and signature == self._signature:
+                return False
+            self._signature = signature
+            first = self._config is None
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = yaml.safe_load(f) or {}
+            except Exception as e:
+                logger.error(f"Failed to load config: {e}")
+                if first:
+                    self._config = Config()
+                return False
+            problems = validate_config(data)
+            for problem in problems:
+                logger.error(f"Invalid config: {problem}")
+            if problems and not first:
+                logger.error("Config reload rejected; keeping the previous config.")
+                return False
+            if problems:
+                data = _drop_invalid(data, problems) if isinstance(data, dict) else {}
+            previous, self._config = self._config, Config(data)
+            self.check_interval_s = self._config.get_path('config.check_interval_s', 1.0)
+            self.reloads += 1
+            logger.info("Config loaded successfully." if first else "Config reloaded.")
+        if not first:
+            self._notify(previous, self._config)
+        return True
+
+    def subscribe(self, callback: Callable[[Any], None], section: Optional[str] = None) -> Callable[[], None]:
+        """
+        Calls `callback(new_section)` (or `callback(new_config)`) after a reload changes it.
+
+        Bound methods are held weakly, so subscribing does not keep a component alive.
+
+        Returns:
+            Callable[[], None]: Unsubscribes the callback.
+        """
+        ref: Callable[[], Optional[Callable[[Any], None]]]
+        if hasattr(callback, '__self__') and hasattr(callback, '__func__'):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        entry = (section, ref)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def _notify(self, previous: Optional[Config], current: Config) -> None:
+        with self._lock:
+            self._subscribers = [(s, ref) for s, ref in self._subscribers if ref() is not None]
+            subscribers = list(self._subscribers)
+        for section, ref in subscribers:
+            callback = ref()
+            old = previous.get(section, Config()) if section and previous is not None else previous
+            new = current.get(section, Config()) if section else current
+            if callback is None or old == new:
+                continue
+            try:
+                callback(new)
+            except Exception as e:
+                logger.error(f"Config subscriber {callback} failed: {e}")
+
+    def start_watching(self, interval_s: Optional[float] = None) -> None:
+        """
+        Polls the file in a daemon thread every `interval_s` (default `config.check_interval_s`).
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def watch() -> None:
+            while not self._stop.wait(interval_s or self.check_interval_s or 1.0):
+                try:
+                    self.reload()
+                except Exception as e:
+                    logger.error(f"Config watcher failed: {e}")
+
+        self._watcher = threading.Thread(target=watch, name='config-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+_config_store: Optional[ConfigStore] = None
+_config_store_lock = threading.Lock()
+
+
+def get_config_store() -> ConfigStore:
+    """
+    Returns the process-wide store for configs/config.yaml.
+    """
+    global _config_store
+    with _config_store_lock:
+        if _config_store is None:
+            _config_store = ConfigStore()
+        return _config_store
+
+
 def load_config() -> Dict[str, Any]:
     """
-    Loads YAML config from configs/config.yaml.
+    Returns the config from configs/config.yaml, parsed once per process and re-read when the file changes.
     """
-    try:
-        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-        logger.info("Config loaded successfully.")
-        return config or {}
-    except Exception as e:
-        logger.error(f"Failed to load config: {e}")
-        return {}
+    return get_config_store().get()
+
+
+def subscribe_config(callback: Callable[[Any], None], section: Optional[str] = None) -> Callable[[], None]:
+    """
+    `ConfigStore.subscribe` on the process-wide store.
+    """
+    return get_config_store().subscribe(callback, section)
 
 def load_json_schema(path: str) -> Dict[str, Any]:
     """
@@ -43,4 +339,4 @@ def load_json_schema(path: str) -> Dict[str, Any]:
         return schema
     except Exception as e:
         logger.error(f"Failed to load JSON schema {path}: {e}")
-        return {} 
\ No newline at end of file
+        return {}
@@ -0,0 +1,251 @@
+"""
+VAD module for voice-activity detection and utterance endpointing.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass
+import numpy as np
+from core.utils import logger
+
+
+@dataclass
+class Utterance:
+    """
+    A speech segment cut out of the audio stream.
+
+    Attributes:
+        audio (np.ndarray): Speech samples, including the configured pre-roll.
+        start (float): Speech start, in seconds from the start of the stream.
+        end (float): Speech end (last voiced frame), in seconds from the start of the stream.
+    """
+    audio: np.ndarray
+    start: float
+    end: float
+
+
+class EnergyVAD:
+    """
+    Frame-level speech detector based on short-term energy and zero-crossing rate.
+
+    Frames louder than `energy_threshold_db` (dBFS) are voiced; quieter frames down to
+    10 dB below the threshold still count as speech when their zero-crossing rate is
+    high enough to look like an unvoiced consonant.
+    """
+    def __init__(self, samplerate: int = 16000, frame_ms: int = 30,
+                 energy_threshold_db: float = -40.0, zcr_threshold: float = 0.25) -> None:
+        self.samplerate = samplerate
+        self.frame_len = int(samplerate * frame_ms / 1000)
+        self.energy_threshold_db = energy_threshold_db
+        self.zcr_threshold = zcr_threshold
+
+    def _classify(self, frames: np.ndarray) -> np.ndarray:
+        energy_db = 10 * np.log10(np.mean(frames ** 2, axis=-1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[..., 1:] != signs[..., :-1], axis=-1)
+        voiced = energy_db > self.energy_threshold_db
+        unvoiced = (energy_db > self.energy_threshold_db - 10) & (zcr > self.zcr_threshold)
+        return voiced | unvoiced
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        """
+        Classifies a single frame of any length.
+        """
+        if len(frame) < 2:
+            return False
+        return bool(self._classify(np.asarray(frame, dtype=np.float32)))
+
+    def speech_mask(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Classifies a whole waveform in one vectorized pass.
+
+        Args:
+            audio (np.ndarray): Mono waveform.
+
+        Returns:
+            np.ndarray: Boolean mask with one entry per `frame_len` frame (tail padded).
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        n_frames = -(-len(audio) // self.frame_len)
+        padded = np.zeros(n_frames * self.frame_len, dtype=np.float32)
+        padded[:len(audio)] = audio
+        return self._classify(padded.reshape(n_frames, self.frame_len))
+
+
+class WebRTCVAD:
+    """
+    Adapter exposing the `webrtcvad` package through the EnergyVAD interface.
+    """
+    def __init__(self, samplerate: int = 16000, frame_ms: int = 30, mode: int = 2) -> None:
+        import webrtcvad
+        if frame_ms not in (10, 20, 30):
+            raise ValueError("webrtcvad only supports 10, 20 or 30 ms frames.")
+        self.samplerate = samplerate
+        self.frame_len = int(samplerate * frame_ms / 1000)
+        self.vad = webrtcvad.Vad(mode)
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        """
+        Classifies a single frame; frames of the wrong length are zero-padded.
+        """
+        frame = np.asarray(frame, dtype=np.float32)[:self.frame_len]
+        pcm = np.zeros(self.frame_len, dtype='<i2')
+        pcm[:len(frame)] = np.clip(frame, -1.0, 1.0) * 32767
+        return self.vad.is_speech(pcm.tobytes(), self.samplerate)
+
+    def speech_mask(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Classifies a whole waveform frame by frame.
+        """
+        return np.array([self.is_speech(audio[i:i + self.frame_len])
+                         for i in range(0, len(audio), self.frame_len)], dtype=bool)
+
+
+VAD_BACKENDS = {
+    'energy': EnergyVAD,
+    'webrtc': WebRTCVAD,
+}
+
+
+def create_vad(config: Dict[str, Any], samplerate: int = 16000, frame_ms: int = 30) -> Any:
+    """
+    Builds the VAD backend selected by the `vad` config section.
+
+    Falls back to EnergyVAD if the requested backend cannot be loaded.
+    """
+    vad_config = config.get('vad', {})
+    backend = vad_config.get('backend', 'energy')
+    try:
+        if backend == 'webrtc':
+            return WebRTCVAD(samplerate, frame_ms, mode=vad_config.get('webrtc_mode', 2))
+        if backend != 'energy':
+            raise ValueError(f"Unknown VAD backend: {backend}")
+    except Exception as e:
+        logger.error(f"Failed to load VAD backend {backend}, using energy VAD: {e}")
+    return EnergyVAD(samplerate, frame_ms,
+                     energy_threshold_db=vad_config.get('energy_threshold_db', -40.0),
+                     zcr_threshold=vad_config.get('zcr_threshold', 0.25))
+
+
+class Endpointer:
+    """
+    Streaming state machine that turns VAD decisions into utterances.
+
+    Speech starts after `start_frames` consecutive voiced frames and ends once
+    `hangover_ms` of silence has followed the last voiced frame. Trailing silence
+    is trimmed; `pre_roll_ms` of audio before the speech start is kept.
+    """
+    def __init__(self, vad: Any, samplerate: int = 16000, start_frames: int = 3,
+                 hangover_ms: int = 500, pre_roll_ms: int = 150, max_utterance_s: float = 15.0) -> None:
+        self.vad = vad
+        self.samplerate = samplerate
+        self.start_frames = start_frames
+        self.hangover_samples = int(samplerate * hangover_ms / 1000)
+        self.pre_roll_samples = int(samplerate * pre_roll_ms / 1000)
+        self.max_utterance_samples = int(samplerate * max_utterance_s)
+        self._position = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forgets any partial utterance; the stream clock keeps running.
+        """
+        self._history: deque = deque()
+        self._history_samples = 0
+        self._voiced_run = 0
+        self._frames: List[np.ndarray] = []
+        self._frames_samples = 0
+        self._speech_start: Optional[int] = None
+        self._last_voiced_end = 0
+        self._keep_samples = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return self._speech_start is not None
+
+    def feed(self, frame: np.ndarray) -> Optional[Utterance]:
+        """
+        Consumes one frame and returns an utterance when one has just ended.
+        """
+        end = self._position + len(frame)
+        self._position = end
+        voiced = self.vad.is_speech(frame)
+        if self._speech_start is None:
+            self._remember(frame)
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self.start_frames:
+                run_start = end - sum(len(f) for f in list(self._history)[-self.start_frames:])
+                self._begin(run_start, end)
+            return None
+        self._frames.append(frame)
+        self._frames_samples += len(frame)
+        if voiced:
+            self._last_voiced_end = end
+            self._keep_samples = self._frames_samples
+        if end - self._last_voiced_end >= self.hangover_samples or self._frames_samples >= self.max_utterance_samples:
+            return self._emit()
+        return None
+
+    def advance(self, n_samples: int) -> None:
+        """
+        Moves the stream clock over samples that were not fed, e.g. while asleep.
+        """
+        self._position += n_samples
+
+    def flush(self) -> Optional[Utterance]:
+        """
+        Closes an utterance still in progress at the end of the stream.
+        """
+        return self._emit() if self._speech_start is not None else None
+
+    def _remember(self, frame: np.ndarray) -> None:
+        self._history.append(frame)
+        self._history_samples += len(frame)
+        limit = self.pre_roll_samples + sum(len(f) for f in list(self._history)[-self.start_frames:])
+        while len(self._history) > 1 and self._history_samples - len(self._history[0]) >= limit:
+            self._history_samples -= len(self._history.popleft())
+
+    def _begin(self, speech_start: int, end: int) -> None:
+        self._frames = list(self._history)
+        self._frames_samples = self._history_samples
+        self._history.clear()
+        self._history_samples = 0
+        self._voiced_run = 0
+        self._speech_start = speech_start
+        self._last_voiced_end = end
+        self._keep_samples = self._frames_samples
+
+    def _emit(self) -> Utterance:
+        audio = np.concatenate(self._frames)[:self._keep_samples] if self._frames else np.zeros(0, dtype=np.float32)
+        head = len(audio) - (self._last_voiced_end - self._speech_start) - self.pre_roll_samples
+        utterance = Utterance(audio=audio[max(head, 0):],
+                              start=self._speech_start / self.samplerate,
+                              end=self._last_voiced_end / self.samplerate)
+        self._frames = []
+        self._frames_samples = 0
+        self._speech_start = None
+        logger.info(f"Utterance detected: {utterance.start:.2f}s -> {utterance.end:.2f}s")
+        return utterance
+
+
+def trim_silence(audio: np.ndarray, vad: Any, pad_ms: int = 0) -> Tuple[np.ndarray, float, float]:
+    """
+    Cuts leading and trailing non-speech frames from a recorded waveform.
+
+    Args:
+        audio (np.ndarray): Mono waveform.
+        vad (Any): VAD backend exposing `speech_mask` and `frame_len`.
+        pad_ms (int): Silence to keep on each side of the speech.
+
+    Returns:
+        Tuple[np.ndarray, float, float]: Trimmed audio, speech start and end in seconds.
+            An all-silent input yields an empty array.
+    """
+    mask = vad.speech_mask(audio)
+    voiced = np.flatnonzero(mask)
+    if len(voiced) == 0:
+        return audio[:0], 0.0, 0.0
+    pad = int(vad.samplerate * pad_ms / 1000)
+    start = int(voiced[0]) * vad.frame_len
+    end = min((int(voiced[-1]) + 1) * vad.frame_len, len(audio))
+    trimmed = audio[max(start - pad, 0):min(end + pad, len(audio))]
+    return trimmed, start / vad.samplerate, end / vad.samplerate
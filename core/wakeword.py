@@ -0,0 +1,217 @@
+"""
+Wake-word module: MFCC features and DTW template matching for keyword spotting.
+"""
+from typing import Any, Dict, List, Optional
+from collections import deque
+from functools import lru_cache
+import time
+import numpy as np
+from core.audio import read_wav
+from core.vad import EnergyVAD
+from core.utils import logger
+
+
+@lru_cache(maxsize=8)
+def _mel_filterbank(samplerate: int, n_fft: int, n_mels: int) -> np.ndarray:
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def mel_to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    mel_points = np.linspace(hz_to_mel(0), hz_to_mel(samplerate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / samplerate).astype(int)
+    filters = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            filters[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            filters[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return filters
+
+
+@lru_cache(maxsize=8)
+def _dct_matrix(n_mfcc: int, n_mels: int) -> np.ndarray:
+    n = np.arange(n_mels)
+    k = np.arange(n_mfcc)[:, None]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2 / n_mels)).astype(np.float32)
+
+
+def mfcc(frames: np.ndarray, samplerate: int = 16000, n_mfcc: int = 13, n_mels: int = 26) -> np.ndarray:
+    """
+    Computes one MFCC vector per frame.
+
+    Args:
+        frames (np.ndarray): Array of shape (n_frames, frame_len) or a single frame.
+        samplerate (int): Sample rate of the audio.
+        n_mfcc (int): Number of cepstral coefficients.
+        n_mels (int): Number of mel bands.
+
+    Returns:
+        np.ndarray: Features of shape (n_frames, n_mfcc).
+    """
+    frames = np.atleast_2d(np.asarray(frames, dtype=np.float32))
+    frame_len = frames.shape[1]
+    n_fft = 1 << (frame_len - 1).bit_length()
+    emphasized = np.concatenate((frames[:, :1], frames[:, 1:] - 0.97 * frames[:, :-1]), axis=1)
+    spectrum = np.abs(np.fft.rfft(emphasized * np.hamming(frame_len).astype(np.float32), n=n_fft)) ** 2
+    mel_energy = spectrum @ _mel_filterbank(samplerate, n_fft, n_mels).T
+    return np.log(mel_energy + 1e-10) @ _dct_matrix(n_mfcc, n_mels).T
+
+
+def dtw_distance(query: np.ndarray, series: np.ndarray) -> float:
+    """
+    Subsequence DTW distance of `query` against the best-matching stretch of `series`.
+
+    Each query frame advances the series by 0, 1 or 2 frames, so every row of the
+    cost matrix is computed in one vectorized step. The result is normalized by
+    the query length.
+    """
+    cost = np.linalg.norm(query[:, None, :] - series[None, :, :], axis=-1)
+    acc = cost[0].copy()
+    for row in cost[1:]:
+        shifted1 = np.concatenate(([np.inf], acc[:-1]))
+        shifted2 = np.concatenate(([np.inf, np.inf], acc[:-2]))
+        acc = row + np.minimum(acc, np.minimum(shifted1, shifted2))
+    return float(acc.min() / len(query))
+
+
+class WakeWordDetector:
+    """
+    Always-on keyword spotter that gates the rest of the pipeline.
+
+    Silent frames are rejected by a cheap energy check before any feature is
+    computed, so idle cost stays at a few microseconds per frame. Voiced frames
+    are turned into MFCCs and the recent window is matched against the enrolled
+    templates with DTW. `trigger()` acts as a hotkey that wakes on the next frame.
+    """
+    def __init__(self, config: Dict[str, Any], samplerate: int = 16000, frame_ms: int = 30) -> None:
+        wake_config = config.get('wakeword', {})
+        self.samplerate = samplerate
+        self.frame_len = int(samplerate * frame_ms / 1000)
+        self.n_mfcc: int = wake_config.get('n_mfcc', 13)
+        self.sensitivity: float = wake_config.get('sensitivity', 0.5)
+        self.threshold: float = wake_config.get('threshold', 8.0)
+        self.refractory_frames = int(wake_config.get('refractory_ms', 1000) / frame_ms)
+        self.gate = EnergyVAD(samplerate, frame_ms,
+                              energy_threshold_db=config.get('vad', {}).get('energy_threshold_db', -40.0))
+        self.templates: List[np.ndarray] = []
+        for path in wake_config.get('templates', []):
+            try:
+                audio, _ = read_wav(path)
+                self.enroll(audio)
+            except Exception as e:
+                logger.error(f"Failed to load wake-word template {path}: {e}")
+        self._file_templates = len(self.templates)
+        self.frames_seen = 0
+        self.frames_scored = 0
+        self.cpu_seconds = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clears the feature window, e.g. after the utterance following a wake-up.
+        """
+        window = max((len(t) for t in self.templates), default=1)
+        self._features: deque = deque(maxlen=int(window * 1.5) + 1)
+        self._cooldown = 0
+        self._triggered = False
+
+    @property
+    def effective_threshold(self) -> float:
+        """
+        DTW distance below which a window counts as a hit; higher sensitivity accepts more.
+        """
+        return self.threshold * (0.5 + self.sensitivity)
+
+    @property
+    def cpu_per_frame_us(self) -> float:
+        """
+        Average CPU time spent in `process`, in microseconds per frame.
+        """
+        return 1e6 * self.cpu_seconds / self.frames_seen if self.frames_seen else 0.0
+
+    def enroll(self, audio: np.ndarray) -> None:
+        """
+        Adds a recording of the wake word as a matching template.
+        """
+        n_frames = len(audio) // self.frame_len
+        frames = np.asarray(audio[:n_frames * self.frame_len], dtype=np.float32).reshape(n_frames, self.frame_len)
+        voiced = frames[self.gate.speech_mask(frames.reshape(-1))]
+        if len(voiced) == 0:
+            raise ValueError("Wake-word template contains no speech.")
+        self.templates.append(self._normalize(mfcc(voiced, self.samplerate, self.n_mfcc)))
+        self.reset()
+
+    @property
+    def enrolled_templates(self) -> List[np.ndarray]:
+        """
+        Templates enrolled at runtime, i.e. not loaded from `wakeword.templates`.
+        """
+        return self.templates[self._file_templates:]
+
+    def adopt(self, templates: List[np.ndarray]) -> None:
+        """
+        Adds templates enrolled by another detector with the same samplerate and frame size.
+        """
+        self.templates.extend(templates)
+        self.reset()
+
+    def trigger(self) -> None:
+        """
+        Hotkey entry point: wakes the pipeline on the next processed frame.
+        """
+        self._triggered = True
+
+    def process(self, frame: np.ndarray) -> bool:
+        """
+        Consumes one listener frame.
+
+        Args:
+            frame (np.ndarray): Mono float32 audio frame.
+
+        Returns:
+            bool: True if the wake word was detected or the hotkey was pressed.
+        """
+        started = time.thread_time()
+        try:
+            self.frames_seen += 1
+            if self._triggered:
+                self._triggered = False
+                return True
+            if self._cooldown > 0:
+                self._cooldown -= 1
+                return False
+            if not self.templates or len(frame) < self.frame_len or not self.gate.is_speech(frame):
+                return False
+            self._features.append(mfcc(frame[:self.frame_len], self.samplerate, self.n_mfcc)[0])
+            self.frames_scored += 1
+            distance = self.best_distance()
+            if distance is not None and distance < self.effective_threshold:
+                logger.info(f"Wake word detected (distance {distance:.2f})")
+                self._features.clear()
+                self._cooldown = self.refractory_frames
+                return True
+            return False
+        finally:
+            self.cpu_seconds += time.thread_time() - started
+
+    def best_distance(self) -> Optional[float]:
+        """
+        Smallest DTW distance between the current window and any template.
+        """
+        if not self._features:
+            return None
+        window = self._normalize(np.array(self._features))
+        best: Optional[float] = None
+        for template in self.templates:
+            if len(window) < len(template) * 0.8:
+                continue
+            distance = dtw_distance(template, window)
+            best = distance if best is None else min(best, distance)
+        return best
+
+    @staticmethod
+    def _normalize(features: np.ndarray) -> np.ndarray:
+        return features - features.mean(axis=0)
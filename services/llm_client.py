@@ -0,0 +1,232 @@
+"""
+LLM client module: pooled async HTTP client for Ollama-style generate endpoints.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import json
+import random
+import httpx
+from core.utils import logger
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON document that arrives in arbitrary text fragments.
+
+    Every object that closes directly inside an array (e.g. each element of a
+    plan's `steps`) is reported as soon as its closing brace arrives, and the
+    top-level value is reported once complete. Text before the first `{` or `[`
+    (chatter some models emit) is ignored.
+    """
+    def __init__(self) -> None:
+        self._buffer = ''
+        self._pos = 0
+        self._stack: List[Tuple[str, int]] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self.result: Any = None
+
+    @property
+    def done(self) -> bool:
+        return self._started and not self._stack
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """
+        Adds a fragment and returns ('item', value) / ('document', value) events it completed.
+        """
+        self._buffer += text
+        events: List[Tuple[str, Any]] = []
+        while self._pos < len(self._buffer) and not self.done:
+            char = self._buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"' and self._started:
+                self._in_string = True
+            elif char in '{[':
+                self._started = True
+                self._stack.append((char, self._pos))
+            elif char in '}]' and self._stack:
+                opener, start = self._stack.pop()
+                if not self._stack:
+                    self.result = json.loads(self._buffer[start:self._pos + 1])
+                    events.append(('document', self.result))
+                elif opener == '{' and self._stack[-1][0] == '[':
+                    events.append(('item', json.loads(self._buffer[start:self._pos + 1])))
+            self._pos += 1
+        return events
+
+
+class LLMClient:
+    """
+    Async, connection-pooled client for the local LLM server.
+
+    One keep-alive `httpx.AsyncClient` is shared by all calls made from the same
+    event loop; `max_concurrency` caps in-flight requests, and transport errors or
+    retryable status codes are retried with full-jitter exponential backoff.
+    """
+    def __init__(self, url: str, model: Optional[str] = None, timeout_s: float = 30.0,
+                 max_connections: int = 10, max_concurrency: int = 4, retries: int = 3,
+                 backoff_base_s: float = 0.2, backoff_max_s: float = 2.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        self.url = url
+        self.model = model
+        self.timeout_s = timeout_s
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.transport = transport
+        self._sessions: Dict[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs: Any) -> 'LLMClient':
+        orchestrator_config = config.get('orchestrator', {})
+        return cls(orchestrator_config.get('llm_url', 'http://localhost:8001/generate'),
+                   model=orchestrator_config.get('model'),
+                   timeout_s=orchestrator_config.get('timeout_s', 30.0),
+                   max_connections=orchestrator_config.get('max_connections', 10),
+                   max_concurrency=orchestrator_config.get('max_concurrency', 4),
+                   retries=orchestrator_config.get('retries', 3),
+                   backoff_base_s=orchestrator_config.get('backoff_base_s', 0.2),
+                   backoff_max_s=orchestrator_config.get('backoff_max_s', 2.0),
+                   **kwargs)
+
+    def apply_config(self, orchestrator_config: Dict[str, Any]) -> None:
+        """
+        Applies a reloaded `orchestrator` section to later requests.
+
+        The pool size and concurrency limit are fixed once the pool is open.
+        """
+        self.url = orchestrator_config.get('llm_url', self.url)
+        self.model = orchestrator_config.get('model')
+        self.timeout_s = orchestrator_config.get('timeout_s', 30.0)
+        self.retries = orchestrator_config.get('retries', 3)
+        self.backoff_base_s = orchestrator_config.get('backoff_base_s', 0.2)
+        self.backoff_max_s = orchestrator_config.get('backoff_max_s', 2.0)
+        for client, _ in self._sessions.values():
+            client.timeout = httpx.Timeout(self.timeout_s)
+
+    async def _session(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        # Pooled connections belong to the loop that opened them, so a new loop gets a new pool,
+        # and pools left behind by loops that have since closed are released.
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None:
+            for stale in [other for other in self._sessions if other.is_closed()]:
+                await self._close(stale, self._sessions.pop(stale)[0])
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections)
+            client = httpx.AsyncClient(timeout=self.timeout_s, limits=limits, transport=self.transport)
+            session = self._sessions[loop] = (client, asyncio.Semaphore(self.max_concurrency))
+        return session
+
+    @staticmethod
+    async def _close(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> None:
+        try:
+            if loop.is_running() and loop is not asyncio.get_running_loop():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+            else:
+                await client.aclose()
+        except Exception as e:
+            logger.debug(f"Could not cleanly close LLM connections: {e}")
+
+    def _payload(self, prompt: str, stream: bool) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {'prompt': prompt, 'stream': stream}
+        if self.model:
+            payload['model'] = self.model
+        return payload
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+
+    async def _with_retries(self, send: Any) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return await send()
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code in RETRY_STATUS
+                if not retryable or attempt >= self.retries:
+                    raise
+                delay = self._backoff(attempt)
+                attempt += 1
+                logger.warning(f"LLM request failed ({e}), retry {attempt}/{self.retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def generate(self, prompt: str) -> Dict[str, Any]:
+        """
+        Sends a prompt and returns the plan JSON.
+
+        Both bare JSON responses and Ollama envelopes (`{"response": "<json>", "done": true}`) are accepted.
+        """
+        client, semaphore = await self._session()
+
+        async def send() -> Dict[str, Any]:
+            resp = await client.post(self.url, json=self._payload(prompt, stream=False))
+            resp.raise_for_status()
+            return resp.json()
+
+        async with semaphore:
+            body = await self._with_retries(send)
+        if isinstance(body, dict) and 'done' in body and isinstance(body.get('response'), str):
+            return json.loads(body['response'])
+        return body
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Yields response tokens from an NDJSON stream as they are generated.
+
+        Only connection setup is retried; a stream that breaks midway raises.
+        """
+        client, semaphore = await self._session()
+        async with semaphore:
+            async def open_stream() -> httpx.Response:
+                request = client.build_request('POST', self.url, json=self._payload(prompt, stream=True))
+                resp = await client.send(request, stream=True)
+                if resp.status_code >= 400:
+                    await resp.aread()
+                    await resp.aclose()
+                    resp.raise_for_status()
+                return resp
+
+            resp = await self._with_retries(open_stream)
+            try:
+                async for line in resp.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('response'):
+                        yield chunk['response']
+                    if chunk.get('done'):
+                        break
+            finally:
+                await resp.aclose()
+
+    async def stream_plan(self, prompt: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streams a plan, yielding ('item', step) for each completed step and ('document', plan) at the end.
+        """
+        parser = IncrementalJSONParser()
+        async for token in self.stream(prompt):
+            for event in parser.feed(token):
+                yield event
+            if parser.done:
+                return
+        raise ValueError("LLM stream ended before the plan JSON was complete")
+
+    async def aclose(self) -> None:
+        """
+        Closes pooled connections, including those opened from other event loops.
+        """
+        while self._sessions:
+            loop, (client, _) = self._sessions.popitem()
+            await self._close(loop, client)
@@ -1,13 +1,23 @@
 """
 Orchestrator module for planning via LLM.
 """
-from typing import Any, Dict
-from fastapi import FastAPI, HTTPException
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import threading
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, ValidationError
-from services.utils import logger, load_config
-import requests
-
-app = FastAPI()
+from core.context import ContextBuilder
+from core.embedder import Embedder
+from core.plan_cache import PlanCache
+from core.plugin_manager import PluginManager
+from core.text import refers_back
+from core.tracing import get_tracer, span, trace, traced
+from core.utils import logger, load_config, get_config_store, subscribe_config
+from services.llm_client import LLMClient
+from services.startup import warm_up_components
 
 class PlanRequest(BaseModel):
     user_input: str
@@ -18,30 +28,138 @@ class PlanResponse(BaseModel):
 class Orchestrator:
     """
     Handles prompt assembly, LLM call, and plan validation.
+
+    Prompts carry token-budgeted conversation context (see `core.context.ContextBuilder`).
+    Validated plans are cached per command (see `core.plan_cache.PlanCache`).
+    Memory retrieval and near-duplicate cache hits use `embed`, or the local
+    `Embedder` when it is installed.
     """
-    def __init__(self) -> None:
-        self.config = load_config()
-        self.llm_url: str = self.config.get('orchestrator', {}).get('llm_url', 'http://localhost:8001/generate')
+    def __init__(self, embed: Optional[Callable[[str], List[float]]] = None,
+                 config: Optional[Dict[str, Any]] = None) -> None:
+        self.config = config if config is not None else load_config()
+        self.llm = LLMClient.from_config(self.config)
+        subscribe_config(self.llm.apply_config, 'orchestrator')
+        self.embedder: Optional[Embedder] = None
+        if embed is None and self.config.get('embedder', {}).get('enabled', True) and Embedder.available():
+            self.embedder = Embedder(self.config)
+            embed = self.embedder.embed
+        self.context = ContextBuilder.from_config(self.config, embed=embed)
+        self.plan_cache: Optional[PlanCache] = None
+        if self.config.get('plan_cache', {}).get('enabled', True):
+            self.plan_cache = PlanCache.from_config(self.config, embed=embed)
+        self.plugins: Optional[PluginManager] = None
+        if self.config.get('skills', {}).get('fast_path', True):
+            self.plugins = PluginManager(self.config)
+            self.plugins.load_skills()
+
+    @property
+    def llm_url(self) -> str:
+        return self.llm.url
 
     def assemble_prompt(self, user_input: str) -> str:
         """
-        Assembles a prompt for the LLM.
+        Assembles a prompt for the LLM: conversation context, then the request.
+        """
+        return self.context.build(user_input)
+
+    async def build_prompt(self, user_input: str) -> str:
+        """
+        `assemble_prompt`, run off the event loop when it has to query memory.
         """
-        return f"Plan the following: {user_input}"
+        if self.context.retrieval_enabled:
+            return await asyncio.to_thread(self.assemble_prompt, user_input)
+        return self.assemble_prompt(user_input)
 
-    def call_llm(self, prompt: str) -> Dict[str, Any]:
+    async def record_turn(self, user_input: str, plan: Dict[str, Any]) -> None:
         """
-        Calls the LLM endpoint and returns the plan.
+        Adds the exchange to the conversation context.
+        """
+        if self.context.retrieval_enabled:
+            await asyncio.to_thread(self.context.add_turn, user_input, plan.get('response'))
+        else:
+            self.context.add_turn(user_input, plan.get('response'))
+
+    @traced('orchestrator.call_llm')
+    async def call_llm(self, prompt: str) -> Dict[str, Any]:
+        """
+        Calls the LLM endpoint over the pooled client and returns the plan.
         """
         try:
             logger.info(f"Calling LLM at {self.llm_url}")
-            resp = requests.post(self.llm_url, json={"prompt": prompt}, timeout=10)
-            resp.raise_for_status()
-            return resp.json()
+            return await self.llm.generate(prompt)
         except Exception as e:
             logger.error(f"LLM call failed: {e}")
             raise
 
+    async def stream_plan(self, prompt: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streams the plan, yielding ('item', step) as each step completes and ('document', plan) last.
+        """
+        try:
+            logger.info(f"Streaming plan from LLM at {self.llm_url}")
+            async for event in self.llm.stream_plan(prompt):
+                yield event
+        except Exception as e:
+            logger.error(f"LLM stream failed: {e}")
+            raise
+
+    async def skill_plan(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the plan of the skill routed for a command, or None on a router miss.
+        """
+        if self.plugins is None:
+            return None
+        intent = await self.plugins.route_async(user_input)
+        if intent is None:
+            return None
+        logger.info(f"Routed to skill {intent.skill.__name__} ({intent.trigger or 'can_handle'})")
+        plan = await self.plugins.run(intent, user_input)
+        return plan if plan is not None and self.validate_plan(plan) else None
+
+    async def cached_plan(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached plan for a command, or None.
+
+        Commands that refer back to earlier turns ("do that again") are never
+        served from the cache: it is keyed on the command alone.
+        """
+        if self.plan_cache is None or refers_back(user_input):
+            return None
+        if self.plan_cache.semantic_enabled:
+            return await asyncio.to_thread(self.plan_cache.get, user_input)
+        return self.plan_cache.get(user_input)
+
+    async def cache_plan(self, user_input: str, plan: Dict[str, Any]) -> None:
+        """
+        Stores a validated plan for a command, unless the command refers back to earlier turns.
+        """
+        if self.plan_cache is None:
+            return
+        if refers_back(user_input):
+            logger.debug("Command refers to earlier turns; plan not cached.")
+            return
+        if self.plan_cache.semantic_enabled:
+            await asyncio.to_thread(self.plan_cache.put, user_input, plan)
+        else:
+            self.plan_cache.put(user_input, plan)
+
+    @traced('orchestrator.plan')
+    async def plan(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """
+        Plans a command without the LLM when possible: skill fast path, then plan cache, then LLM.
+
+        Returns:
+            Optional[Dict[str, Any]]: The plan, or None if the LLM returned an invalid one.
+        """
+        plan = await self.skill_plan(user_input) or await self.cached_plan(user_input)
+        if plan is None:
+            plan = await self.call_llm(await self.build_prompt(user_input))
+            if not self.validate_plan(plan):
+                return None
+            await self.cache_plan(user_input, plan)
+        await self.record_turn(user_input, plan)
+        return plan
+
     def validate_plan(self, plan: Dict[str, Any]) -> bool:
         """
         Validates the plan JSON structure.
@@ -53,16 +171,129 @@ class Orchestrator:
             logger.error(f"Plan validation failed: {e}")
             return False
 
-orchestrator = Orchestrator()
+_orchestrator: Optional[Orchestrator] = None
+_orchestrator_lock = threading.Lock()
+
+
+def get_orchestrator() -> Orchestrator:
+    """
+    Returns the process-wide orchestrator, built on first use (normally by the app lifespan).
+    """
+    global _orchestrator
+    with _orchestrator_lock:
+        if _orchestrator is None:
+            _orchestrator = Orchestrator()
+        return _orchestrator
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    store = get_config_store()
+    if store.get().get('config', {}).get('hot_reload', True):
+        store.start_watching()
+    orchestrator = await asyncio.to_thread(get_orchestrator)
+    if orchestrator.plugins is not None and orchestrator.config.get('skills', {}).get('hot_reload', False):
+        orchestrator.plugins.start_watching()
+    app.state.warm_up = warm_up_components(embedder=orchestrator.embedder)
+    yield
+    app.state.warm_up.shutdown()
+    if orchestrator.plugins is not None:
+        orchestrator.plugins.stop_watching()
+    store.stop_watching()
+    await orchestrator.llm.aclose()
+    get_tracer().close()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Runs each request under its own trace id (from X-Trace-Id when given) and echoes it back.
+    """
+    if request.url.path == '/metrics':
+        return await call_next(request)
+    with trace(request.headers.get('x-trace-id')) as trace_id:
+        with span('http.request', method=request.method, path=request.url.path) as request_span:
+            response = await call_next(request)
+            request_span.attrs['status'] = response.status_code
+    response.headers['X-Trace-Id'] = trace_id
+    return response
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Per-stage latency summaries in the Prometheus text format.
+    """
+    return PlainTextResponse(get_tracer().prometheus(), media_type='text/plain; version=0.0.4')
+
+@app.get("/ready")
+async def ready(request: Request):
+    """
+    Warm-up status; 503 until every background warm-up has finished.
+    """
+    warm_up = getattr(request.app.state, 'warm_up', None)
+    status = warm_up.status() if warm_up is not None else {'ready': True, 'done': True, 'components': {}}
+    return JSONResponse(status, status_code=200 if status['done'] else 503)
 
 @app.post("/plan", response_model=PlanResponse)
 async def plan_endpoint(req: PlanRequest):
+    orchestrator = get_orchestrator()
     try:
-        prompt = orchestrator.assemble_prompt(req.user_input)
-        plan = orchestrator.call_llm(prompt)
-        if not orchestrator.validate_plan(plan):
+        plan = await orchestrator.plan(req.user_input)
+        if plan is None:
             raise HTTPException(status_code=400, detail="Invalid plan format")
         return PlanResponse(plan=plan)
     except Exception as e:
         logger.error(f"/plan endpoint error: {e}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/plan/stream")
+async def plan_stream_endpoint(req: PlanRequest):
+    """
+    Streams NDJSON events: {"step": ...} per completed step, then {"plan": ...} or {"error": ...}.
+    """
+    orchestrator = get_orchestrator()
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            cached = await orchestrator.skill_plan(req.user_input) or await orchestrator.cached_plan(req.user_input)
+            if cached is not None:
+                for step in cached.get('steps', []):
+                    yield json.dumps({'step': step}) + '\n'
+                await orchestrator.record_turn(req.user_input, cached)
+                yield json.dumps({'plan': cached}) + '\n'
+                return
+            prompt = await orchestrator.build_prompt(req.user_input)
+            async for kind, value in orchestrator.stream_plan(prompt):
+                if kind == 'item':
+                    yield json.dumps({'step': value}) + '\n'
+                elif orchestrator.validate_plan(value):
+                    await orchestrator.cache_plan(req.user_input, value)
+                    await orchestrator.record_turn(req.user_input, value)
+                    yield json.dumps({'plan': value}) + '\n'
+                else:
+                    yield json.dumps({'error': 'Invalid plan format'}) + '\n'
+        except Exception as e:
+            logger.error(f"/plan/stream endpoint error: {e}")
+            yield json.dumps({'error': str(e)}) + '\n'
+
+    return StreamingResponse(events(), media_type='application/x-ndjson')
+
+@app.get("/plan/cache")
+async def plan_cache_stats():
+    """
+    Plan cache hit-rate metrics.
+    """
+    orchestrator = get_orchestrator()
+    if orchestrator.plan_cache is None:
+        return {'enabled': False}
+    return {'enabled': True, **orchestrator.plan_cache.stats}
+
+@app.delete("/plan/cache")
+async def plan_cache_invalidate(user_input: Optional[str] = None):
+    """
+    Forgets the cached plan for `user_input`, or all cached plans when omitted.
+    """
+    orchestrator = get_orchestrator()
+    if orchestrator.plan_cache is not None:
+        await asyncio.to_thread(orchestrator.plan_cache.invalidate, user_input)
+    return {'invalidated': user_input if user_input is not None else 'all'}
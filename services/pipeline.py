@@ -0,0 +1,392 @@
+"""
+Pipeline module: async runner wiring Listener -> STT -> Orchestrator -> Dispatcher -> TTS.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import time
+import numpy as np
+from core.tracing import get_tracer, new_trace_id, span, trace
+from core.utils import logger, load_config
+
+# Spoken instead of the plan's response when some of its steps did not succeed.
+FAILED_STEPS_RESPONSE = "Sorry, {failed} of {total} steps did not complete."
+
+
+@dataclass
+class Turn:
+    """
+    One user request travelling through the pipeline, with per-stage timestamps.
+
+    Attributes:
+        turn_id (int): Sequence number of the turn.
+        audio (np.ndarray): Endpointed utterance audio.
+        audio_seconds (float): Duration of the utterance.
+        captured_at (float): perf_counter() when the utterance was endpointed.
+        timestamps (Dict[str, Tuple[float, float]]): perf_counter() start/end per stage.
+        trace_id (str): Tags the turn's spans in `core.tracing`.
+        interrupted (bool): The user barged in before the turn finished.
+    """
+    turn_id: int
+    audio: np.ndarray
+    audio_seconds: float
+    captured_at: float
+    text: Optional[str] = None
+    plan: Optional[Dict[str, Any]] = None
+    return_codes: List[Optional[int]] = field(default_factory=list)
+    failed_steps: List[str] = field(default_factory=list)
+    response: Optional[str] = None
+    error: Optional[str] = None
+    interrupted: bool = False
+    timestamps: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    trace_id: str = field(default_factory=new_trace_id)
+
+    def latency_breakdown(self) -> Dict[str, float]:
+        """
+        Milliseconds spent in each stage, waiting in queues, and end to end.
+        """
+        breakdown = {name: 1000 * (end - start) for name, (start, end) in self.timestamps.items()}
+        if self.timestamps:
+            total = 1000 * (max(end for _, end in self.timestamps.values()) - self.captured_at)
+            breakdown['queued'] = total - sum(breakdown.values())
+            breakdown['total'] = total
+        return {name: round(ms, 2) for name, ms in breakdown.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'turn_id': self.turn_id,
+            'trace_id': self.trace_id,
+            'audio_seconds': round(self.audio_seconds, 3),
+            'text': self.text,
+            'response': self.response,
+            'return_codes': self.return_codes,
+            'failed_steps': self.failed_steps,
+            'error': self.error,
+            'interrupted': self.interrupted,
+            'latency_ms': self.latency_breakdown(),
+        }
+
+
+@contextmanager
+def _stage(turn: Turn, name: str):
+    start = time.perf_counter()
+    try:
+        with span(f'pipeline.{name}', turn=turn.turn_id):
+            yield
+    finally:
+        turn.timestamps[name] = (start, time.perf_counter())
+
+
+def _in_context(func: Any, *args: Any) -> Any:
+    """
+    Binds a call to the current contextvars (trace id, parent span) for a thread pool.
+    """
+    return functools.partial(contextvars.copy_context().run, func, *args)
+
+
+class StubPlanner:
+    """
+    Canned planner for headless runs: no LLM, optional fixed delay.
+    """
+    def __init__(self, delay_s: float = 0.0) -> None:
+        self.delay_s = delay_s
+
+    async def plan(self, text: str) -> Dict[str, Any]:
+        if self.delay_s:
+            await asyncio.sleep(self.delay_s)
+        return {'steps': [], 'response': f"You said: {text}"}
+
+
+class OrchestratorPlanner:
+    """
+    Adapts `services.main.Orchestrator` to the pipeline; repeated commands come from its plan cache.
+    """
+    def __init__(self, orchestrator: Any) -> None:
+        self.orchestrator = orchestrator
+
+    async def plan(self, text: str) -> Dict[str, Any]:
+        plan = await self.orchestrator.plan(text)
+        if plan is None:
+            raise ValueError("Invalid plan format")
+        return plan
+
+
+class NullSpeaker:
+    """
+    Headless stand-in for TextToSpeech that records what would have been spoken.
+    """
+    def __init__(self) -> None:
+        self.spoken: List[str] = []
+
+    async def speak_stream(self, text: str) -> None:
+        self.spoken.append(text)
+
+
+_worker_stt: Any = None
+
+
+def _init_stt_worker() -> None:
+    global _worker_stt
+    from core.stt import SpeechToText
+    _worker_stt = SpeechToText()
+    _worker_stt.preload()
+
+
+def _transcribe_in_worker(audio: np.ndarray, samplerate: int) -> Optional[str]:
+    return _worker_stt.transcribe(audio, samplerate)
+
+
+class VoicePipeline:
+    """
+    Runs capture, transcription, planning and action/speech as concurrent stages.
+
+    Stages are connected by bounded queues (`pipeline.queue_size`), so a slow
+    stage applies backpressure upstream instead of letting work pile up. Blocking
+    calls (STT, subprocesses, synthesis) run in a thread pool; with
+    `pipeline.stt_executor: process`, transcription runs in a process pool whose
+    workers each load their own model. A plan's steps run on the dispatcher's
+    async executor when it has one (see `core.action_dispatcher`); its response
+    is spoken once they have finished, or replaced by `FAILED_STEPS_RESPONSE`
+    when some did not succeed. Every turn records per-stage timestamps.
+
+    With a `barge_in` monitor (see `core.barge_in.BargeInMonitor`), the listener's
+    frames are also fed to the monitor for the whole run, and each turn's plan and
+    act stages run as tasks registered with it: when the user speaks over the
+    assistant, playback stops and the turn is cancelled and marked `interrupted`,
+    while the pipeline carries on with the next utterance.
+    """
+    def __init__(self, listener: Any, stt: Any, planner: Any, dispatcher: Any = None,
+                 speaker: Any = None, config: Optional[Dict[str, Any]] = None, barge_in: Any = None) -> None:
+        self.config = config if config is not None else load_config()
+        pipeline_config = self.config.get('pipeline', {})
+        self.listener = listener
+        self.stt = stt
+        self.planner = planner
+        self.dispatcher = dispatcher
+        self.speaker = speaker if speaker is not None else NullSpeaker()
+        self.barge_in = barge_in
+        self.queue_size: int = pipeline_config.get('queue_size', 2)
+        self.executor = ThreadPoolExecutor(max_workers=pipeline_config.get('workers', 4),
+                                           thread_name_prefix='pipeline')
+        self.stt_executor: Executor = self.executor
+        if pipeline_config.get('stt_executor', 'thread') == 'process':
+            self.stt_executor = ProcessPoolExecutor(max_workers=pipeline_config.get('stt_processes', 1),
+                                                    initializer=_init_stt_worker)
+        self.samplerate: int = getattr(listener, 'samplerate', 16000)
+
+    async def _utterances(self, sources: Optional[List[Any]]) -> AsyncIterator[Any]:
+        for source in sources if sources is not None else [None]:
+            async for utterance in self.listener.wake_gated_utterances(source):
+                yield utterance
+
+    async def _capture(self, sources: Optional[List[Any]], out: asyncio.Queue) -> None:
+        turn_id = 0
+        try:
+            async for utterance in self._utterances(sources):
+                turn_id += 1
+                await out.put(Turn(turn_id=turn_id, audio=utterance.audio,
+                                   audio_seconds=len(utterance.audio) / self.samplerate,
+                                   captured_at=time.perf_counter()))
+        finally:
+            await out.put(None)
+
+    async def _transcribe(self, turn: Turn) -> None:
+        loop = asyncio.get_running_loop()
+        if self.stt_executor is self.executor:
+            turn.text = await loop.run_in_executor(self.executor, _in_context(self.stt.transcribe, turn.audio, self.samplerate))
+        else:
+            turn.text = await loop.run_in_executor(self.stt_executor, _transcribe_in_worker, turn.audio, self.samplerate)
+        if not turn.text:
+            raise ValueError("empty transcript")
+
+    async def _plan(self, turn: Turn) -> None:
+        turn.plan = await self.planner.plan(turn.text)
+
+    async def _act(self, turn: Turn) -> None:
+        plan = turn.plan or {}
+        steps = plan.get('steps') or ([plan] if 'command' in plan else [])
+        turn.response = plan.get('response')
+        await self._dispatch(turn, steps)
+        if turn.failed_steps:
+            turn.response = FAILED_STEPS_RESPONSE.format(failed=len(turn.failed_steps), total=len(steps))
+        await self._speak(turn)
+
+    async def _dispatch(self, turn: Turn, steps: List[Dict[str, Any]]) -> None:
+        if self.dispatcher is None or not steps:
+            return
+        with _stage(turn, 'dispatch'):
+            if asyncio.iscoroutinefunction(getattr(self.dispatcher, 'execute', None)):
+                results = await self.dispatcher.execute(steps)
+                turn.return_codes.extend(result.returncode for result in results.values())
+                turn.failed_steps.extend(step_id for step_id, result in results.items() if not result.ok)
+                return
+            loop = asyncio.get_running_loop()
+            for index, step in enumerate(steps):
+                returncode = await loop.run_in_executor(self.executor, _in_context(self.dispatcher.dispatch, step))
+                turn.return_codes.append(returncode)
+                if returncode != 0:
+                    turn.failed_steps.append(str(step.get('id', index)))
+
+    async def _speak(self, turn: Turn) -> None:
+        if turn.response:
+            with _stage(turn, 'tts'):
+                await self.speaker.speak_stream(turn.response)
+
+    async def _worker(self, name: str, handler: Any, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue],
+                      timed: bool = True, interruptible: bool = False) -> None:
+        while (turn := await inbox.get()) is not None:
+            if turn.error is None and not turn.interrupted:
+                try:
+                    with trace(turn.trace_id):
+                        await self._handle(name, handler, turn, timed, interruptible)
+                except asyncio.CancelledError:
+                    current = asyncio.current_task()
+                    if current is not None and current.cancelling():
+                        raise
+                    turn.interrupted = True
+                    logger.info(f"Turn {turn.turn_id} interrupted during {name}.")
+                except Exception as e:
+                    turn.error = f"{name}: {e}"
+                    logger.error(f"Turn {turn.turn_id} failed in {name}: {e}")
+            if outbox is not None:
+                await outbox.put(turn)
+            else:
+                self._finished.append(turn)
+                logger.info(f"Turn {turn.turn_id} done: {turn.latency_breakdown()}")
+        if outbox is not None:
+            await outbox.put(None)
+
+    async def _handle(self, name: str, handler: Any, turn: Turn, timed: bool, interruptible: bool) -> None:
+        """
+        Runs one stage of a turn; interruptible stages run as a task registered for barge-in.
+        """
+        async def run() -> None:
+            if timed:
+                with _stage(turn, name):
+                    await handler(turn)
+            else:
+                await handler(turn)
+
+        if self.barge_in is None or not interruptible:
+            await run()
+        else:
+            await self.barge_in.register(asyncio.create_task(run()))
+
+    async def run(self, sources: Optional[List[Any]] = None) -> List[Turn]:
+        """
+        Processes utterances until the audio ends (or forever, for the microphone).
+
+        Args:
+            sources (Optional[List[Any]]): Injected audio sources, replayed in order;
+                None listens to the microphone.
+
+        Returns:
+            List[Turn]: Completed turns with their latency breakdowns.
+        """
+        self._finished: List[Turn] = []
+        to_stt, to_plan, to_act = (asyncio.Queue(maxsize=self.queue_size) for _ in range(3))
+        monitor = None
+        if self.barge_in is not None:
+            monitor = asyncio.create_task(self.barge_in.run(self.listener.monitor_frames()))
+        try:
+            await asyncio.gather(
+                self._capture(sources, to_stt),
+                self._worker('stt', self._transcribe, to_stt, to_plan),
+                self._worker('plan', self._plan, to_plan, to_act, interruptible=True),
+                self._worker('act', self._act, to_act, None, timed=False, interruptible=True),
+            )
+        finally:
+            if monitor is not None:
+                monitor.cancel()
+                await asyncio.gather(monitor, return_exceptions=True)
+        return self._finished
+
+    def close(self) -> None:
+        """
+        Shuts down the worker pools.
+        """
+        self.executor.shutdown(wait=False)
+        if self.stt_executor is not self.executor:
+            self.stt_executor.shutdown(wait=False)
+
+
+def summarize(turns: List[Turn], wall_seconds: float) -> Dict[str, Any]:
+    """
+    Aggregates per-stage latency (mean/p50/p95/max) and throughput over a run.
+    """
+    stages: Dict[str, List[float]] = {}
+    for turn in turns:
+        for name, ms in turn.latency_breakdown().items():
+            stages.setdefault(name, []).append(ms)
+    audio_seconds = sum(t.audio_seconds for t in turns)
+    return {
+        'turns': len(turns),
+        'errors': sum(1 for t in turns if t.error),
+        'interrupted': sum(1 for t in turns if t.interrupted),
+        'wall_seconds': round(wall_seconds, 3),
+        'turns_per_second': round(len(turns) / wall_seconds, 3) if wall_seconds else 0.0,
+        'real_time_factor': round(wall_seconds / audio_seconds, 3) if audio_seconds else None,
+        'latency_ms': {name: {'mean': round(float(np.mean(v)), 2), 'p50': round(float(np.median(v)), 2),
+                              'p95': round(float(np.percentile(v, 95)), 2), 'max': round(float(np.max(v)), 2)}
+                       for name, v in stages.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the voice pipeline headless on recorded audio.")
+    parser.add_argument('--audio', nargs='+', required=True, help="WAV files to replay, one session each")
+    parser.add_argument('--stub-llm', action='store_true', help="Use a canned planner instead of the LLM")
+    parser.add_argument('--stub-delay', type=float, default=0.0, help="Artificial stub planner latency (s)")
+    parser.add_argument('--dispatch', action='store_true', help="Actually execute plan steps")
+    parser.add_argument('--speak', action='store_true', help="Play responses through TTS")
+    parser.add_argument('--realtime', action='store_true', help="Pace audio at real-time speed")
+    args = parser.parse_args()
+
+    from core.audio import WavAudioSource
+    from core.listener import Listener
+    from core.stt import SpeechToText
+    from services.startup import warm_up_components
+    config = load_config()
+    stt = SpeechToText()
+    if args.stub_llm:
+        planner: Any = StubPlanner(args.stub_delay)
+    else:
+        from services.main import get_orchestrator
+        planner = OrchestratorPlanner(get_orchestrator())
+    dispatcher = None
+    if args.dispatch:
+        from core.action_dispatcher import ActionDispatcher
+        dispatcher = ActionDispatcher()
+    speaker = None
+    if args.speak:
+        from core.tts import TextToSpeech
+        speaker = TextToSpeech()
+    # Models load in the background while the listener already takes audio; the
+    # first transcription waits for the STT model if it is not ready yet.
+    warm_up = warm_up_components(config, stt=stt, tts=speaker)
+    listener = Listener()
+    barge_in = None
+    if speaker is not None and config.get('barge_in', {}).get('enabled', True):
+        from core.barge_in import BargeInMonitor
+        barge_in = BargeInMonitor(speaker, listener.vad, config)
+    pipeline = VoicePipeline(listener, stt, planner, dispatcher, speaker, config, barge_in)
+    sources = [WavAudioSource(path, realtime=args.realtime) for path in args.audio]
+    started = time.perf_counter()
+    turns = asyncio.run(pipeline.run(sources))
+    wall = time.perf_counter() - started
+    pipeline.close()
+    warm_up.shutdown()
+    for turn in turns:
+        print(json.dumps(turn.to_dict()))
+    print(json.dumps(summarize(turns, wall), indent=2))
+    print(json.dumps({'startup': warm_up.status(), 'spans': get_tracer().snapshot()}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Startup module: background warm-up of models and the browser, with readiness tracking.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+import asyncio
+import inspect
+import threading
+import time
+from core.tracing import get_tracer
+from core.utils import logger, load_config
+
+
+@dataclass
+class WarmUpTask:
+    """
+    One component being warmed up.
+
+    Attributes:
+        name (str): Component name, e.g. 'stt'.
+        state (str): pending | running | ready | failed.
+        seconds (Optional[float]): How long the warm-up took, once finished.
+        error (Optional[str]): Why it failed.
+    """
+    name: str
+    warm: Callable[[], Any]
+    state: str = 'pending'
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'state': self.state, 'seconds': round(self.seconds, 3) if self.seconds is not None else None,
+                'error': self.error}
+
+
+class WarmUp:
+    """
+    Preloads components in the background so the process can take audio and requests right away.
+
+    Plain callables (e.g. `SpeechToText.preload`) run on a small thread pool.
+    Coroutine functions (e.g. `BrowserAgent.start`, whose browser belongs to
+    the loop that starts it) are scheduled on `loop`. A component used before
+    its warm-up finishes waits for that same load, since `core.model_cache`
+    loads each model once. Failures are logged and leave the component to
+    load on first use. Each warm-up time is recorded as `startup.<name>`.
+    """
+    def __init__(self, max_workers: int = 2) -> None:
+        self.max_workers = max_workers
+        self.tasks: Dict[str, WarmUpTask] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._futures: Dict[str, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def add(self, name: str, warm: Callable[[], Any]) -> 'WarmUp':
+        """
+        Registers a warm-up; call before `start`.
+        """
+        self.tasks[name] = WarmUpTask(name, warm)
+        return self
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> 'WarmUp':
+        """
+        Starts every registered warm-up and returns immediately.
+
+        Args:
+            loop (Optional[asyncio.AbstractEventLoop]): Loop for coroutine warm-ups;
+                the running loop by default.
+        """
+        self.started_at = time.perf_counter()
+        if not self.tasks:
+            self.finished_at = self.started_at
+        for task in self.tasks.values():
+            if inspect.iscoroutinefunction(task.warm):
+                loop = loop or asyncio.get_running_loop()
+                future = asyncio.run_coroutine_threadsafe(self._run_async(task), loop)
+            else:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='warm-up')
+                future = self._executor.submit(self._run, task)
+            self._futures[task.name] = future
+        return self
+
+    def _begin(self, task: WarmUpTask) -> float:
+        task.state = 'running'
+        logger.info(f"Warming up {task.name}...")
+        return time.perf_counter()
+
+    def _finish(self, task: WarmUpTask, started: float, error: Optional[BaseException] = None) -> None:
+        task.seconds = time.perf_counter() - started
+        if error is None:
+            task.state = 'ready'
+            logger.info(f"{task.name} ready in {task.seconds:.2f}s")
+        else:
+            task.state, task.error = 'failed', f"{type(error).__name__}: {error}"
+            logger.error(f"Warm-up of {task.name} failed, it will load on first use: {error}")
+        get_tracer().observe(f'startup.{task.name}', task.seconds)
+        with self._lock:
+            if all(t.state in ('ready', 'failed') for t in self.tasks.values()):
+                self.finished_at = time.perf_counter()
+
+    def _run(self, task: WarmUpTask) -> None:
+        started = self._begin(task)
+        try:
+            task.warm()
+        except Exception as e:
+            self._finish(task, started, e)
+        else:
+            self._finish(task, started)
+
+    async def _run_async(self, task: WarmUpTask) -> None:
+        started = self._begin(task)
+        try:
+            await task.warm()
+        except Exception as e:
+            self._finish(task, started, e)
+        else:
+            self._finish(task, started)
+
+    def _selected(self, name: Optional[str]) -> List[Future]:
+        return [self._futures[name]] if name is not None else list(self._futures.values())
+
+    def ready(self, name: Optional[str] = None) -> bool:
+        """
+        Whether the named warm-up (or every warm-up) succeeded.
+        """
+        tasks = [self.tasks[name]] if name is not None else list(self.tasks.values())
+        return all(task.state == 'ready' for task in tasks)
+
+    def done(self) -> bool:
+        """
+        Whether every warm-up has finished, successfully or not.
+        """
+        return all(future.done() for future in self._futures.values())
+
+    def wait(self, name: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the named warm-up (or every warm-up) finishes.
+
+        Do not call it from the loop that runs coroutine warm-ups; use `wait_ready`.
+
+        Returns:
+            bool: True if it finished and succeeded within `timeout`.
+        """
+        _, pending = wait(self._selected(name), timeout=timeout)
+        return not pending and self.ready(name)
+
+    async def wait_ready(self, name: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """
+        `wait` for async callers.
+        """
+        futures = [asyncio.wrap_future(f) for f in self._selected(name)]
+        if futures:
+            await asyncio.wait(futures, timeout=timeout)
+        return all(f.done() for f in futures) and self.ready(name)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Per-component state and timings, plus the overall time to ready.
+        """
+        time_to_ready = None
+        if self.started_at is not None and self.finished_at is not None:
+            time_to_ready = round(self.finished_at - self.started_at, 3)
+        return {'ready': self.ready(), 'done': self.done(), 'time_to_ready_s': time_to_ready,
+                'components': {name: task.to_dict() for name, task in self.tasks.items()}}
+
+    def shutdown(self) -> None:
+        """
+        Stops the warm-up threads without waiting for loads in progress.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+def warm_up_components(config: Optional[Dict[str, Any]] = None, loop: Optional[asyncio.AbstractEventLoop] = None,
+                       **components: Any) -> WarmUp:
+    """
+    Starts warming up the given components that `startup.warm_up` lists.
+
+    Components are passed by name (stt=..., tts=..., embedder=..., browser=...);
+    None entries are skipped. Components with an async `start` (the browser)
+    are started on `loop`; the rest are preloaded on `startup.workers` threads.
+
+    Returns:
+        WarmUp: The started warm-up, for `ready`, `wait` and `status`.
+    """
+    config = config if config is not None else load_config()
+    startup_config = config.get('startup', {})
+    enabled = startup_config.get('warm_up', ['stt', 'tts', 'embedder'])
+    warm_up = WarmUp(max_workers=startup_config.get('workers', 2))
+    for name, component in components.items():
+        if component is None or name not in enabled:
+            continue
+        start = getattr(component, 'start', None)
+        warm_up.add(name, start if inspect.iscoroutinefunction(start) else component.preload)
+    return warm_up.start(loop)
@@ -1,8 +1,17 @@
+import asyncio
+import os
+import sys
+import time
 import pytest
 from unittest.mock import patch, MagicMock
-from services.action_dispatcher import ActionDispatcher
+from core.action_dispatcher import ActionDispatcher, build_graph
 
-@patch('services.action_dispatcher.subprocess.run')
+
+def _dispatcher(**config):
+    with patch('core.action_dispatcher.load_config', return_value={'dispatcher': config}):
+        return ActionDispatcher()
+
+@patch('core.action_dispatcher.subprocess.run')
 def test_dispatch_happy_path(mock_run):
     # Arrange
     mock_run.return_value = MagicMock(returncode=0, stdout='ok', stderr='')
@@ -13,9 +22,149 @@ def test_dispatch_happy_path(mock_run):
     # Assert
     assert result == 0
 
-@patch('services.action_dispatcher.subprocess.run')
+@patch('core.action_dispatcher.subprocess.run')
 def test_dispatch_missing_command(mock_run):
     dispatcher = ActionDispatcher()
     step = {}
     result = dispatcher.dispatch(step)
-    assert result is None 
\ No newline at end of file
+    assert result is None
+
+def test_build_graph_is_sequential_without_declared_dependencies():
+    graph = build_graph([{'command': 'a'}, {'command': 'b'}, {'command': 'c'}])
+    assert [deps for _, deps in graph.values()] == [[], ['0'], ['1']]
+    assert [deps for _, deps in build_graph([{'command': 'a'}, {'command': 'b'}], sequential=False).values()] == [[], []]
+
+def test_build_graph_uses_declared_dependencies():
+    graph = build_graph([{'id': 'a', 'command': 'x'}, {'id': 'b', 'command': 'y'},
+                         {'id': 'c', 'command': 'z', 'depends_on': ['a', 'b']}])
+    assert graph['a'][1] == [] and graph['b'][1] == [] and graph['c'][1] == ['a', 'b']
+
+@pytest.mark.parametrize('steps, message', [
+    ([{'id': 'a', 'depends_on': 'b'}, {'id': 'b', 'depends_on': 'a'}], 'cycle'),
+    ([{'id': 'a', 'depends_on': ['missing']}], 'unknown'),
+    ([{'id': 'a'}, {'id': 'a'}], 'Duplicate'),
+])
+def test_build_graph_rejects_invalid_plans(steps, message):
+    with pytest.raises(ValueError, match=message):
+        build_graph(steps)
+
+def test_argv_only_uses_a_shell_for_shell_syntax():
+    assert ActionDispatcher.argv({'command': 'ls -la "my dir"'}) == ['ls', '-la', 'my dir']
+    assert ActionDispatcher.argv({'command': 'ls | wc -l'}) == ['/bin/sh', '-c', 'ls | wc -l']
+    assert ActionDispatcher.argv({'command': ['echo', 1]}) == ['echo', '1']
+    assert ActionDispatcher.argv({'command': 'echo hi', 'shell': True}) == ['/bin/sh', '-c', 'echo hi']
+
+@pytest.mark.parametrize('command', ['FOO=1 make', 'cd build', 'export X=1', 'source ~/.profile', 'umask 022'])
+def test_argv_sends_assignments_and_builtins_to_a_shell(command):
+    assert ActionDispatcher.argv({'command': command}) == ['/bin/sh', '-c', command]
+
+@pytest.mark.asyncio
+async def test_assignments_and_builtins_run_in_a_shell(tmp_path):
+    # Arrange
+    dispatcher = _dispatcher()
+    steps = [{'id': 'env', 'command': 'FOO=bar printenv FOO', 'depends_on': []},
+             {'id': 'cd', 'command': f'cd {tmp_path}', 'depends_on': []}]
+    # Act
+    results = await dispatcher.execute(steps)
+    # Assert
+    assert results['env'].ok and list(results['env'].stdout) == ['bar']
+    assert results['cd'].ok
+
+@pytest.mark.asyncio
+async def test_independent_steps_run_concurrently():
+    # Arrange
+    dispatcher = _dispatcher(max_concurrency=4)
+    steps = [{'id': str(i), 'command': 'sleep 0.3', 'depends_on': []} for i in range(3)]
+    # Act
+    started = time.perf_counter()
+    results = await dispatcher.execute(steps)
+    elapsed = time.perf_counter() - started
+    # Assert
+    assert all(r.ok and r.returncode == 0 for r in results.values())
+    assert elapsed < 0.8
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_and_dependencies_order_steps():
+    # Arrange
+    dispatcher = _dispatcher(max_concurrency=1)
+    steps = [{'id': 'a', 'command': 'sleep 0.1', 'depends_on': []},
+             {'id': 'b', 'command': 'sleep 0.1', 'depends_on': []},
+             {'id': 'c', 'command': 'echo done', 'depends_on': ['a', 'b']}]
+    # Act
+    results = await dispatcher.execute(steps)
+    # Assert
+    a, b, c = results['a'], results['b'], results['c']
+    assert min(a.ended_at, b.ended_at) <= max(a.started_at, b.started_at)
+    assert c.started_at >= max(a.ended_at, b.ended_at)
+    assert list(c.stdout) == ['done']
+
+@pytest.mark.asyncio
+async def test_failed_step_skips_its_dependents():
+    # Arrange
+    dispatcher = _dispatcher()
+    steps = [{'command': 'false'}, {'command': 'echo never'}]
+    # Act
+    results = await dispatcher.execute(steps)
+    # Assert
+    assert results['0'].status == 'failed' and results['0'].returncode == 1
+    assert results['1'].status == 'skipped'
+
+@pytest.mark.asyncio
+async def test_missing_executable_is_an_error_not_an_exception():
+    results = await _dispatcher().execute([{'command': 'definitely-not-a-command-xyz'}])
+    assert results['0'].status == 'error' and results['0'].returncode is None
+
+@pytest.mark.asyncio
+async def test_step_is_killed_after_timeout():
+    # Arrange
+    dispatcher = _dispatcher(kill_grace_s=0.5)
+    # Act
+    started = time.perf_counter()
+    results = await dispatcher.execute([{'command': 'sleep 5', 'timeout_s': 0.2}])
+    # Assert
+    assert results['0'].status == 'timeout'
+    assert time.perf_counter() - started < 2
+
+@pytest.mark.asyncio
+async def test_oversized_output_line_stops_the_step_with_an_error():
+    # Arrange
+    dispatcher = _dispatcher(kill_grace_s=0.5)
+    command = [sys.executable, '-c', "import sys, time; sys.stdout.write('x' * (2 * 2**20)); sys.stdout.flush(); time.sleep(5)"]
+    # Act
+    started = time.perf_counter()
+    results = await dispatcher.execute([{'command': command}, {'command': 'echo next'}])
+    # Assert
+    assert results['0'].status == 'error'
+    assert results['1'].status == 'skipped'
+    assert time.perf_counter() - started < 2
+
+@pytest.mark.asyncio
+async def test_output_is_streamed_before_the_step_exits():
+    # Arrange
+    dispatcher = _dispatcher()
+    lines = []
+    # Act
+    results = await dispatcher.execute([{'command': 'echo one; sleep 0.3; echo two >&2'}],
+                                       on_output=lambda step_id, stream, line: lines.append((stream, line, time.perf_counter())))
+    # Assert
+    assert [(stream, line) for stream, line, _ in lines] == [('stdout', 'one'), ('stderr', 'two')]
+    assert results['0'].ended_at - lines[0][2] >= 0.25
+    assert list(results['0'].stderr) == ['two']
+
+@pytest.mark.asyncio
+async def test_stream_yields_events_and_cancelling_kills_processes():
+    # Arrange
+    dispatcher = _dispatcher()
+    events = []
+    # Act
+    stream = dispatcher.stream([{'command': 'echo $$; sleep 5'}])
+    async for event in stream:
+        events.append(event)
+        if event.kind == 'stdout':
+            break
+    await stream.aclose()
+    await asyncio.sleep(0.1)
+    # Assert
+    assert [e.kind for e in events] == ['start', 'stdout']
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(events[1].data), 0)
@@ -0,0 +1,34 @@
+import os
+import numpy as np
+from core.array_cache import ArrayCache, content_key
+
+def test_disk_hit_is_memory_mapped(tmp_path):
+    # Arrange
+    key = content_key('model', 'hello')
+    ArrayCache(str(tmp_path)).put(key, np.arange(10, dtype=np.int16))
+    cache = ArrayCache(str(tmp_path))
+    # Act
+    first = cache.get(key)
+    second = cache.get(key)
+    # Assert
+    assert isinstance(first, np.memmap)
+    assert np.array_equal(second, np.arange(10))
+    assert (cache.disk_hits, cache.memory_hits, cache.misses) == (1, 1, 0)
+
+def test_miss_is_counted(tmp_path):
+    cache = ArrayCache(str(tmp_path))
+    assert cache.get(content_key('nothing')) is None
+    assert cache.stats['misses'] == 1 and cache.stats['hit_rate'] == 0.0
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    # Arrange
+    cache = ArrayCache(str(tmp_path), max_bytes=2500, memory_items=0)
+    for i, name in enumerate(['a', 'b']):
+        cache.put(name, np.zeros(500, dtype=np.int16))
+        os.utime(tmp_path / f'{name}.npy', (i, i))
+    cache.get('a')  # refreshes 'a'
+    # Act
+    cache.put('c', np.zeros(500, dtype=np.int16))
+    # Assert
+    assert sorted(os.listdir(tmp_path)) == ['a.npy', 'c.npy']
+    assert cache.total_bytes <= 2500
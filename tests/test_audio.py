@@ -0,0 +1,48 @@
+"""
+Tests for the audio module.
+Covers ring buffer wraparound/overflow and injectable audio sources.
+"""
+import numpy as np
+from core.audio import AudioRingBuffer, ArrayAudioSource, WavAudioSource, write_wav
+
+def test_ring_buffer_wraparound():
+    # Arrange
+    ring = AudioRingBuffer(8)
+    ring.write(np.arange(6, dtype='float32'))
+    ring.read(4)
+    # Act
+    ring.write(np.arange(6, 11, dtype='float32'))
+    result = ring.read(7)
+    # Assert
+    assert np.array_equal(result, np.array([4, 5, 6, 7, 8, 9, 10], dtype='float32'))
+    assert ring.dropped == 0
+
+def test_ring_buffer_overflow_drops_oldest():
+    # Arrange
+    ring = AudioRingBuffer(4)
+    # Act
+    ring.write(np.arange(3, dtype='float32'))
+    ring.write(np.arange(3, 6, dtype='float32'))
+    # Assert
+    assert ring.dropped == 2
+    assert np.array_equal(ring.read(4), np.array([2, 3, 4, 5], dtype='float32'))
+    assert ring.read(1) is None
+
+def test_wav_source_roundtrip(tmp_path):
+    # Arrange
+    path = str(tmp_path / 'tone.wav')
+    audio = 0.5 * np.sin(np.linspace(0, 100, 1600)).astype('float32')
+    write_wav(path, audio, samplerate=16000)
+    source = WavAudioSource(path)
+    # Act
+    chunks = []
+    while (chunk := source.read(480)) is not None:
+        chunks.append(chunk)
+    # Assert
+    assert source.samplerate == 16000
+    assert [len(c) for c in chunks] == [480, 480, 480, 160]
+    assert np.allclose(np.concatenate(chunks), audio, atol=1e-3)
+
+def test_array_source_downmixes_stereo():
+    source = ArrayAudioSource(np.ones((10, 2), dtype='float32'))
+    assert source.read(10).shape == (10,)
@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+import numpy as np
+from core.barge_in import BargeInMonitor, EchoSuppressor
+from core.vad import EnergyVAD
+
+def _tone(amplitude, n=480):
+    return (amplitude * np.sin(np.arange(n) / 16000 * 2 * np.pi * 220)).astype('float32')
+
+def _monitor(speaking=True, playback_level_db=-10.0):
+    tts = MagicMock(speaking=speaking, playback_level_db=playback_level_db)
+    config = {'barge_in': {'min_speech_frames': 3, 'echo_margin_db': -6.0}}
+    return BargeInMonitor(tts, EnergyVAD(), config), tts
+
+def test_echo_suppressor_ignores_attenuated_playback():
+    suppressor = EchoSuppressor(EnergyVAD(), echo_margin_db=-6.0)
+    assert not suppressor.is_user_speech(_tone(0.05), playback_level_db=-10.0)  # about -29 dB
+    assert suppressor.is_user_speech(_tone(0.5), playback_level_db=-10.0)  # about -9 dB
+    assert suppressor.is_user_speech(_tone(0.05), playback_level_db=None)
+
+@pytest.mark.asyncio
+async def test_user_speech_cancels_registered_work():
+    # Arrange
+    monitor, tts = _monitor()
+    planning = monitor.register(asyncio.create_task(asyncio.sleep(10)))
+    # Act
+    triggered = [monitor.feed(_tone(0.5)) for _ in range(3)]
+    await asyncio.sleep(0)
+    # Assert
+    assert triggered == [False, False, True]
+    tts.stop.assert_called_once()
+    assert planning.cancelled()
+    assert monitor.barged_in.is_set()
+
+@pytest.mark.asyncio
+async def test_echo_and_idle_frames_do_not_interrupt():
+    # Arrange
+    monitor, tts = _monitor()
+    idle_monitor, idle_tts = _monitor(speaking=False)
+    # Act
+    for _ in range(10):
+        monitor.feed(_tone(0.05))
+        idle_monitor.feed(_tone(0.5))
+    # Assert
+    tts.stop.assert_not_called()
+    idle_tts.stop.assert_not_called()
+    assert monitor.interruptions == 0
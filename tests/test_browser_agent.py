@@ -1,17 +1,56 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
-from ai_agents.browser_agent import BrowserAgent
+
+from ai_agents.browser_agent import HTML_PARSERS, BrowserAgent, extract_text, html_parser, needs_javascript
+
+STATIC_PAGE = '<html><head><title>Docs</title></head><body><h1>Install</h1><p>' + 'Run pip install. ' * 20 + '</p></body></html>'
+JS_SHELL = '<html><body><div id="root"></div><script src="/app.js"></script></body></html>'
+
+
+@pytest.fixture(autouse=True)
+def browser_only():
+    with patch('ai_agents.browser_agent.load_config', return_value={'browser_agent': {'fetch_mode': 'browser'}}):
+        yield
+
+
+def _http_agent(handler, **config):
+    with patch('ai_agents.browser_agent.load_config', return_value={'browser_agent': {'fetch_mode': 'auto', **config}}):
+        return BrowserAgent(transport=httpx.MockTransport(handler))
+
+
+def _page(html='<html><body><p>Hello</p></body></html>'):
+    page = AsyncMock()
+    page.is_closed = MagicMock(return_value=False)
+    page.content.return_value = html
+    return page
+
+
+def _browser(pages):
+    browser = AsyncMock()
+    browser.is_connected = MagicMock(return_value=True)
+    context = AsyncMock()
+    context.new_page.side_effect = pages
+    browser.new_context.return_value = context
+    return browser
+
+
+def _launch(mock_playwright, *browsers):
+    playwright = AsyncMock()
+    playwright.chromium.launch.side_effect = list(browsers)
+    mock_playwright.return_value.start = AsyncMock(return_value=playwright)
+    return playwright
+
 
 @pytest.mark.asyncio
 @patch('ai_agents.browser_agent.async_playwright')
 @patch('ai_agents.browser_agent.BeautifulSoup')
 async def test_fetch_text_happy_path(mock_bs, mock_playwright):
     # Arrange
-    mock_browser = AsyncMock()
-    mock_page = AsyncMock()
-    mock_page.content.return_value = '<html><body><p>Hello</p></body></html>'
-    mock_browser.new_page.return_value = mock_page
-    mock_playwright.return_value.__aenter__.return_value.chromium.launch.return_value = mock_browser
+    _launch(mock_playwright, _browser([_page()]))
     mock_bs.return_value.get_text.return_value = 'Hello'
     agent = BrowserAgent()
     # Act
@@ -28,4 +67,271 @@ async def test_fetch_text_failure(mock_playwright):
     # Act
     result = await agent.fetch_text('http://example.com')
     # Assert
-    assert result is None 
\ No newline at end of file
+    assert result is None
+
+@pytest.mark.asyncio
+@patch('ai_agents.browser_agent.async_playwright')
+async def test_browser_and_page_are_reused_across_fetches(mock_playwright):
+    # Arrange
+    page = _page()
+    browser = _browser([page])
+    playwright = _launch(mock_playwright, browser)
+    agent = BrowserAgent()
+    # Act
+    results = [await agent.fetch_text('http://example.com/a'), await agent.fetch_text('http://example.com/b', 'p')]
+    await agent.close()
+    # Assert
+    assert results == ['Hello', 'Hello']
+    assert playwright.chromium.launch.await_count == 1
+    assert browser.new_context.return_value.new_page.await_count == 1
+    assert page.goto.await_count == 2
+    browser.close.assert_awaited_once()
+
+@pytest.mark.asyncio
+@patch('ai_agents.browser_agent.load_config', return_value={'browser_agent': {'fetch_mode': 'browser', 'max_pages': 2}})
+@patch('ai_agents.browser_agent.async_playwright')
+async def test_fetch_many_is_bounded_by_page_pool(mock_playwright, _):
+    # Arrange
+    active, peak = 0, 0
+
+    async def goto(url, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    pages = [_page(f'<p>{i}</p>') for i in range(2)]
+    for page in pages:
+        page.goto.side_effect = goto
+    _launch(mock_playwright, _browser(pages))
+    agent = BrowserAgent()
+    # Act
+    results = await agent.fetch_many([f'http://example.com/{i}' for i in range(6)])
+    # Assert
+    assert sorted(results) == ['0'] * 3 + ['1'] * 3
+    assert peak == 2
+
+@pytest.mark.asyncio
+@patch('ai_agents.browser_agent.async_playwright')
+async def test_crashed_browser_is_relaunched_and_fetch_retried(mock_playwright):
+    # Arrange
+    crashed_page = _page()
+    crashed = _browser([crashed_page])
+
+    async def crash(url, **kwargs):
+        crashed.is_connected.return_value = False
+        raise Exception('Target closed')
+
+    crashed_page.goto.side_effect = crash
+    playwright = _launch(mock_playwright, crashed, _browser([_page()]))
+    agent = BrowserAgent()
+    # Act
+    result = await agent.fetch_text('http://example.com')
+    # Assert
+    assert result == 'Hello'
+    assert agent.restarts == 1
+    assert playwright.chromium.launch.await_count == 2
+
+@pytest.mark.asyncio
+async def test_route_blocks_configured_resource_types():
+    # Arrange
+    agent = BrowserAgent()
+    image, document = AsyncMock(), AsyncMock()
+    image.request.resource_type = 'image'
+    document.request.resource_type = 'document'
+    # Act
+    await agent._route(image)
+    await agent._route(document)
+    # Assert
+    image.abort.assert_awaited_once()
+    document.continue_.assert_awaited_once()
+    document.abort.assert_not_awaited()
+
+
+@pytest.mark.parametrize('parser', HTML_PARSERS)
+def test_parsers_extract_the_same_text(parser):
+    if html_parser(parser) != parser:
+        pytest.skip(f"{parser} is not installed")
+    html = '<html><head><title>T</title><style>p {}</style></head><body><p>Hello <b>you</b></p><script>var a</script></body></html>'
+    assert extract_text(html, parser=parser) == 'T Hello you'
+    assert extract_text(html, 'p', parser=parser) == 'Helloyou'
+    assert extract_text(html, 'h2', parser=parser) is None
+
+def test_needs_javascript_detects_app_shells():
+    assert needs_javascript(JS_SHELL, '', 200)
+    assert needs_javascript('<p>Please enable JavaScript to continue.</p>', 'Please enable JavaScript to continue.')
+    assert needs_javascript('<p>x</p><script></script>', 'x', 200)
+    assert needs_javascript('<p>x</p>', None)
+    assert not needs_javascript(STATIC_PAGE, extract_text(STATIC_PAGE), 200)
+
+def test_noscript_notice_on_a_static_page_is_not_an_app_shell():
+    # Arrange
+    html = STATIC_PAGE.replace('<body>', '<body><noscript>Please enable JavaScript for comments.</noscript>')
+    # Act
+    result = needs_javascript(html, extract_text(html), 200)
+    # Assert
+    assert result is False
+
+@pytest.mark.asyncio
+@patch('ai_agents.browser_agent.async_playwright')
+async def test_large_pages_are_parsed_off_the_event_loop(mock_playwright):
+    # Arrange
+    agent = _http_agent(lambda request: httpx.Response(200, html=STATIC_PAGE), offload_chars=100)
+    loop_thread = threading.current_thread()
+    threads = []
+    def extract(html, selector, parser):
+        threads.append(threading.current_thread())
+        return extract_text(html, selector, parser)
+    # Act
+    with patch('ai_agents.browser_agent.extract_text', side_effect=extract):
+        result = await agent.fetch_text('http://docs.example.com/install', selector='h1')
+    await agent.close()
+    # Assert
+    assert result == 'Install'
+    assert threads and threads[0] is not loop_thread
+
+@pytest.mark.asyncio
+@patch('ai_agents.browser_agent.async_playwright')
+async def test_static_page_is_served_over_http_without_the_browser(mock_playwright):
+    # Arrange
+    agent = _http_agent(lambda request: httpx.Response(200, html=STATIC_PAGE))
+    # Act
+    result = await agent.fetch_text('http://docs.example.com/install', selector='h1')
+    await agent.close()
+    # Assert
+    assert result == 'Install'
+    mock_playwright.assert_not_called()
+    assert agent.stats['http'] == 1 and agent.stats['browser'] == 0
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('response', [httpx.Response(200, html=JS_SHELL), httpx.Response(403, text='blocked'),
+                                      httpx.Response(200, content=b'%PDF', headers={'content-type': 'application/pdf'})])
+@patch('ai_agents.browser_agent.async_playwright')
+async def test_escalates_to_browser_when_static_fetch_is_not_enough(mock_playwright, response):
+    # Arrange
+    _launch(mock_playwright, _browser([_page('<html><body><p>Rendered</p></body></html>')]))
+    agent = _http_agent(lambda request: response)
+    # Act
+    result = await agent.fetch_text('http://app.example.com')
+    # Assert
+    assert result == 'Rendered'
+    assert agent.stats['browser'] == 1
+
+@pytest.mark.asyncio
+async def test_http_mode_never_launches_the_browser():
+    # Arrange
+    agent = _http_agent(lambda request: httpx.Response(200, html=JS_SHELL), fetch_mode='http')
+    # Act
+    result = await agent.fetch_text('http://app.example.com')
+    # Assert
+    assert result is None
+    assert agent._browser is None
+
+@pytest.mark.asyncio
+async def test_cached_text_is_reused_then_revalidated_with_etag():
+    # Arrange
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get('if-none-match') == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, html=STATIC_PAGE, headers={'etag': '"v1"', 'last-modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+
+    agent = _http_agent(handler, cache={'ttl_s': 60})
+    # Act
+    with patch('ai_agents.browser_agent.time.time', return_value=1000.0):
+        first = await agent.fetch_text('http://docs.example.com', 'h1')
+        second = await agent.fetch_text('http://docs.example.com', 'h1')
+    with patch('ai_agents.browser_agent.time.time', return_value=1100.0):
+        third = await agent.fetch_text('http://docs.example.com', 'h1')
+    # Assert
+    assert first == second == third == 'Install'
+    assert len(requests) == 2
+    assert requests[1].headers['if-modified-since'] == 'Mon, 01 Jan 2024 00:00:00 GMT'
+    assert agent.stats == {'cache_hits': 1, 'revalidated': 1, 'http': 1, 'browser': 0}
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_cached_url():
+    # Arrange
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, html=STATIC_PAGE)
+
+    agent = _http_agent(handler)
+    await agent.fetch_text('http://docs.example.com')
+    # Act
+    agent.invalidate('http://docs.example.com')
+    await agent.fetch_text('http://docs.example.com')
+    # Assert
+    assert len(requests) == 2
+
+
+@pytest.fixture
+def local_site():
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            if self.path.endswith('.png'):
+                body, content_type = b'\x89PNG\r\n', 'image/png'
+            elif self.path.startswith('/app'):
+                body = f'<html><body><div id="app"></div><script>document.getElementById("app").innerHTML = '
+                body = (body + f'"<h1>{self.path}</h1>"</script><img src="/logo.png"></body></html>').encode()
+                content_type = 'text/html'
+            else:
+                body = f'<html><body><h1>{self.path}</h1><img src="/logo.png"></body></html>'.encode()
+                content_type = 'text/html'
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}', requested
+    server.shutdown()
+    server.server_close()
+
+@pytest.mark.asyncio
+async def test_static_pages_from_local_server_skip_the_browser(local_site):
+    # Arrange
+    base_url, requested = local_site
+    with patch('ai_agents.browser_agent.load_config', return_value={'browser_agent': {'fetch_mode': 'http'}}):
+        agent = BrowserAgent()
+    # Act
+    results = await agent.fetch_many([f'{base_url}/page{i}' for i in range(5)], selector='h1')
+    await agent.close()
+    # Assert
+    assert results == [f'/page{i}' for i in range(5)]
+    assert '/logo.png' not in requested
+
+@pytest.mark.asyncio
+async def test_fetch_many_against_local_server(local_site):
+    # Arrange
+    pytest.importorskip('playwright.async_api')
+    base_url, requested = local_site
+    with patch('ai_agents.browser_agent.load_config', return_value={'browser_agent': {'fetch_mode': 'auto'}}):
+        agent = BrowserAgent()
+    try:
+        await agent.start()
+    except Exception as e:
+        pytest.skip(f"Chromium is not available: {e}")
+    # Act
+    try:
+        results = await agent.fetch_many([f'{base_url}/app{i}' for i in range(5)], selector='h1')
+    finally:
+        await agent.close()
+    # Assert
+    assert results == [f'/app{i}' for i in range(5)]
+    assert agent.stats['browser'] == 5
+    assert '/logo.png' not in requested
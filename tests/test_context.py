@@ -0,0 +1,129 @@
+import sys
+import pytest
+from unittest.mock import MagicMock, patch
+from core.context import ContextBuilder, count_tokens, truncate_tokens
+
+
+def _builder(store=None, embed=None, **config):
+    return ContextBuilder({'context': {'tokenizer': 'approx', **config}}, memory=store, embed=embed)
+
+
+def test_count_tokens_counts_word_pieces_and_punctuation():
+    assert count_tokens("open the browser") == 4
+    assert count_tokens("hi, there!") == 5
+    assert count_tokens("") == 0
+
+
+def test_truncate_tokens_cuts_at_word_boundary():
+    # Arrange
+    text = "one two three four five six seven eight"
+    # Act
+    short = truncate_tokens(text, 5)
+    # Assert
+    assert short.endswith(' ...')
+    assert count_tokens(short) <= 5
+    assert text.startswith(short[:-4])
+    assert truncate_tokens("open it", 5) == "open it"
+
+
+def test_auto_tokenizer_falls_back_when_tiktoken_fails_to_load():
+    # Arrange
+    tiktoken = MagicMock()
+    tiktoken.get_encoding.side_effect = ValueError("could not download encoding")
+    # Act
+    with patch.dict(sys.modules, {'tiktoken': tiktoken}):
+        builder = ContextBuilder({'context': {'tokenizer': 'auto'}})
+        # Assert
+        assert builder.count is count_tokens
+        with pytest.raises(ValueError):
+            ContextBuilder({'context': {'tokenizer': 'tiktoken'}})
+
+
+def test_build_without_history_is_just_the_request():
+    assert _builder().build("open the browser") == "Plan the following: open the browser"
+
+
+def test_recent_turns_are_verbatim_and_older_ones_summarized():
+    # Arrange
+    context = _builder(recent_turns=2)
+    for i in range(4):
+        context.add_turn(f"request {i}", f"reply {i}")
+    # Act
+    prompt = context.build("next request")
+    # Assert
+    assert "Recent conversation:\nUser: request 2\nAssistant: reply 2\nUser: request 3\nAssistant: reply 3" in prompt
+    assert "Earlier in this conversation:\n- request 0 -> reply 0\n- request 1 -> reply 1" in prompt
+    assert prompt.endswith("Plan the following: next request")
+
+
+def test_summary_keeps_latest_of_repeated_requests():
+    # Arrange
+    context = _builder(recent_turns=1)
+    context.add_turn("Open the browser", "first")
+    context.add_turn("other", "x")
+    context.add_turn("open the browser!", "second")
+    context.add_turn("last", "y")
+    # Act
+    summary = [line for _, line in context.summary]
+    # Assert
+    assert summary == ["- other -> x", "- open the browser! -> second"]
+
+
+def test_prompt_stays_within_token_budget():
+    # Arrange
+    context = _builder(token_budget=60, recent_turns=3, summary_tokens=500)
+    for i in range(50):
+        context.add_turn(f"please do task number {i} with some extra words", f"done with task {i}")
+    # Act
+    prompt = context.build("what next")
+    # Assert
+    assert count_tokens(prompt) <= 60
+    assert "User: please do task number 49" in prompt
+    assert "task number 0 " not in prompt
+
+
+def test_retrieve_filters_by_similarity_and_skips_turns_in_context():
+    # Arrange
+    memory = MagicMock()
+    memory.query_scored.return_value = [
+        ('a', {'kind': 'turn', 'user': 'what is the weather', 'assistant': 'sunny'}, 0.1),
+        ('b', {'kind': 'turn', 'user': 'open the browser', 'assistant': 'ok'}, 0.2),
+        ('c', {'kind': 'turn', 'user': 'play music', 'assistant': 'playing'}, 0.25),
+        ('d', {'kind': 'turn', 'user': 'set a timer', 'assistant': 'set'}, 0.9),
+    ]
+    context = _builder(store=memory, embed=MagicMock(return_value=[1.0, 0.0]), memory={'top_k': 3})
+    context.add_turn("Open the browser", "ok")
+    # Act
+    prompt = context.build("weather tomorrow")
+    # Assert
+    assert "Relevant past requests:\n- what is the weather -> sunny\n- play music -> playing" in prompt
+    assert "set a timer" not in prompt
+    assert prompt.count("open the browser") + prompt.count("Open the browser") == 1
+    assert memory.query_scored.call_args.kwargs['where'] == {'kind': 'turn'}
+
+
+def test_add_turn_writes_to_memory_behind():
+    # Arrange
+    memory = MagicMock()
+    context = _builder(store=memory, embed=MagicMock(return_value=[0.5, 0.5]))
+    # Act
+    context.add_turn("open the browser", "Opening.")
+    # Assert
+    embedding, metadata = memory.ingest_later.call_args.args
+    assert embedding == [0.5, 0.5]
+    assert metadata['kind'] == 'turn' and metadata['user'] == "open the browser"
+    assert metadata['assistant'] == "Opening."
+
+
+def test_memory_failures_do_not_break_prompt_assembly():
+    # Arrange
+    memory = MagicMock()
+    memory.query_scored.side_effect = RuntimeError("down")
+    memory.ingest_later.side_effect = RuntimeError("down")
+    context = _builder(store=memory, embed=MagicMock(return_value=[1.0]))
+    # Act
+    context.add_turn("a", "b")
+    prompt = context.build("c")
+    # Assert
+    assert prompt.endswith("Plan the following: c")
+    assert "User: a" in prompt
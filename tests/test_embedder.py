@@ -0,0 +1,74 @@
+import pytest
+import numpy as np
+from unittest.mock import patch, MagicMock
+from core.embedder import Embedder, dequantize, quantize
+from core.model_cache import get_model_registry
+
+
+def _fake_encode(texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True):
+    vectors = np.array([[len(t), t.count('a') + 1, 1.0] for t in texts], dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture(autouse=True)
+def clear_model_registry():
+    get_model_registry().clear()
+    yield
+    get_model_registry().clear()
+
+
+@pytest.fixture
+def sentence_transformers():
+    module = MagicMock()
+    module.SentenceTransformer.return_value.encode.side_effect = _fake_encode
+    with patch.dict('sys.modules', {'sentence_transformers': module}):
+        yield module
+
+
+def _embedder(tmp_path, **config):
+    return Embedder({'embedder': {'cache': {'dir': str(tmp_path)}, **config}})
+
+
+def test_encode_batches_unique_misses_and_caches(tmp_path, sentence_transformers):
+    # Arrange
+    embedder = _embedder(tmp_path)
+    model = sentence_transformers.SentenceTransformer.return_value
+    # Act
+    first = embedder.encode(['alpha', 'beta', 'alpha'])
+    second = embedder.encode(['beta', 'gamma'])
+    # Assert
+    assert first.shape == (3, 3) and first.dtype == np.float32
+    assert np.array_equal(first[0], first[2])
+    assert np.array_equal(first[1], second[0])
+    encoded = [c.args[0] for c in model.encode.call_args_list[1:]]
+    assert encoded == [['alpha', 'beta'], ['gamma']]
+
+
+def test_disk_cache_survives_new_instance(tmp_path, sentence_transformers):
+    # Arrange
+    _embedder(tmp_path, storage_dtype='int8').encode(['alpha'])
+    get_model_registry().clear()
+    sentence_transformers.SentenceTransformer.reset_mock()
+    # Act
+    vector = _embedder(tmp_path, storage_dtype='int8').embed('alpha')
+    # Assert
+    sentence_transformers.SentenceTransformer.assert_not_called()
+    assert np.allclose(vector, _fake_encode(['alpha'])[0], atol=0.02)
+
+
+def test_quantize_roundtrip_preserves_similarity():
+    # Arrange
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 384)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    # Act
+    restored = {dtype: dequantize(quantize(vectors, dtype)) for dtype in ('float16', 'int8')}
+    # Assert
+    for dtype, values in restored.items():
+        cosine = np.sum(values * vectors, axis=1)
+        assert cosine.min() > 0.999, dtype
+
+
+def test_unknown_storage_dtype_raises(tmp_path):
+    with pytest.raises(ValueError):
+        _embedder(tmp_path, storage_dtype='bfloat16')
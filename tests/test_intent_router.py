@@ -0,0 +1,51 @@
+import pytest
+from types import SimpleNamespace
+from core.intent_router import IntentRouter
+
+CLOCK = SimpleNamespace(TRIGGERS=["what time is it", "what time is it in {place}"])
+TIMER = SimpleNamespace(TRIGGERS=["set a timer for {minutes} minutes", "{minutes} minute timer"])
+
+
+def test_literal_trigger_matches_normalized_transcript():
+    # Arrange
+    router = IntentRouter.from_skills([CLOCK, TIMER])
+    # Act
+    intent = router.route("What time is it?")
+    # Assert
+    assert intent.skill is CLOCK
+    assert intent.slots == {}
+
+
+def test_slot_triggers_capture_values():
+    # Arrange
+    router = IntentRouter.from_skills([CLOCK, TIMER])
+    # Act
+    place = router.route("What time is it in New York")
+    timer = router.route("set a timer for 5 minutes")
+    leading = router.route("ten minute timer")
+    # Assert
+    assert (place.skill, place.slots) == (CLOCK, {'place': 'new york'})
+    assert (timer.skill, timer.slots) == (TIMER, {'minutes': '5'})
+    assert (leading.skill, leading.slots) == (TIMER, {'minutes': 'ten'})
+
+
+def test_router_misses_partial_matches():
+    # Arrange
+    router = IntentRouter.from_skills([CLOCK, TIMER])
+    # Act / Assert
+    assert router.route("what time is it going to rain") is None
+    assert router.route("set a timer") is None
+    assert router.route("") is None
+
+
+def test_earlier_registration_wins_and_late_adds_are_indexed():
+    # Arrange
+    other = SimpleNamespace(TRIGGERS=["what time is it in {city}"])
+    router = IntentRouter.from_skills([CLOCK, other])
+    # Act
+    first = router.route("what time is it in paris")
+    router.add(other, "play {song} by {artist}")
+    added = router.route("play help by the beatles")
+    # Assert
+    assert first.skill is CLOCK
+    assert (added.skill, added.slots) == (other, {'song': 'help', 'artist': 'the beatles'})
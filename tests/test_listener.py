@@ -2,12 +2,14 @@
 Tests for the Listener module.
 Covers audio recording functionality, including normal and failure cases.
 """
+import asyncio
 import pytest
 from unittest.mock import patch, MagicMock
 import numpy as np
+from core.audio import ArrayAudioSource
 from core.listener import Listener
 
-@patch('services.listener.sd')
+@patch('core.listener.sd')
 def test_record_audio_happy_path(mock_sd):
     # Arrange
     mock_audio = np.ones((48000, 1), dtype='float32')
@@ -23,7 +25,7 @@ def test_record_audio_happy_path(mock_sd):
     assert isinstance(result, np.ndarray)
     assert result.shape[0] == 48000
 
-@patch('services.listener.sd')
+@patch('core.listener.sd')
 def test_record_audio_failure(mock_sd):
     # Arrange
     mock_sd.rec.side_effect = Exception('Microphone error')
@@ -31,4 +33,160 @@ def test_record_audio_failure(mock_sd):
     # Act
     result = listener.record_audio()
     # Assert
-    assert result is None 
\ No newline at end of file
+    assert result is None
+
+@pytest.mark.asyncio
+@patch('core.listener.sd')
+async def test_stream_frames_from_injected_source(mock_sd):
+    # Arrange
+    listener = Listener()
+    listener.samplerate = 16000
+    listener.frame_ms = 30
+    source = ArrayAudioSource(np.zeros(1000, dtype='float32'), samplerate=16000)
+    # Act
+    frames = [frame async for frame in listener.stream_frames(source)]
+    # Assert
+    assert [len(f) for f in frames] == [480, 480, 40]
+    mock_sd.InputStream.assert_not_called()
+
+@pytest.mark.asyncio
+@patch('core.listener.sd')
+async def test_listen_utterance_trims_silence(mock_sd):
+    # Arrange
+    listener = Listener()
+    tone = 0.3 * np.sin(np.arange(16000) / 16000 * 2 * np.pi * 220).astype('float32')
+    audio = np.concatenate([np.zeros(16000, dtype='float32'), tone, np.zeros(32000, dtype='float32')])
+    # Act
+    utterance = await listener.listen_utterance(ArrayAudioSource(audio))
+    # Assert
+    assert utterance is not None
+    assert abs(utterance.start - 1.0) <= 0.03
+    assert abs(utterance.end - 2.0) <= 0.03
+
+@pytest.mark.asyncio
+@patch('core.listener.sd')
+async def test_wake_gated_utterances_skip_speech_before_wake(mock_sd):
+    # Arrange
+    listener = Listener()
+    listener.wake_detector = MagicMock()
+    listener.wake_detector.process.side_effect = lambda frame: False
+    tone = 0.3 * np.sin(np.arange(16000) / 16000 * 2 * np.pi * 220).astype('float32')
+    audio = np.concatenate([tone, np.zeros(16000, dtype='float32')])
+    # Act
+    utterances = [u async for u in listener.wake_gated_utterances(ArrayAudioSource(audio))]
+    # Assert
+    assert utterances == []
+    assert listener.wake_detector.process.call_count == 67
+
+class StubWakeDetector:
+    """
+    Wakes on the `wake_frame`-th frame it sees; counts resets.
+    """
+    def __init__(self, wake_frame):
+        self.wake_frame = wake_frame
+        self.frames = 0
+        self.resets = 0
+
+    def process(self, frame):
+        self.frames += 1
+        return self.frames == self.wake_frame
+
+    def reset(self):
+        self.resets += 1
+
+
+def _tone(seconds):
+    n = int(16000 * seconds)
+    return 0.3 * np.sin(np.arange(n) / 16000 * 2 * np.pi * 220).astype('float32')
+
+def _silence(seconds):
+    return np.zeros(int(16000 * seconds), dtype='float32')
+
+@pytest.mark.asyncio
+@patch('core.listener.sd')
+async def test_wake_gated_utterances_return_the_command_after_wake(mock_sd):
+    # Arrange
+    listener = Listener()
+    listener.wake_detector = StubWakeDetector(wake_frame=20)  # 0.6 s, inside the first pause
+    audio = np.concatenate([_tone(0.5), _silence(0.5), _tone(1.0), _silence(1.0)])
+    # Act
+    utterances = [u async for u in listener.wake_gated_utterances(ArrayAudioSource(audio))]
+    # Assert
+    assert len(utterances) == 1
+    assert abs(utterances[0].start - 1.0) <= 0.03
+    assert abs(utterances[0].end - 2.0) <= 0.03
+    assert listener.wake_detector.resets == 1
+
+@pytest.mark.asyncio
+@patch('core.listener.sd')
+async def test_wake_gated_utterances_sleep_after_listen_timeout(mock_sd):
+    # Arrange
+    listener = Listener()
+    listener.config = {'wakeword': {'listen_timeout_s': 0.3}}
+    listener.wake_detector = StubWakeDetector(wake_frame=5)
+    audio = np.concatenate([_silence(1.0), _tone(1.0), _silence(1.0)])
+    # Act
+    utterances = [u async for u in listener.wake_gated_utterances(ArrayAudioSource(audio))]
+    # Assert
+    assert utterances == []
+    assert listener.wake_detector.resets == 1
+    assert listener.wake_detector.frames > 5
+
+def _with(config, section, **values):
+    return {**config, section: {**config.get(section, {}), **values}}
+
+@pytest.mark.asyncio
+@patch('core.listener.sd')
+async def test_config_changes_apply_at_the_next_stream(mock_sd):
+    # Arrange
+    listener = Listener()
+    source = ArrayAudioSource(np.zeros(4800, dtype='float32'), samplerate=16000)
+    frames = []
+    # Act
+    async for frame in listener.stream_frames(source):
+        if not frames:
+            listener.apply_config(_with(listener.config, 'listener', frame_ms=10))
+        frames.append(len(frame))
+    next_frame = [len(f) async for f in listener.stream_frames(ArrayAudioSource(np.zeros(160, dtype='float32')))]
+    # Assert
+    assert frames == [480] * 10
+    assert next_frame == [160]
+
+@patch('core.listener.sd')
+def test_config_changes_keep_enrolled_wake_templates(mock_sd):
+    # Arrange
+    listener = Listener()
+    listener.apply_config(_with(listener.config, 'wakeword', enabled=True, templates=[]))
+    listener.record_audio()
+    listener.wake_detector.enroll(_tone(0.5))
+    detector = listener.wake_detector
+    # Act
+    listener.apply_config(_with(listener.config, 'listener', duration=5.0))
+    listener.record_audio()
+    unrelated = listener.wake_detector
+    listener.apply_config(_with(listener.config, 'wakeword', sensitivity=0.9))
+    listener.record_audio()
+    # Assert
+    assert unrelated is detector
+    assert listener.wake_detector is not detector
+    assert listener.wake_detector.sensitivity == 0.9
+    assert len(listener.wake_detector.enrolled_templates) == 1
+
+@pytest.mark.asyncio
+@patch('core.listener.sd')
+async def test_monitor_frames_receive_a_copy_of_the_streamed_audio(mock_sd):
+    # Arrange
+    listener = Listener()
+    seen = []
+    async def monitor():
+        async for frame in listener.monitor_frames():
+            seen.append(len(frame))
+    task = asyncio.create_task(monitor())
+    await asyncio.sleep(0)
+    # Act
+    utterances = [u async for u in listener.utterances(ArrayAudioSource(np.concatenate([_tone(0.5), _silence(1.0)])))]
+    await asyncio.sleep(0)
+    task.cancel()
+    # Assert
+    assert len(utterances) == 1
+    assert seen == [480] * 50
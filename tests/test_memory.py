@@ -1,26 +1,95 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from services.memory import Memory
+from core.memory import Memory
 
-@patch('services.memory.chromadb.Client')
-def test_ingest_happy_path(mock_client):
+@pytest.fixture
+def chromadb():
+    module = MagicMock()
+    with patch.dict('sys.modules', {'chromadb': module}):
+        yield module
+
+def test_ingest_happy_path(chromadb):
     # Arrange
+    mock_client = chromadb.PersistentClient
     mock_collection = MagicMock()
-    mock_client.return_value.create_collection.return_value = mock_collection
+    mock_client.return_value.get_or_create_collection.return_value = mock_collection
     memory = Memory()
     # Act
     result = memory.ingest([0.1, 0.2, 0.3], {'id': 1})
     # Assert
     assert result is True
+    assert mock_collection.upsert.call_args.kwargs['ids']
 
-@patch('services.memory.chromadb.Client')
-def test_query_failure(mock_client):
+def test_query_failure(chromadb):
     # Arrange
+    mock_client = chromadb.PersistentClient
     mock_collection = MagicMock()
     mock_collection.query.side_effect = Exception('DB error')
-    mock_client.return_value.create_collection.return_value = mock_collection
+    mock_client.return_value.get_or_create_collection.return_value = mock_collection
     memory = Memory()
     # Act
     result = memory.query([0.1, 0.2, 0.3])
     # Assert
-    assert result is None 
\ No newline at end of file
+    assert result is None
+
+def test_query_scored_pairs_ids_metadata_and_distances(chromadb):
+    # Arrange
+    mock_client = chromadb.PersistentClient
+    mock_collection = MagicMock()
+    mock_collection.query.return_value = {'ids': [['a']], 'metadatas': [[{'text': 'x'}]], 'distances': [[0.1]]}
+    mock_client.return_value.get_or_create_collection.return_value = mock_collection
+    memory = Memory()
+    # Act
+    result = memory.query_scored([0.1, 0.2, 0.3])
+    # Assert
+    assert result == [('a', {'text': 'x'}, 0.1)]
+
+def _memory(mock_client, **memory_config):
+    mock_collection = MagicMock()
+    mock_client.return_value.get_or_create_collection.return_value = mock_collection
+    with patch('core.memory.load_config', return_value={'memory': memory_config}):
+        return Memory(), mock_collection
+
+def test_ingest_many_chunks_and_dedups_by_content(chromadb):
+    # Arrange
+    mock_client = chromadb.PersistentClient
+    memory, mock_collection = _memory(mock_client, batch_size=2)
+    metadatas = [{'text': 'a'}, {'text': 'b'}, {'text': 'a'}, {'text': 'c'}]
+    # Act
+    result = memory.ingest_many([[0.1], [0.2], [0.3], [0.4]], metadatas)
+    # Assert
+    assert result is True
+    batches = [c.kwargs for c in mock_collection.upsert.call_args_list]
+    assert [len(b['ids']) for b in batches] == [2, 1]
+    assert batches[0]['embeddings'] == [[0.3], [0.2]]
+
+def test_query_many_chunks_queries(chromadb):
+    # Arrange
+    mock_client = chromadb.PersistentClient
+    memory, mock_collection = _memory(mock_client, batch_size=2)
+    mock_collection.query.side_effect = lambda query_embeddings, **kwargs: {
+        'ids': [[f"id{e[0]}"] for e in query_embeddings],
+        'metadatas': [[{'q': e[0]}] for e in query_embeddings],
+        'distances': [[0.0] for _ in query_embeddings]}
+    # Act
+    result = memory.query_many([[1], [2], [3]])
+    # Assert
+    assert mock_collection.query.call_count == 2
+    assert result == [[('id1', {'q': 1}, 0.0)], [('id2', {'q': 2}, 0.0)], [('id3', {'q': 3}, 0.0)]]
+
+def test_write_behind_flushes_by_size_and_before_queries(chromadb):
+    # Arrange
+    mock_client = chromadb.PersistentClient
+    memory, mock_collection = _memory(mock_client, write_behind={'flush_size': 3, 'flush_interval_s': 60})
+    mock_collection.query.return_value = {'metadatas': [[]]}
+    # Act
+    memory.ingest_later([0.1], {'text': 'a'})
+    memory.ingest_later([0.2], {'text': 'b'})
+    buffered = mock_collection.upsert.call_count
+    memory.query([0.1])
+    memory.ingest_later([0.3], {'text': 'c'})
+    memory.close()
+    # Assert
+    assert buffered == 0
+    assert [len(c.kwargs['ids']) for c in mock_collection.upsert.call_args_list] == [2, 1]
+    assert memory.pending == 0
@@ -0,0 +1,129 @@
+import pytest
+from unittest.mock import patch
+import numpy as np
+from core.memory_backends import NumpyBackend, create_memory_backend, matches_where
+
+
+def _backend(tmp_path, **numpy_config):
+    return NumpyBackend({'numpy': {'path': str(tmp_path), **numpy_config}}, 'test')
+
+
+def _unit(rng, n, dim=8):
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_query_returns_cosine_top_k_in_order(tmp_path):
+    # Arrange
+    rng = np.random.default_rng(0)
+    vectors = _unit(rng, 50)
+    backend = _backend(tmp_path, chunk_rows=16)
+    backend.upsert([f"d{i}" for i in range(50)], vectors.tolist(), [{'i': i} for i in range(50)])
+    query = vectors[7] + 0.01 * rng.standard_normal(8).astype(np.float32)
+    # Act
+    matches = backend.query([query.tolist()], n_results=3)[0]
+    # Assert
+    expected = np.argsort(-(vectors @ (query / np.linalg.norm(query))))[:3]
+    assert [m[0] for m in matches] == [f"d{i}" for i in expected]
+    assert matches[0][1] == {'i': 7}
+    assert matches[0][2] < matches[1][2] < matches[2][2]
+
+
+def test_index_persists_upserts_and_deletes_across_reopen(tmp_path):
+    # Arrange
+    rng = np.random.default_rng(1)
+    vectors = _unit(rng, 3)
+    backend = _backend(tmp_path, dtype='float16')
+    backend.upsert(['a', 'b', 'c'], vectors.tolist(), [{'k': 'x'}, {'k': 'y'}, {'k': 'x'}])
+    backend.upsert(['a'], [vectors[1].tolist()], [{'k': 'updated'}])
+    backend.delete(ids=['c'])
+    backend.close()
+    # Act
+    reopened = _backend(tmp_path)
+    matches = reopened.query([vectors[1].tolist()], n_results=5)[0]
+    # Assert
+    assert reopened.dtype == np.float16
+    assert reopened.count() == 2
+    assert sorted(m[0] for m in matches) == ['a', 'b']
+    assert dict((m[0], m[1]) for m in matches)['a'] == {'k': 'updated'}
+
+
+def test_metadata_filter_and_delete_where(tmp_path):
+    # Arrange
+    rng = np.random.default_rng(2)
+    backend = _backend(tmp_path)
+    backend.upsert([str(i) for i in range(10)], _unit(rng, 10).tolist(),
+                   [{'kind': 'plan' if i % 2 else 'turn', 'n': i} for i in range(10)])
+    # Act
+    plans = backend.query([_unit(rng, 1)[0].tolist()], n_results=10, where={'kind': 'plan'})[0]
+    backend.delete(where={'n': {'$lt': 4}})
+    remaining = backend.query([_unit(rng, 1)[0].tolist()], n_results=10)[0]
+    # Assert
+    assert sorted(int(m[0]) for m in plans) == [1, 3, 5, 7, 9]
+    assert sorted(int(m[0]) for m in remaining) == [4, 5, 6, 7, 8, 9]
+
+
+def test_compact_keeps_live_rows_only(tmp_path):
+    # Arrange
+    rng = np.random.default_rng(3)
+    vectors = _unit(rng, 4)
+    backend = _backend(tmp_path)
+    backend.upsert(['a', 'b', 'c', 'd'], vectors.tolist(), [{}] * 4)
+    backend.delete(ids=['b', 'd'])
+    # Act
+    backend.compact()
+    matches = backend.query([vectors[2].tolist()], n_results=4)[0]
+    # Assert
+    assert len(backend._ids) == 2
+    assert [m[0] for m in matches][0] == 'c'
+    assert sorted(m[0] for m in matches) == ['a', 'c']
+
+
+def test_compacted_index_reopens_with_matching_ids(tmp_path):
+    # Arrange
+    rng = np.random.default_rng(4)
+    vectors = _unit(rng, 4)
+    backend = _backend(tmp_path)
+    backend.upsert(['a', 'b', 'c', 'd'], vectors.tolist(), [{}] * 4)
+    backend.delete(ids=['a'])
+    backend.compact()
+    backend.delete(ids=['b'])
+    backend.compact()
+    backend.close()
+    # Act
+    reopened = _backend(tmp_path)
+    matches = reopened.query([vectors[3].tolist()], n_results=1)[0]
+    # Assert
+    assert reopened.count() == 2
+    assert matches[0][0] == 'd' and matches[0][2] == pytest.approx(0.0, abs=1e-5)
+    assert sorted(p.name for p in (tmp_path / 'test').iterdir()) == ['header.json', 'meta.2.jsonl', 'vectors.2.bin']
+
+
+def test_crash_during_compact_keeps_the_previous_generation(tmp_path):
+    # Arrange
+    rng = np.random.default_rng(5)
+    vectors = _unit(rng, 4)
+    backend = _backend(tmp_path)
+    backend.upsert(['a', 'b', 'c', 'd'], vectors.tolist(), [{}] * 4)
+    backend.delete(ids=['a', 'b'])
+    # Act
+    with patch.object(NumpyBackend, '_write_header', side_effect=OSError('power cut')):
+        with pytest.raises(OSError):
+            backend.compact()
+    reopened = _backend(tmp_path)
+    matches = reopened.query([vectors[2].tolist()], n_results=1)[0]
+    # Assert
+    assert reopened.count() == 2
+    assert matches[0][0] == 'c' and matches[0][2] == pytest.approx(0.0, abs=1e-5)
+
+
+def test_matches_where_operators():
+    metadata = {'kind': 'plan', 'n': 3}
+    assert matches_where(metadata, {'$and': [{'kind': 'plan'}, {'n': {'$gte': 3}}]})
+    assert matches_where(metadata, {'$or': [{'kind': 'turn'}, {'n': {'$in': [1, 3]}}]})
+    assert not matches_where(metadata, {'kind': {'$ne': 'plan'}})
+
+
+def test_unknown_backend_raises(tmp_path):
+    with pytest.raises(ValueError):
+        create_memory_backend({'backend': 'faiss'}, 'test')
@@ -0,0 +1,42 @@
+import threading
+from unittest.mock import MagicMock
+from core.model_cache import ModelRegistry
+
+def test_get_loads_once_and_shares_instance():
+    # Arrange
+    registry = ModelRegistry()
+    loader = MagicMock(return_value=object())
+    key = ('whisper', 'base', 'cpu', 'int8')
+    # Act
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get(key, loader))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Assert
+    assert loader.call_count == 1
+    assert all(r is results[0] for r in results)
+    assert registry.hits == 3
+
+def test_lru_eviction_under_memory_budget():
+    # Arrange
+    registry = ModelRegistry(max_bytes=250)
+    model = lambda size: MagicMock(size_bytes=size)
+    registry.get(('a', 'm', 'cpu', 'fp32'), lambda: model(100))
+    registry.get(('b', 'm', 'cpu', 'fp32'), lambda: model(100))
+    registry.get(('a', 'm', 'cpu', 'fp32'), lambda: model(100))  # 'a' is now most recent
+    # Act
+    registry.get(('c', 'm', 'cpu', 'fp32'), lambda: model(100))
+    # Assert
+    assert ('b', 'm', 'cpu', 'fp32') not in registry
+    assert ('a', 'm', 'cpu', 'fp32') in registry
+    assert registry.evictions == 1
+    assert registry.total_bytes == 200
+
+def test_warm_up_runs_once_after_load():
+    registry = ModelRegistry()
+    warm_up = MagicMock()
+    registry.preload(('x', 'm', 'cpu', 'fp32'), lambda: 'model', warm_up)
+    registry.get(('x', 'm', 'cpu', 'fp32'), lambda: 'other', warm_up)
+    warm_up.assert_called_once_with('model')
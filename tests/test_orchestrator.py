@@ -1,25 +1,224 @@
+import asyncio
+import json
 import pytest
-from unittest.mock import patch, MagicMock
+import httpx
+from unittest.mock import patch
 from fastapi.testclient import TestClient
-from services.main import app, Orchestrator
+from core.plan_cache import PlanCache
+from core.utils import load_config
+from services.main import Orchestrator, app
+from services.llm_client import IncrementalJSONParser, LLMClient
 
-@patch('services.orchestrator.requests.post')
-def test_plan_endpoint_happy_path(mock_post):
+PLAN = {'steps': [{'command': 'echo one'}, {'command': 'echo {two}'}], 'response': 'Done.'}
+
+
+def _client(handler, **kwargs):
+    return LLMClient('http://llm.test/generate', backoff_base_s=0.0, transport=httpx.MockTransport(handler), **kwargs)
+
+
+def _ndjson(text, size=5):
+    lines = [json.dumps({'response': text[i:i + size], 'done': False}) for i in range(0, len(text), size)]
+    return '\n'.join(lines + [json.dumps({'response': '', 'done': True})]) + '\n'
+
+
+@pytest.fixture
+def orchestrator(tmp_path):
+    config = load_config()
+    skills = {**config.get('skills', {}), 'manifest_path': str(tmp_path / 'skills_manifest.json')}
+    with patch('core.plugin_manager.load_config', return_value={**config, 'skills': skills}):
+        orchestrator = Orchestrator()
+    orchestrator.plan_cache = PlanCache({})
+    with patch('services.main._orchestrator', orchestrator):
+        yield orchestrator
+
+
+def test_plan_endpoint_happy_path(orchestrator):
     # Arrange
-    mock_post.return_value = MagicMock(status_code=200, json=lambda: {'step': 'do something'})
-    client = TestClient(app)
+    llm = _client(lambda request: httpx.Response(200, json={'step': 'do something'}))
     # Act
-    response = client.post('/plan', json={'user_input': 'turn on the light'})
+    with patch.object(orchestrator, 'llm', llm):
+        response = TestClient(app).post('/plan', json={'user_input': 'turn on the light'})
     # Assert
     assert response.status_code == 200
-    assert 'plan' in response.json()
+    assert response.json()['plan'] == {'step': 'do something'}
+
 
-@patch('services.orchestrator.requests.post')
-def test_plan_endpoint_llm_failure(mock_post):
+def test_metrics_expose_traced_stages_and_trace_id(orchestrator):
     # Arrange
-    mock_post.side_effect = Exception('LLM down')
+    llm = _client(lambda request: httpx.Response(200, json={'step': 'do something'}))
     client = TestClient(app)
     # Act
-    response = client.post('/plan', json={'user_input': 'turn on the light'})
+    with patch.object(orchestrator, 'llm', llm):
+        response = client.post('/plan', json={'user_input': 'turn on the light'}, headers={'X-Trace-Id': 'abc123'})
+    metrics = client.get('/metrics')
+    # Assert
+    assert response.headers['X-Trace-Id'] == 'abc123'
+    assert metrics.status_code == 200
+    assert metrics.headers['content-type'].startswith('text/plain')
+    assert 'jarl_span_duration_seconds_count{span="orchestrator.call_llm"}' in metrics.text
+    assert 'jarl_span_duration_seconds{span="http.request",quantile="0.99"}' in metrics.text
+
+
+def test_plan_endpoint_llm_failure(orchestrator):
+    # Arrange
+    def handler(request):
+        raise httpx.ConnectError('LLM down')
+    llm = _client(handler, retries=1)
+    # Act
+    with patch.object(orchestrator, 'llm', llm):
+        response = TestClient(app).post('/plan', json={'user_input': 'turn on the light'})
+    # Assert
+    assert response.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_generate_retries_then_unwraps_ollama_envelope():
+    # Arrange
+    calls = []
+    def handler(request):
+        calls.append(json.loads(request.content))
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={'response': json.dumps(PLAN), 'done': True})
+    llm = _client(handler, model='llama3')
+    # Act
+    plan = await llm.generate('hi')
+    await llm.aclose()
+    # Assert
+    assert plan == PLAN
+    assert len(calls) == 3
+    assert calls[0] == {'prompt': 'hi', 'stream': False, 'model': 'llama3'}
+
+
+def test_pools_from_finished_event_loops_are_closed():
+    # Arrange
+    llm = _client(lambda request: httpx.Response(200, json=PLAN))
+    asyncio.run(llm.generate('hi'))
+    first = next(iter(llm._sessions.values()))[0]
+    # Act
+    asyncio.run(llm.generate('hi'))
+    second = next(iter(llm._sessions.values()))[0]
+    asyncio.run(llm.aclose())
+    # Assert
+    assert first is not second
+    assert first.is_closed and second.is_closed
+    assert llm._sessions == {}
+
+
+@pytest.mark.asyncio
+async def test_generate_does_not_retry_client_errors():
+    # Arrange
+    calls = []
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400)
+    llm = _client(handler)
+    # Act / Assert
+    with pytest.raises(httpx.HTTPStatusError):
+        await llm.generate('hi')
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_plan_emits_steps_before_document():
+    # Arrange
+    llm = _client(lambda request: httpx.Response(200, text=_ndjson('Sure! ' + json.dumps(PLAN))))
+    # Act
+    events = [event async for event in llm.stream_plan('hi')]
+    # Assert
+    assert events == [('item', PLAN['steps'][0]), ('item', PLAN['steps'][1]), ('document', PLAN)]
+
+
+def test_incremental_parser_handles_strings_with_brackets():
+    # Arrange
+    parser = IncrementalJSONParser()
+    text = json.dumps({'steps': [{'command': 'echo "}]"'}]})
+    # Act
+    events = [event for char in text for event in parser.feed(char)]
+    # Assert
+    assert events[0] == ('item', {'command': 'echo "}]"'})
+    assert events[-1] == ('document', json.loads(text))
+    assert parser.done
+
+
+def test_plan_stream_endpoint_streams_ndjson(orchestrator):
+    # Arrange
+    llm = _client(lambda request: httpx.Response(200, text=_ndjson(json.dumps(PLAN))))
+    # Act
+    with patch.object(orchestrator, 'llm', llm):
+        response = TestClient(app).post('/plan/stream', json={'user_input': 'echo'})
+    # Assert
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{'step': PLAN['steps'][0]}, {'step': PLAN['steps'][1]}, {'plan': PLAN}]
+
+
+def test_plan_endpoint_serves_repeated_command_from_cache(orchestrator):
+    # Arrange
+    calls = []
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json=PLAN)
+    llm = _client(handler)
+    # Act
+    with patch.object(orchestrator, 'llm', llm):
+        client = TestClient(app)
+        first = client.post('/plan', json={'user_input': 'Open the browser'})
+        second = client.post('/plan', json={'user_input': 'open the browser!'})
+        stats = client.get('/plan/cache').json()
     # Assert
-    assert response.status_code == 500 
\ No newline at end of file
+    assert first.json() == second.json() == {'plan': PLAN}
+    assert len(calls) == 1
+    assert stats['exact_hits'] == 1 and stats['misses'] == 1
+
+
+def test_commands_referring_to_earlier_turns_are_not_cached(orchestrator):
+    # Arrange
+    calls = []
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json=PLAN)
+    llm = _client(handler)
+    orchestrator.context.add_turn('open the browser', 'Opening it.')
+    # Act
+    with patch.object(orchestrator, 'llm', llm):
+        client = TestClient(app)
+        client.post('/plan', json={'user_input': 'do that again'})
+        client.post('/plan/stream', json={'user_input': 'do that again'})
+        stats = client.get('/plan/cache').json()
+    # Assert
+    assert len(calls) == 2
+    assert stats['exact_items'] == 0 and stats['exact_hits'] == 0
+
+
+def test_self_contained_commands_are_cached_after_conversation_history(orchestrator):
+    # Arrange
+    calls = []
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json=PLAN)
+    llm = _client(handler)
+    orchestrator.context.add_turn('open the browser', 'Opening it.')
+    # Act
+    with patch.object(orchestrator, 'llm', llm):
+        client = TestClient(app)
+        first = client.post('/plan', json={'user_input': 'turn up the volume'})
+        client.post('/plan', json={'user_input': 'open the mail client'})
+        second = client.post('/plan', json={'user_input': 'Turn up the volume!'})
+        stats = client.get('/plan/cache').json()
+    # Assert
+    assert first.json() == second.json() == {'plan': PLAN}
+    assert len(calls) == 2
+    assert stats['exact_hits'] == 1
+
+
+def test_plan_endpoint_routes_skill_triggers_without_llm(orchestrator):
+    # Arrange
+    calls = []
+    llm = _client(lambda request: calls.append(request) or httpx.Response(200, json=PLAN))
+    # Act
+    with patch.object(orchestrator, 'llm', llm):
+        response = TestClient(app).post('/plan', json={'user_input': 'What time is it?'})
+    # Assert
+    assert response.status_code == 200
+    assert response.json()['plan']['response'].startswith("It's")
+    assert calls == []
@@ -0,0 +1,142 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+import numpy as np
+from core.action_dispatcher import ActionDispatcher
+from core.barge_in import BargeInMonitor
+from core.vad import EnergyVAD, Utterance
+from services.pipeline import FAILED_STEPS_RESPONSE, NullSpeaker, StubPlanner, VoicePipeline, summarize
+
+CONFIG = {'pipeline': {'queue_size': 1, 'workers': 2}}
+
+def _listener(n_utterances):
+    listener = MagicMock(samplerate=16000)
+    async def utterances(source):
+        for i in range(n_utterances):
+            yield Utterance(audio=np.zeros(8000, dtype='float32'), start=float(i), end=i + 0.5)
+    listener.wake_gated_utterances.side_effect = utterances
+    return listener
+
+@pytest.mark.asyncio
+async def test_run_records_per_stage_latency():
+    # Arrange
+    stt = MagicMock()
+    stt.transcribe.side_effect = lambda audio, sr: (time.sleep(0.02), 'list files')[1]
+    dispatcher = MagicMock()
+    dispatcher.dispatch.return_value = 0
+    planner = MagicMock()
+    async def plan(text):
+        return {'steps': [{'command': 'ls'}], 'response': 'Done.'}
+    planner.plan.side_effect = plan
+    speaker = NullSpeaker()
+    pipeline = VoicePipeline(_listener(3), stt, planner, dispatcher, speaker, CONFIG)
+    # Act
+    turns = await pipeline.run([None])
+    pipeline.close()
+    # Assert
+    assert [t.turn_id for t in turns] == [1, 2, 3]
+    assert speaker.spoken == ['Done.'] * 3
+    breakdown = turns[0].latency_breakdown()
+    assert set(breakdown) == {'stt', 'plan', 'dispatch', 'tts', 'queued', 'total'}
+    assert breakdown['stt'] >= 20
+    assert turns[0].return_codes == [0]
+    assert summarize(turns, 1.0)['turns'] == 3
+
+@pytest.mark.asyncio
+async def test_stage_failure_is_isolated_to_its_turn():
+    # Arrange
+    stt = MagicMock()
+    stt.transcribe.side_effect = ['hello', None]
+    pipeline = VoicePipeline(_listener(2), stt, StubPlanner(), config=CONFIG)
+    # Act
+    turns = await pipeline.run([None])
+    pipeline.close()
+    # Assert
+    assert turns[0].response == 'You said: hello'
+    assert turns[1].error == 'stt: empty transcript'
+    assert 'plan' not in turns[1].timestamps
+
+@pytest.mark.asyncio
+async def test_bounded_queues_overlap_stages():
+    # Arrange
+    stt = MagicMock()
+    stt.transcribe.side_effect = lambda audio, sr: (time.sleep(0.05), 'hi')[1]
+    pipeline = VoicePipeline(_listener(4), stt, StubPlanner(delay_s=0.05), config=CONFIG)
+    # Act
+    started = time.perf_counter()
+    turns = await pipeline.run([None])
+    elapsed = time.perf_counter() - started
+    pipeline.close()
+    # Assert
+    assert len(turns) == 4
+    assert elapsed < 0.38  # sequential would be 4 * (0.05 + 0.05)
+
+@pytest.mark.asyncio
+async def test_failed_steps_replace_the_spoken_response():
+    # Arrange
+    stt = MagicMock()
+    stt.transcribe.return_value = 'copy the file'
+    planner = MagicMock()
+    async def plan(text):
+        return {'steps': [{'command': 'false'}, {'command': 'echo copied'}], 'response': 'Copied.'}
+    planner.plan.side_effect = plan
+    speaker = NullSpeaker()
+    pipeline = VoicePipeline(_listener(1), stt, planner, ActionDispatcher(), speaker, CONFIG)
+    # Act
+    turns = await pipeline.run([None])
+    pipeline.close()
+    # Assert
+    assert turns[0].failed_steps == ['0', '1']
+    assert speaker.spoken == [FAILED_STEPS_RESPONSE.format(failed=2, total=2)]
+    assert turns[0].timestamps['tts'][0] >= turns[0].timestamps['dispatch'][1]
+
+class PlayingSpeaker(NullSpeaker):
+    """
+    Speaker whose playback takes `seconds` and can be stopped.
+    """
+    def __init__(self, seconds):
+        super().__init__()
+        self.seconds = seconds
+        self.speaking = False
+        self.playback_level_db = None
+        self.stopped = False
+
+    async def speak_stream(self, text):
+        self.speaking = True
+        try:
+            await asyncio.sleep(self.seconds)
+            self.spoken.append(text)
+        finally:
+            self.speaking = False
+
+    def stop(self):
+        self.stopped = True
+
+@pytest.mark.asyncio
+async def test_speech_during_playback_cancels_the_turn():
+    # Arrange
+    speaker = PlayingSpeaker(seconds=5.0)
+    listener = _listener(1)
+    async def monitor_frames():
+        while not speaker.speaking:
+            await asyncio.sleep(0.01)
+        for _ in range(10):
+            yield (0.5 * np.sin(np.arange(480) / 16000 * 2 * np.pi * 220)).astype('float32')
+            await asyncio.sleep(0.01)
+    listener.monitor_frames.side_effect = monitor_frames
+    barge_in = BargeInMonitor(speaker, EnergyVAD(), {'barge_in': {'min_speech_frames': 3}})
+    stt = MagicMock()
+    stt.transcribe.return_value = 'tell me a long story'
+    pipeline = VoicePipeline(listener, stt, StubPlanner(), speaker=speaker, config=CONFIG, barge_in=barge_in)
+    # Act
+    started = time.perf_counter()
+    turns = await pipeline.run([None])
+    elapsed = time.perf_counter() - started
+    pipeline.close()
+    # Assert
+    assert turns[0].interrupted and turns[0].error is None
+    assert speaker.stopped and speaker.spoken == []
+    assert barge_in.interruptions == 1
+    assert elapsed < 1.0
+    assert summarize(turns, elapsed)['interrupted'] == 1
@@ -0,0 +1,104 @@
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+from core.plan_cache import PlanCache
+from core.text import normalize_command, refers_back
+
+PLAN = {'steps': [{'command': 'firefox'}], 'response': 'Opening the browser.'}
+
+
+def _semantic_cache(matches, **config):
+    memory = MagicMock()
+    memory.query_scored.return_value = matches
+    embed = MagicMock(return_value=[1.0, 0.0])
+    return PlanCache({'plan_cache': {'semantic': {'threshold': 0.9}, **config}}, memory=memory, embed=embed), memory
+
+
+def test_normalize_command_ignores_case_and_punctuation():
+    assert normalize_command("  What's the WEATHER?! ") == "what's the weather"
+
+
+def test_refers_back_flags_commands_that_depend_on_earlier_turns():
+    assert refers_back("Do that again")
+    assert refers_back("turn it off")
+    assert not refers_back("Turn up the volume!")
+    assert not refers_back("open the browser")
+
+
+def test_exact_tier_hits_normalized_text_and_evicts_lru():
+    # Arrange
+    cache = PlanCache({'plan_cache': {'max_items': 2}})
+    cache.put('Open the browser', PLAN)
+    cache.put('b', {'steps': []})
+    # Act
+    hit = cache.get('open the browser.')
+    cache.put('c', {'steps': []})
+    # Assert
+    assert hit == PLAN
+    assert cache.get('b') is None
+    assert cache.get('open the browser') == PLAN
+    assert cache.stats['exact_hits'] == 2 and cache.stats['misses'] == 1
+
+
+def test_get_returns_a_copy_of_the_stored_plan():
+    # Arrange
+    cache = PlanCache({})
+    plan = {'steps': [{'command': 'firefox'}], 'response': 'Opening the browser.'}
+    cache.put('open the browser', plan)
+    plan['steps'].append({'command': 'rm -rf /tmp/x'})
+    # Act
+    hit = cache.get('open the browser')
+    hit['steps'][0]['command'] = 'chromium'
+    # Assert
+    assert cache.get('open the browser') == PLAN
+
+
+def test_entries_expire_after_ttl():
+    # Arrange
+    cache = PlanCache({'plan_cache': {'ttl_s': 10}})
+    with patch('core.plan_cache.time.time', return_value=1000.0):
+        cache.put('open the browser', PLAN)
+    # Act
+    with patch('core.plan_cache.time.time', return_value=1011.0):
+        result = cache.get('open the browser')
+    # Assert
+    assert result is None
+
+
+def test_semantic_tier_serves_near_duplicate_above_threshold():
+    # Arrange
+    metadata = {'text': 'open the browser', 'plan': json.dumps(PLAN), 'stored_at': 1e12}
+    cache, _ = _semantic_cache([('id', metadata, 0.05)])
+    # Act
+    result = cache.get('open up the browser')
+    # Assert
+    assert result == PLAN
+    assert cache.stats['semantic_hits'] == 1
+    assert cache.get('open up the browser') == PLAN
+    assert cache.stats['exact_hits'] == 1
+
+
+def test_semantic_tier_rejects_matches_below_threshold():
+    # Arrange
+    metadata = {'text': 'close the browser', 'plan': json.dumps(PLAN), 'stored_at': 1e12}
+    cache, _ = _semantic_cache([('id', metadata, 0.2)])
+    # Act
+    result = cache.get('open the browser')
+    # Assert
+    assert result is None
+    assert cache.stats['misses'] == 1
+
+
+def test_put_and_invalidate_reach_semantic_tier():
+    # Arrange
+    cache, memory = _semantic_cache([])
+    # Act
+    cache.put('Open the browser', PLAN)
+    cache.invalidate('open the browser')
+    cache.invalidate()
+    # Assert
+    embedding, metadata = memory.ingest.call_args.args
+    assert metadata['text'] == 'open the browser' and json.loads(metadata['plan']) == PLAN
+    assert memory.delete.call_args_list[0].kwargs == {'ids': [memory.ingest.call_args.kwargs['doc_id']]}
+    assert memory.delete.call_args_list[1].kwargs == {'where': {'kind': 'plan'}}
+    assert cache.get('open the browser') is None
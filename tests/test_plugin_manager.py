@@ -1,8 +1,10 @@
 import pytest
+import asyncio
+import threading
 from unittest.mock import patch, MagicMock
-from services.plugin_manager import PluginManager
+from core.plugin_manager import PluginManager
 
-@patch('services.plugin_manager.os.listdir')
+@patch('core.plugin_manager.os.listdir')
 def test_discover_skills_happy_path(mock_listdir):
     # Arrange
     mock_listdir.return_value = ['foo.py', 'bar.py', '__init__.py']
@@ -12,7 +14,7 @@ def test_discover_skills_happy_path(mock_listdir):
     # Assert
     assert set(skills) == {'foo', 'bar'}
 
-@patch('services.plugin_manager.os.listdir')
+@patch('core.plugin_manager.os.listdir')
 def test_discover_skills_failure(mock_listdir):
     # Arrange
     mock_listdir.side_effect = Exception('IO error')
@@ -20,4 +22,108 @@ def test_discover_skills_failure(mock_listdir):
     # Act
     skills = manager.discover_skills()
     # Assert
-    assert skills == [] 
\ No newline at end of file
+    assert skills == []
+
+def test_load_skills_indexes_triggers_and_routes(tmp_path):
+    # Arrange
+    (tmp_path / 'greet.py').write_text(
+        "TRIGGERS = ['say hello to {name}']\n"
+        "def run(text, slots):\n"
+        "    return {'steps': [], 'response': 'Hello ' + slots['name']}\n")
+    (tmp_path / 'broken.py').write_text("TRIGGERS = ['say hello to {name}']\n")
+    manager = PluginManager()
+    manager.skills_dir = str(tmp_path)
+    manager.manifest_path = str(tmp_path / 'manifest.json')
+    # Act
+    manager.load_skills()
+    intent = manager.route('Say hello to Ada')
+    plan = asyncio.run(manager.run(intent, 'Say hello to Ada'))
+    # Assert
+    assert [s.__name__ for s in manager.skills] == ['greet']
+    assert plan == {'steps': [], 'response': 'Hello ada'}
+    assert manager.route('say goodbye') is None
+
+def test_route_falls_back_to_can_handle():
+    # Arrange
+    skill = MagicMock(TRIGGERS=[], __name__='fallback')
+    skill.can_handle.side_effect = lambda text: 'weather' in text
+    manager = PluginManager()
+    manager.skills = [skill]
+    # Act
+    intent = manager.route("how's the weather")
+    # Assert
+    assert intent.skill is skill
+
+def test_route_async_runs_predicates_off_the_loop_only_when_declared(tmp_path):
+    # Arrange
+    manager, _ = _skills_dir(
+        tmp_path,
+        timer="TRIGGERS = ['set a timer']\ndef run(text, slots): return {}\n",
+        weather="import threading\nTHREADS = []\nTRIGGERS = []\n"
+                "def can_handle(text):\n    THREADS.append(threading.current_thread())\n    return 'weather' in text\n"
+                "def run(text, slots): return {}\n")
+    manager.load_skills()
+    weather = next(skill for skill in manager.skills if skill.__name__ == 'weather')
+    # Act
+    hit = asyncio.run(manager.route_async('set a timer'))
+    loaded_after_hit = weather.loaded
+    fallback = asyncio.run(manager.route_async("how's the weather"))
+    # Assert
+    assert hit.skill.__name__ == 'timer'
+    assert loaded_after_hit is False
+    assert fallback.skill is weather
+    assert fallback.skill.module.THREADS[0] is not threading.main_thread()
+
+def _skills_dir(tmp_path, **sources):
+    skills_dir = tmp_path / 'skills'
+    skills_dir.mkdir(exist_ok=True)
+    for name, source in sources.items():
+        (skills_dir / f"{name}.py").write_text(source)
+    manager = PluginManager()
+    manager.skills_dir = str(skills_dir)
+    manager.manifest_path = str(tmp_path / 'manifest.json')
+    return manager, skills_dir
+
+def test_load_skills_indexes_without_importing(tmp_path):
+    # Arrange
+    manager, _ = _skills_dir(tmp_path, loud="raise RuntimeError('imported')\nTRIGGERS = ['be loud']\ndef run(text, slots): pass\n")
+    # Act
+    manager.load_skills()
+    intent = manager.route('be loud')
+    plan = asyncio.run(manager.run(intent, 'be loud'))
+    # Assert
+    assert intent.skill.__name__ == 'loud'
+    assert not intent.skill.loaded
+    assert plan is None
+
+def test_manifest_is_reused_for_unchanged_files(tmp_path):
+    # Arrange
+    manager, _ = _skills_dir(tmp_path, greet="TRIGGERS = ['hello']\ndef run(text, slots): return {}\n")
+    manager.load_skills()
+    second, _ = _skills_dir(tmp_path)
+    # Act
+    with patch('core.plugin_manager.scan_skill') as mock_scan:
+        second.load_skills()
+    # Assert
+    mock_scan.assert_not_called()
+    assert second.route('hello').skill.__name__ == 'greet'
+
+def test_refresh_reloads_only_changed_skills(tmp_path):
+    # Arrange
+    manager, skills_dir = _skills_dir(
+        tmp_path,
+        a="TRIGGERS = ['alpha']\ndef run(text, slots): return {'response': 'a1'}\n",
+        b="TRIGGERS = ['beta']\ndef run(text, slots): return {'response': 'b'}\n")
+    manager.load_skills()
+    skill_b = manager.route('beta').skill
+    asyncio.run(manager.run(manager.route('alpha'), 'alpha'))
+    # Act
+    (skills_dir / 'a.py').write_text("TRIGGERS = ['alpha', 'first']\ndef run(text, slots): return {'response': 'a2'}\n")
+    (skills_dir / 'c.py').write_text("TRIGGERS = ['gamma']\ndef run(text, slots): return {}\n")
+    changed = manager.refresh()
+    plan = asyncio.run(manager.run(manager.route('first'), 'first'))
+    # Assert
+    assert changed == ['a', 'c']
+    assert plan == {'response': 'a2'}
+    assert manager.route('beta').skill is skill_b
+    assert manager.refresh() == []
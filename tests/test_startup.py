@@ -0,0 +1,76 @@
+import subprocess
+import sys
+import threading
+import pytest
+from services.startup import WarmUp, warm_up_components
+
+
+class Component:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.release = threading.Event()
+        self.loaded = False
+
+    def preload(self):
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError('no model')
+        self.loaded = True
+
+
+class AsyncComponent:
+    started = False
+
+    def preload(self):
+        raise AssertionError('the async start should be used')
+
+    async def start(self):
+        self.started = True
+
+
+def test_warm_up_runs_in_background_and_tracks_readiness():
+    # Arrange
+    stt, tts = Component(), Component(fail=True)
+    # Act
+    warm_up = WarmUp().add('stt', stt.preload).add('tts', tts.preload).start()
+    pending = warm_up.status()
+    stt.release.set()
+    tts.release.set()
+    finished = warm_up.wait(timeout=5)
+    # Assert
+    assert pending['done'] is False and pending['time_to_ready_s'] is None
+    assert finished is False
+    assert warm_up.ready('stt') and not warm_up.ready('tts')
+    status = warm_up.status()
+    assert status['done'] is True and status['time_to_ready_s'] >= 0
+    assert status['components']['stt']['state'] == 'ready'
+    assert status['components']['tts']['state'] == 'failed'
+    assert status['components']['tts']['error'] == 'RuntimeError: no model'
+    warm_up.shutdown()
+
+@pytest.mark.asyncio
+async def test_async_components_start_on_the_running_loop():
+    # Arrange
+    browser, stt = AsyncComponent(), Component()
+    stt.release.set()
+    config = {'startup': {'warm_up': ['stt', 'browser']}}
+    # Act
+    warm_up = warm_up_components(config, stt=stt, browser=browser, tts=Component(), embedder=None)
+    ready = await warm_up.wait_ready(timeout=5)
+    # Assert
+    assert ready is True
+    assert browser.started and stt.loaded
+    assert set(warm_up.tasks) == {'stt', 'browser'}
+    warm_up.shutdown()
+
+@pytest.mark.parametrize('module, heavy', [('core.tts', 'TTS.api'), ('core.tts', 'sounddevice'),
+                                           ('core.listener', 'sounddevice'),
+                                           ('ai_agents.browser_agent', 'playwright'),
+                                           ('services.main', 'chromadb')])
+def test_heavy_dependencies_are_not_imported_with_the_module(module, heavy):
+    # Act
+    result = subprocess.run([sys.executable, '-c', f"import sys, {module}; print('{heavy}' in sys.modules)"],
+                            capture_output=True, text=True)
+    # Assert
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'False'
@@ -1,30 +1,91 @@
+import asyncio
 import pytest
 from unittest.mock import patch, MagicMock
 import numpy as np
+from core.model_cache import get_model_registry
 from core.stt import SpeechToText
 
-@patch('services.stt.whisper')
-def test_transcribe_happy_path(mock_whisper):
+@pytest.fixture(autouse=True)
+def clear_model_registry():
+    get_model_registry().clear()
+    yield
+    get_model_registry().clear()
+
+def test_transcribe_happy_path():
     # Arrange
+    mock_whisper = MagicMock()
     mock_model = MagicMock()
     mock_model.transcribe.return_value = {'text': 'hello world'}
     mock_whisper.load_model.return_value = mock_model
     stt = SpeechToText()
     audio = np.zeros(16000, dtype='float32')
     # Act
-    result = stt.transcribe(audio)
+    with patch.dict('sys.modules', {'whisper': mock_whisper}):
+        result = stt.transcribe(audio)
     # Assert
     assert result == 'hello world'
 
-@patch('services.stt.whisper')
-def test_transcribe_failure(mock_whisper):
+def test_transcribe_failure():
     # Arrange
+    mock_whisper = MagicMock()
     mock_model = MagicMock()
     mock_model.transcribe.side_effect = Exception('STT error')
     mock_whisper.load_model.return_value = mock_model
     stt = SpeechToText()
     audio = np.zeros(16000, dtype='float32')
     # Act
-    result = stt.transcribe(audio)
+    with patch.dict('sys.modules', {'whisper': mock_whisper}):
+        result = stt.transcribe(audio)
+    # Assert
+    assert result is None
+
+def test_model_is_loaded_lazily_and_shared():
+    # Arrange
+    mock_whisper = MagicMock()
+    mock_whisper.load_model.return_value.transcribe.return_value = {'text': 'hi'}
+    first, second = SpeechToText(), SpeechToText()
+    # Act
+    with patch.dict('sys.modules', {'whisper': mock_whisper}):
+        assert mock_whisper.load_model.call_count == 0
+        first.preload()
+        second.transcribe(np.zeros(16000, dtype='float32'))
+    # Assert
+    assert mock_whisper.load_model.call_count == 1
+    assert first.backend.model is second.backend.model
+
+async def _frames(n_frames, size=1600):
+    for _ in range(n_frames):
+        yield np.zeros(size, dtype='float32')
+        await asyncio.sleep(0)  # lets a decode started on this frame run to completion
+
+async def _inline(func, *args):
+    return func(*args)
+
+@pytest.mark.asyncio
+async def test_transcribe_stream_commits_agreed_prefix():
+    # Arrange
+    mock_whisper = MagicMock()
+    mock_model = MagicMock()
+    mock_model.transcribe.side_effect = [
+        {'text': ''},  # warm-up
+        {'text': 'open the'},
+        {'text': 'open the brow'},
+        {'text': 'open the browser please'},
+    ]
+    mock_whisper.load_model.return_value = mock_model
+    stt = SpeechToText()
+    stt.stream_step_s = 0.1
+    with patch.dict('sys.modules', {'whisper': mock_whisper}):
+        stt.preload()
+    # Act
+    results = []
+    with patch('core.stt.asyncio.to_thread', _inline):
+        async for hypothesis in stt.transcribe_stream(_frames(3)):
+            results.append(hypothesis)
     # Assert
-    assert result is None 
\ No newline at end of file
+    assert [h.is_final for h in results] == [False, False, True]
+    assert results[0].stable == ''
+    assert results[1].stable == 'open the'
+    assert results[1].text == 'open the brow'
+    assert results[-1].text == 'open the browser please'
+    assert mock_model.transcribe.call_count == 4  # the last decode is reused for the final
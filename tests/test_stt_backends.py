@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import numpy as np
+from core.model_cache import get_model_registry
+from core.stt_backends import STT_BACKENDS, create_backend
+
+@pytest.fixture(autouse=True)
+def clear_model_registry():
+    get_model_registry().clear()
+    yield
+    get_model_registry().clear()
+
+def test_create_backend_uses_int8_faster_whisper():
+    # Arrange
+    mock_module = MagicMock()
+    segment = MagicMock(text=' hello world')
+    mock_module.WhisperModel.return_value.transcribe.return_value = ([segment], None)
+    config = {'stt': {'backend': 'faster-whisper', 'model': 'small', 'compute_type': 'int8'}}
+    # Act
+    backend = create_backend(config)
+    with patch.dict('sys.modules', {'faster_whisper': mock_module}):
+        backend.load()
+    result = backend.transcribe(np.zeros(8000, dtype='float32'), samplerate=8000)
+    # Assert
+    mock_module.WhisperModel.assert_called_once_with('small', device='cpu', compute_type='int8', cpu_threads=0)
+    audio = mock_module.WhisperModel.return_value.transcribe.call_args.args[0]
+    assert len(audio) == 16000
+    assert result == 'hello world'
+
+def test_vosk_backend_feeds_int16_pcm():
+    # Arrange
+    mock_module = MagicMock()
+    mock_module.KaldiRecognizer.return_value.FinalResult.return_value = '{"text": "lights on"}'
+    backend = create_backend({'stt': {'backend': 'vosk', 'vosk_model_path': '/models/vosk'}})
+    # Act
+    with patch.dict('sys.modules', {'vosk': mock_module}):
+        result = backend.transcribe(np.zeros(1600, dtype='float32'))
+    # Assert
+    mock_module.Model.assert_called_once_with('/models/vosk')
+    pcm = mock_module.KaldiRecognizer.return_value.AcceptWaveform.call_args.args[0]
+    assert len(pcm) == 3200
+    assert result == 'lights on'
+
+def test_create_backend_unknown_name():
+    with pytest.raises(ValueError):
+        create_backend({'stt': {'backend': 'nope'}})
+    assert {'whisper', 'faster-whisper', 'vosk'} <= set(STT_BACKENDS)
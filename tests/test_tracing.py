@@ -0,0 +1,111 @@
+import asyncio
+import json
+import pytest
+from core.tracing import Tracer, current_trace_id, trace
+
+
+def _tracer(**config):
+    return Tracer({'tracing': config})
+
+
+def test_span_records_duration_and_nesting():
+    # Arrange
+    tracer = _tracer()
+    # Act
+    with trace('turn-1'):
+        with tracer.span('outer') as outer:
+            with tracer.span('inner', step=2) as inner:
+                pass
+    # Assert
+    assert inner.parent_id == outer.span_id and outer.parent_id is None
+    assert inner.trace_id == outer.trace_id == 'turn-1'
+    assert inner.attrs == {'step': 2}
+    assert 0 <= inner.duration_s <= outer.duration_s
+    assert tracer.histograms['outer'].count == 1
+    assert current_trace_id() is None
+
+def test_span_records_errors_and_reraises():
+    # Arrange
+    tracer = _tracer()
+    # Act
+    with pytest.raises(RuntimeError):
+        with tracer.span('failing') as span:
+            raise RuntimeError('boom')
+    # Assert
+    assert span.error == 'RuntimeError: boom'
+    assert tracer.histograms['failing'].errors == 1
+
+@pytest.mark.asyncio
+async def test_traced_decorator_keeps_trace_across_tasks_and_threads():
+    # Arrange
+    tracer = _tracer()
+    seen = []
+
+    @tracer.traced('work.sync')
+    def work():
+        seen.append(current_trace_id())
+        return 1
+
+    @tracer.traced()
+    async def handle():
+        return await asyncio.to_thread(work) + await asyncio.create_task(asyncio.to_thread(work))
+
+    # Act
+    with trace('abc'):
+        result = await handle()
+    # Assert
+    assert result == 2
+    assert seen == ['abc', 'abc']
+    assert tracer.histograms['work.sync'].count == 2
+    assert 'test_traced_decorator_keeps_trace_across_tasks_and_threads.<locals>.handle' in tracer.histograms
+
+def test_quantiles_use_the_latest_window():
+    # Arrange
+    tracer = _tracer(window=100)
+    for ms in range(1, 201):
+        tracer.observe('stage', ms / 1000)
+    # Act
+    snapshot = tracer.snapshot()['stage']
+    # Assert
+    assert snapshot['count'] == 200
+    assert snapshot['mean_ms'] == pytest.approx(100.5)
+    assert snapshot['p50_ms'] == pytest.approx(150.5)
+    assert snapshot['p99_ms'] == pytest.approx(199.01)
+
+def test_prometheus_text_format():
+    # Arrange
+    tracer = _tracer(quantiles=[0.5, 0.95])
+    tracer.observe('stt.transcribe', 0.25)
+    tracer.observe('stt.transcribe', 0.75)
+    # Act
+    text = tracer.prometheus()
+    # Assert
+    assert '# TYPE jarl_span_duration_seconds summary' in text
+    assert 'jarl_span_duration_seconds{span="stt.transcribe",quantile="0.5"} 0.5' in text
+    assert 'jarl_span_duration_seconds_sum{span="stt.transcribe"} 1' in text
+    assert 'jarl_span_duration_seconds_count{span="stt.transcribe"} 2' in text
+    assert 'jarl_span_errors_total{span="stt.transcribe"} 0' in text
+    assert text.endswith('\n')
+
+def test_spans_are_dumped_as_json_lines(tmp_path):
+    # Arrange
+    path = tmp_path / 'traces' / 'spans.jsonl'
+    tracer = _tracer(dump_path=str(path))
+    # Act
+    with trace('t1'):
+        with tracer.span('a'):
+            pass
+        with tracer.span('b'):
+            pass
+    tracer.close()
+    # Assert
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r['name'] for r in records] == ['a', 'b']
+    assert all(r['trace_id'] == 't1' and r['duration_ms'] >= 0 for r in records)
+
+def test_disabled_tracer_records_nothing():
+    tracer = _tracer(enabled=False)
+    with tracer.span('a'):
+        pass
+    tracer.observe('b', 1.0)
+    assert tracer.histograms == {}
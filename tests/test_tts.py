@@ -1,24 +1,57 @@
+import asyncio
+import time
+import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock
-from core.tts import TextToSpeech
+from core.array_cache import ArrayCache
+from core.model_cache import get_model_registry
+from core.tts import TextToSpeech, split_sentences
+
+@pytest.fixture(autouse=True)
+def clear_model_registry():
+    get_model_registry().clear()
+    yield
+    get_model_registry().clear()
+
+@pytest.fixture(autouse=True)
+def tmp_tts_cache(tmp_path):
+    with patch('core.tts.ArrayCache', lambda directory, **kwargs: ArrayCache(str(tmp_path), **kwargs)):
+        yield
 
 @pytest.mark.asyncio
-@patch('services.tts.CoquiTTS')
-async def test_speak_happy_path(mock_coqui):
+@patch('core.tts.sd')
+@patch('core.tts.CoquiTTS')
+async def test_speak_happy_path(mock_coqui, mock_sd):
     # Arrange
     mock_tts = MagicMock()
-    mock_tts.tts.return_value = b'audio'
+    mock_tts.tts.return_value = [0.25, -0.5]
     mock_tts.play.return_value = None
     mock_coqui.return_value = mock_tts
     tts = TextToSpeech()
     # Act
     result = await tts.speak('hello')
     # Assert
-    assert result == b'audio'
+    assert np.allclose(result, [0.25, -0.5])
 
 @pytest.mark.asyncio
-@patch('services.tts.CoquiTTS')
-async def test_speak_failure(mock_coqui):
+@patch('core.tts.sd')
+@patch('core.tts.CoquiTTS')
+async def test_speak_repeated_phrase_hits_cache(mock_coqui, mock_sd):
+    # Arrange
+    mock_coqui.return_value.tts.return_value = [0.25, -0.5]
+    tts = TextToSpeech()
+    # Act
+    first = await tts.speak('Done!')
+    second = await tts.speak('  Done! ')
+    # Assert
+    assert mock_coqui.return_value.tts.call_count == 1
+    assert np.allclose(first, second, atol=1e-4)
+    assert tts.cache.stats['memory_hits'] == 1
+
+@pytest.mark.asyncio
+@patch('core.tts.sd')
+@patch('core.tts.CoquiTTS')
+async def test_speak_failure(mock_coqui, mock_sd):
     # Arrange
     mock_tts = MagicMock()
     mock_tts.tts.side_effect = Exception('TTS error')
@@ -27,4 +60,87 @@ async def test_speak_failure(mock_coqui):
     # Act
     result = await tts.speak('hello')
     # Assert
-    assert result is None 
\ No newline at end of file
+    assert result is None
+
+def test_split_sentences_cuts_long_clauses():
+    # Arrange
+    text = "Hello there! The weather is sunny, warm and calm, with light wind from the west. Bye"
+    # Act
+    chunks = split_sentences(text, max_chars=40)
+    # Assert
+    assert chunks == ['Hello there!', 'The weather is sunny, warm and calm,',
+                      'with light wind from the west.', 'Bye']
+
+async def _tokens(text):
+    for token in text.split(' '):
+        yield token + ' '
+
+@pytest.mark.asyncio
+@patch('core.tts.sd')
+@patch('core.tts.CoquiTTS')
+async def test_speak_stream_plays_first_sentence_before_synthesizing_the_rest(mock_coqui, mock_sd):
+    # Arrange
+    events = []
+    def synth(text):
+        time.sleep(0.05)
+        events.append(('synth', text))
+        return [0.1] * 10
+    mock_coqui.return_value.tts.side_effect = synth
+    mock_coqui.return_value.synthesizer.output_sample_rate = 22050
+    mock_sd.OutputStream.return_value.write.side_effect = lambda audio: events.append(('write', len(audio)))
+    tts = TextToSpeech()
+    # Act
+    result = await tts.speak_stream(_tokens("First one. Second one. Third one."))
+    # Assert
+    assert [e[1] for e in events if e[0] == 'synth'] == ['First one.', 'Second one.', 'Third one.']
+    assert events.index(('write', 10)) < events.index(('synth', 'Third one.'))
+    assert len(result) == 30
+    mock_sd.OutputStream.assert_called_once_with(samplerate=22050, channels=1, dtype='float32')
+
+@pytest.mark.asyncio
+@patch('core.tts.sd')
+@patch('core.tts.CoquiTTS')
+async def test_speak_stream_failure(mock_coqui, mock_sd):
+    mock_coqui.return_value.tts.side_effect = Exception('TTS error')
+    tts = TextToSpeech()
+    assert await tts.speak_stream('Hello. World.') is None
+
+@pytest.mark.asyncio
+@patch('core.tts.sd')
+@patch('core.tts.CoquiTTS')
+async def test_stop_interrupts_playback_and_drops_buffer(mock_coqui, mock_sd):
+    # Arrange
+    mock_coqui.return_value.tts.return_value = [0.1] * 22050
+    mock_coqui.return_value.synthesizer.output_sample_rate = 22050
+    stream = mock_sd.OutputStream.return_value
+    stream.write.side_effect = lambda block: time.sleep(0.01)
+    tts = TextToSpeech()
+    # Act
+    task = asyncio.create_task(tts.speak_stream('One. Two. Three.'))
+    await asyncio.sleep(0.05)
+    assert tts.speaking and tts.playback_level_db is not None
+    tts.stop()
+    result = await task
+    # Assert
+    assert stream.write.call_count < 20
+    stream.abort.assert_called_once()
+    assert not tts.speaking
+    assert len(result) == 22050
+
+@pytest.mark.asyncio
+@patch('core.tts.sd')
+@patch('core.tts.CoquiTTS')
+async def test_stop_during_synthesis_skips_playback(mock_coqui, mock_sd):
+    # Arrange
+    mock_coqui.return_value.tts.side_effect = lambda text: (time.sleep(0.1), [0.1] * 22050)[1]
+    mock_coqui.return_value.synthesizer.output_sample_rate = 22050
+    stream = mock_sd.OutputStream.return_value
+    tts = TextToSpeech()
+    # Act
+    task = asyncio.create_task(tts.speak('hello'))
+    await asyncio.sleep(0.05)
+    tts.stop()
+    await task
+    # Assert
+    stream.write.assert_not_called()
+    stream.abort.assert_called_once()
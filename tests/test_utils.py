@@ -1,9 +1,20 @@
+import os
+import pickle
 import pytest
 from unittest.mock import patch, mock_open
-from core.utils import load_config, load_json_schema
+from core.utils import ConfigStore, Config, load_config, load_json_schema, validate_config
+
+@pytest.fixture(autouse=True)
+def fresh_store():
+    with patch('core.utils._config_store', None):
+        yield
+
+def _write(path, text, mtime):
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
 
 @patch('builtins.open', new_callable=mock_open, read_data='foo: bar')
-@patch('services.utils.yaml.safe_load', return_value={'foo': 'bar'})
+@patch('core.utils.yaml.safe_load', return_value={'foo': 'bar'})
 def test_load_config_happy_path(mock_yaml, mock_file):
     config = load_config()
     assert config == {'foo': 'bar'}
@@ -13,13 +24,134 @@ def test_load_config_failure(mock_file):
     config = load_config()
     assert config == {}
 
+@patch('core.utils.yaml.safe_load', return_value={'foo': 'bar'})
+def test_load_config_parses_once(mock_yaml):
+    # Act
+    first, second = load_config(), load_config()
+    # Assert
+    assert first is second
+    assert mock_yaml.call_count == 1
+
+def test_config_is_read_only_with_attribute_access():
+    # Arrange
+    config = Config({'stt': {'model': 'base'}, 'tracing': {'quantiles': [0.5, 0.9]}})
+    # Act / Assert
+    assert config.stt.model == 'base'
+    assert config.get('stt', {}).get('model') == 'base'
+    assert config.get_path('stt.model') == 'base' and config.get_path('stt.missing', 1) == 1
+    assert config.tracing.quantiles == (0.5, 0.9)
+    with pytest.raises(TypeError):
+        config.stt['model'] = 'small'
+    assert pickle.loads(pickle.dumps(config)) == config
+
+def test_validate_config_reports_bad_types_and_values():
+    # Act
+    problems = validate_config({'listener': {'samplerate': '16k', 'channels': 0},
+                                'vad': {'backend': 'magic'}, 'wakeword': {'enabled': 1},
+                                'stt': 'base'})
+    # Assert
+    assert any(p.startswith('listener.samplerate: expected int') for p in problems)
+    assert any(p.startswith('listener.channels: invalid value') for p in problems)
+    assert any(p.startswith('vad.backend') for p in problems)
+    assert any(p.startswith('wakeword.enabled') for p in problems)
+    assert "section 'stt' must be a mapping" in problems
+    assert validate_config({'listener': {'samplerate': 16000}, 'custom': 'anything'}) == []
+
+def test_invalid_keys_fall_back_to_defaults_on_first_load(tmp_path):
+    # Arrange
+    path = tmp_path / 'config.yaml'
+    _write(path, 'listener:\n  samplerate: -1\n  channels: 2\n', 1000)
+    # Act
+    config = ConfigStore(str(path)).get()
+    # Assert
+    assert config == {'listener': {'channels': 2}}
+
+def test_reload_on_mtime_change_notifies_changed_sections(tmp_path):
+    # Arrange
+    path = tmp_path / 'config.yaml'
+    _write(path, 'config:\n  check_interval_s: 0\nstt:\n  model: base\ntts:\n  model: a\n', 1000)
+    store = ConfigStore(str(path))
+    store.get()
+    stt_updates, tts_updates = [], []
+    store.subscribe(stt_updates.append, 'stt')
+    store.subscribe(tts_updates.append, 'tts')
+    # Act
+    unchanged = store.reload()
+    _write(path, 'config:\n  check_interval_s: 0\nstt:\n  model: small\ntts:\n  model: a\n', 2000)
+    config = store.get()
+    # Assert
+    assert unchanged is False
+    assert config.stt.model == 'small'
+    assert stt_updates == [{'model': 'small'}]
+    assert tts_updates == []
+    assert store.reloads == 2
+
+def test_invalid_reload_keeps_previous_config(tmp_path):
+    # Arrange
+    path = tmp_path / 'config.yaml'
+    _write(path, 'listener:\n  samplerate: 16000\n', 1000)
+    store = ConfigStore(str(path))
+    store.get()
+    updates = []
+    store.subscribe(updates.append)
+    # Act
+    _write(path, 'listener:\n  samplerate: fast\n', 2000)
+    applied = store.reload()
+    _write(path, 'listener: [unclosed\n', 3000)
+    applied_broken = store.reload()
+    # Assert
+    assert applied is False and applied_broken is False
+    assert store.get().listener.samplerate == 16000
+    assert updates == []
+
+def test_subscribers_are_weak_and_can_unsubscribe(tmp_path):
+    # Arrange
+    path = tmp_path / 'config.yaml'
+    _write(path, 'dispatcher:\n  timeout_s: 1\n', 1000)
+    store = ConfigStore(str(path))
+    store.get()
+
+    class Component:
+        seen = []
+
+        def apply_config(self, section):
+            Component.seen.append(section)
+
+    component = Component()
+    store.subscribe(component.apply_config, 'dispatcher')
+    calls = []
+    unsubscribe = store.subscribe(calls.append, 'dispatcher')
+    # Act
+    unsubscribe()
+    del component
+    _write(path, 'dispatcher:\n  timeout_s: 2\n', 2000)
+    store.reload()
+    # Assert
+    assert Component.seen == []
+    assert calls == []
+
+def test_dispatcher_applies_reloaded_timeout(tmp_path):
+    # Arrange
+    from core.action_dispatcher import ActionDispatcher
+    path = tmp_path / 'config.yaml'
+    _write(path, 'dispatcher:\n  timeout_s: 5\n', 1000)
+    store = ConfigStore(str(path))
+    with patch('core.utils._config_store', store):
+        dispatcher = ActionDispatcher()
+        # Act
+        _write(path, 'dispatcher:\n  timeout_s: 9\n  fail_fast: true\n', 2000)
+        store.reload()
+    # Assert
+    assert dispatcher.timeout_s == 9
+    assert dispatcher.fail_fast is True
+
 @patch('builtins.open', new_callable=mock_open, read_data='{"type": "object"}')
 def test_load_json_schema_happy_path(mock_file):
-    with patch('services.utils.json.load', return_value={'type': 'object'}):
+    with patch('core.utils.json.load', return_value={'type': 'object'}):
         schema = load_json_schema('dummy.json')
         assert schema == {'type': 'object'}
 
 @patch('builtins.open', side_effect=Exception('File error'))
 def test_load_json_schema_failure(mock_file):
     schema = load_json_schema('dummy.json')
-    assert schema == {} 
\ No newline at end of file
+    assert schema == {}
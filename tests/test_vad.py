@@ -0,0 +1,61 @@
+"""
+Tests for the VAD module.
+Covers vectorized frame classification, silence trimming and streaming endpointing.
+"""
+import numpy as np
+from core.vad import EnergyVAD, Endpointer, create_vad, trim_silence
+
+SR = 16000
+
+def _tone(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype('float32')
+
+def _silence(seconds):
+    return np.zeros(int(seconds * SR), dtype='float32')
+
+def test_speech_mask_matches_per_frame_decisions():
+    # Arrange
+    vad = EnergyVAD(SR, frame_ms=30)
+    audio = np.concatenate([_silence(0.3), _tone(0.3), _silence(0.3)])
+    # Act
+    mask = vad.speech_mask(audio)
+    # Assert
+    expected = [vad.is_speech(audio[i:i + vad.frame_len]) for i in range(0, len(audio), vad.frame_len)]
+    assert mask.tolist() == expected
+    assert mask[:10].sum() == 0 and mask[10:20].all()
+
+def test_trim_silence_reports_timestamps():
+    # Arrange
+    vad = EnergyVAD(SR, frame_ms=30)
+    audio = np.concatenate([_silence(0.6), _tone(0.9), _silence(1.5)])
+    # Act
+    trimmed, start, end = trim_silence(audio, vad)
+    # Assert
+    assert abs(start - 0.6) <= 0.03
+    assert abs(end - 1.5) <= 0.03
+    assert len(trimmed) < len(audio) / 2
+
+def test_endpointer_ends_utterance_after_hangover():
+    # Arrange
+    vad = EnergyVAD(SR, frame_ms=30)
+    endpointer = Endpointer(vad, SR, start_frames=3, hangover_ms=300, pre_roll_ms=90)
+    audio = np.concatenate([_silence(0.9), _tone(0.6), _silence(1.0), _tone(0.3)])
+    # Act
+    utterances = []
+    for i in range(0, len(audio), vad.frame_len):
+        utterance = endpointer.feed(audio[i:i + vad.frame_len])
+        if utterance is not None:
+            utterances.append(utterance)
+    tail = endpointer.flush()
+    # Assert
+    assert len(utterances) == 1
+    first = utterances[0]
+    assert abs(first.start - 0.9) <= 0.03
+    assert abs(first.end - 1.5) <= 0.03
+    assert len(first.audio) == int((first.end - first.start) * SR) + int(0.09 * SR)
+    assert tail is not None and abs(tail.start - 2.5) <= 0.03
+
+def test_create_vad_falls_back_to_energy():
+    vad = create_vad({'vad': {'backend': 'unknown'}})
+    assert isinstance(vad, EnergyVAD)
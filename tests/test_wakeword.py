@@ -0,0 +1,58 @@
+"""
+Tests for the wake-word module.
+Covers template matching, rejection of other sounds, idle gating and the hotkey.
+"""
+import numpy as np
+from core.wakeword import WakeWordDetector, dtw_distance
+
+SR = 16000
+
+def _word(freqs, dur=0.15):
+    t = np.arange(int(dur * SR)) / SR
+    return np.concatenate([0.3 * np.sin(2 * np.pi * f * t) for f in freqs]).astype('float32')
+
+def _run(detector, audio):
+    return [detector.process(audio[i:i + 480]) for i in range(0, len(audio) - 479, 480)]
+
+def _detector():
+    detector = WakeWordDetector({'wakeword': {'threshold': 8.0, 'sensitivity': 0.5}})
+    detector.enroll(_word([300, 600, 900, 500]))
+    return detector
+
+def test_detects_enrolled_word():
+    # Arrange
+    detector = _detector()
+    silence = np.zeros(SR // 2, dtype='float32')
+    audio = np.concatenate([silence, _word([300, 600, 900, 500], dur=0.17), silence])
+    # Act
+    hits = _run(detector, audio)
+    # Assert
+    assert sum(hits) == 1
+
+def test_rejects_other_word():
+    # Arrange
+    detector = _detector()
+    audio = np.concatenate([np.zeros(SR // 2, dtype='float32'), _word([900, 400, 1200, 250])])
+    # Act
+    hits = _run(detector, audio)
+    # Assert
+    assert not any(hits)
+
+def test_silence_is_gated_before_features():
+    # Arrange
+    detector = _detector()
+    # Act
+    _run(detector, np.zeros(SR * 2, dtype='float32'))
+    # Assert
+    assert detector.frames_seen == 66
+    assert detector.frames_scored == 0
+    assert detector.cpu_per_frame_us > 0
+
+def test_hotkey_trigger_wakes_next_frame():
+    detector = _detector()
+    detector.trigger()
+    assert detector.process(np.zeros(480, dtype='float32')) is True
+
+def test_dtw_distance_identical_sequences_is_zero():
+    features = np.random.default_rng(0).standard_normal((20, 13))
+    assert dtw_distance(features, features) == 0.0